@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the scaffolding pipeline.
+
+Generates synthetic template trees (seeded from this checkout's `templates/`,
+`memory/` and `scripts/`) at several sizes and times:
+
+* `setup_project_from_local` per agent, cold (template cache off) and warm
+  (cache enabled and primed; where files cannot be linked out of the cache it
+  is skipped, and warm should match cold)
+* `_generate_command_file` for TOML and Markdown output
+* `ensure_executable_scripts` over the project's script tree
+* end-to-end `specify init --no-git --from-release` against a local release
+  stand-in (an in-process HTTP server speaking the GitHub releases API), with
+  a cold and a warm artifact cache
+
+Each case reports the median of N samples; with `--rounds` the whole suite
+runs several times and the median of the per-round medians is kept. Results
+are compared with the baselines stored in `benchmarks/baselines/scaffold.json`.
+Every case is normalised by a fixed CPU calibration workload measured in the
+same run, so baselines recorded on one machine stay meaningful on another.
+Trees are written to /dev/shm when it exists, so disk writeback does not leak
+from one sample into the next.
+
+The run fails (exit code 1) when a case is slower than its baseline by more
+than the tolerance and the noise floor. It also fails when a warm (cached)
+case is slower than the same case cold: the cache exists to be faster, and
+`--update-baseline` refuses to record such a result.
+
+Usage:
+    python benchmarks/scaffold.py
+    python benchmarks/scaffold.py --sizes small,medium --repeat 9
+    python benchmarks/scaffold.py --only init
+    python benchmarks/scaffold.py --update-baseline --rounds 3
+    SPECIFY_BENCH_TOLERANCE=0.25 python benchmarks/scaffold.py
+"""
+
+import argparse
+import hashlib
+import http.server
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "scaffold.json"
+BASELINE_FORMAT = 1
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_MIN_DELTA_MS = 2.0
+DEFAULT_REPEAT = 9
+BASELINE_ROUNDS = 3
+INIT_AGENTS = ("claude", "gemini")
+
+
+@dataclass(frozen=True)
+class Size:
+    """Shape of a synthetic template tree.
+
+    command_copies:    copies of each command template (templates/commands)
+    memory_repeat:     each memory document is its own content repeated this many times
+    script_depth:      nesting depth of the extra helper script directories
+    scripts_per_level: helper scripts (per variant) at each nesting level
+    """
+    name: str
+    command_copies: int
+    memory_repeat: int
+    script_depth: int
+    scripts_per_level: int
+
+
+SIZES = {
+    "small": Size("small", 1, 1, 0, 0),
+    "medium": Size("medium", 8, 4, 4, 5),
+    "large": Size("large", 40, 32, 8, 20),
+}
+
+
+def make_tree(root: Path, size: Size) -> Path:
+    """Write a synthetic spec-kit source tree below root and return root."""
+    templates = root / "templates"
+    commands = templates / "commands"
+    commands.mkdir(parents=True)
+    for item in (REPO_ROOT / "templates").iterdir():
+        if item.is_file():
+            shutil.copyfile(item, templates / item.name)
+    for template in sorted((REPO_ROOT / "templates" / "commands").glob("*.md")):
+        text = template.read_text(encoding="utf-8")
+        for i in range(size.command_copies):
+            name = template.stem if i == 0 else f"{template.stem}-{i:03d}"
+            (commands / f"{name}.md").write_text(text, encoding="utf-8")
+
+    memory = root / "memory"
+    memory.mkdir()
+    for doc in sorted((REPO_ROOT / "memory").glob("*.md")):
+        (memory / doc.name).write_text(doc.read_text(encoding="utf-8") * size.memory_repeat, encoding="utf-8")
+
+    shutil.copytree(REPO_ROOT / "scripts", root / "scripts")
+    for variant, suffix in (("bash", ".sh"), ("powershell", ".ps1")):
+        seed = (REPO_ROOT / "scripts" / variant / f"common{suffix}").read_text(encoding="utf-8")
+        level = root / "scripts" / variant
+        for depth in range(size.script_depth):
+            level = level / f"lib{depth}"
+            level.mkdir()
+            for i in range(size.scripts_per_level):
+                (level / f"helper-{i:02d}{suffix}").write_text(seed, encoding="utf-8")
+    return root
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> float:
+    """Median wall time of fn in milliseconds over repeat calls, after one untimed warm-up call.
+    The median is steadier than the minimum across runs. setup runs untimed before each call.
+    """
+    samples = []
+    for _ in range(max(1, repeat) + 1):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples[1:])
+
+
+def calibrate(repeat: int) -> float:
+    """Best time of a fixed CPU workload (hashing, string handling, JSON), in milliseconds.
+    File I/O is deliberately left out: it is far noisier than the cases it would normalise.
+    """
+    payload = os.urandom(1 << 20)
+    lines = [f"line {i}: {{SCRIPT}} __AGENT__ $ARGUMENTS" for i in range(5000)]
+
+    def workload() -> None:
+        hashlib.sha256(payload).digest()
+        text = "\n".join(lines)
+        for _ in range(5):
+            text.replace("{SCRIPT}", "scripts/bash/setup-plan.sh --json").replace("__AGENT__", "claude").split("\n")
+        json.loads(json.dumps([{"name": line, "size": len(line)} for line in lines]))
+
+    return measure(workload, max(repeat, 10))
+
+
+class ReleaseStandIn:
+    """Serves `releases/latest` and its archives the way api.github.com does (including ranges)."""
+
+    def __init__(self, archives: dict[str, bytes], tag: str):
+        self.archives = archives
+        self.tag = tag
+        standin = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, status: int, body: bytes, headers: dict | None = None) -> None:
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                if self.path.endswith("/releases/latest"):
+                    self._send(200, json.dumps(standin.release()).encode(), {"Content-Type": "application/json"})
+                    return
+                data = standin.archives.get(self.path.rsplit("/", 1)[-1]) if self.path.startswith("/dl/") else None
+                if data is None:
+                    self._send(404, b"")
+                    return
+                requested = self.headers.get("Range")
+                if requested:
+                    start, _, end = requested.split("=", 1)[1].partition("-")
+                    first, last = int(start), int(end) if end else len(data) - 1
+                    self._send(206, data[first:last + 1], {"Content-Range": f"bytes {first}-{last}/{len(data)}", "Accept-Ranges": "bytes"})
+                else:
+                    self._send(200, data, {"Accept-Ranges": "bytes"})
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def release(self) -> dict:
+        return {
+            "tag_name": self.tag,
+            "assets": [
+                {
+                    "name": name,
+                    "size": len(data),
+                    "browser_download_url": f"{self.url}/dl/{name}",
+                    "digest": "sha256:" + hashlib.sha256(data).hexdigest(),
+                }
+                for name, data in self.archives.items()
+            ],
+        }
+
+    def __enter__(self) -> "ReleaseStandIn":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _zip_tree(root: Path) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(root.rglob("*")):
+            if path.is_file():
+                info = zipfile.ZipInfo.from_file(path, path.relative_to(root).as_posix())
+                with open(path, "rb") as f:
+                    zf.writestr(info, f.read(), zipfile.ZIP_DEFLATED)
+    return buffer.getvalue()
+
+
+def _quiet_tracker():
+    from specify_cli import StepTracker
+    return StepTracker("benchmark", mode="json", stream=io.StringIO())
+
+
+def run_size(size: Size, work: Path, repeat: int, wanted: Callable[[str], bool]) -> dict[str, float]:
+    from specify_cli import _agents, _generate_command_file, ensure_executable_scripts, setup_project_from_local
+
+    results: dict[str, float] = {}
+    tree = make_tree(work / "tree", size)
+    target = work / "project"
+
+    def reset_target() -> None:
+        shutil.rmtree(target, ignore_errors=True)
+
+    def record(case: str, fn: Callable[[], object], setup: Callable[[], object] | None = None) -> None:
+        name = f"{size.name}/{case}"
+        if wanted(name):
+            results[name] = measure(fn, repeat, setup)
+            print(f"  {name:<48} {results[name]:9.2f} ms", flush=True)
+
+    registry = _agents()
+    for agent in registry:
+        key = agent.key
+        record(f"setup_project_from_local[{key}]",
+               lambda: setup_project_from_local(target, key, "sh", use_cache=False, repo_root=tree), reset_target)
+        if wanted(f"{size.name}/setup_project_from_local[{key}]/warm"):
+            setup_project_from_local(work / "prime", key, "sh", use_cache=True, repo_root=tree)
+        record(f"setup_project_from_local[{key}]/warm",
+               lambda: setup_project_from_local(target, key, "sh", use_cache=True, repo_root=tree), reset_target)
+
+    rendered = [(path, path.read_text(encoding="utf-8")) for path in sorted((tree / "templates" / "commands").glob("*.md"))]
+    out_dir = work / "commands"
+    out_dir.mkdir()
+    for extension, arg_format in (("toml", "{{args}}"), ("md", "$ARGUMENTS")):
+        record(f"_generate_command_file[{extension}]",
+               lambda: [_generate_command_file(out_dir, path, text, extension, arg_format) for path, text in rendered])
+
+    reset_target()
+    setup_project_from_local(target, "claude", "sh", use_cache=False, repo_root=tree)
+    scripts = [p for p in (target / ".specify" / "scripts").rglob("*.sh")]
+
+    def clear_exec_bits() -> None:
+        for script in scripts:
+            os.chmod(script, 0o644)
+
+    record("ensure_executable_scripts", lambda: ensure_executable_scripts(target, tracker=_quiet_tracker()), clear_exec_bits)
+
+    if any(wanted(f"{size.name}/init[{agent}]{mode}") for agent in INIT_AGENTS for mode in ("", "/warm")):
+        results.update(run_init(size, tree, work, repeat, wanted))
+    return results
+
+
+def run_init(size: Size, tree: Path, work: Path, repeat: int, wanted: Callable[[str], bool]) -> dict[str, float]:
+    """End-to-end `specify init --no-git --from-release` in fresh interpreters."""
+    from specify_cli import setup_project_from_local
+
+    tag = f"v0.0.0-bench.{size.name}"
+    archives = {}
+    for agent in INIT_AGENTS:
+        rendered = work / f"release-{agent}"
+        setup_project_from_local(rendered, agent, "sh", use_cache=False, repo_root=tree)
+        archives[f"spec-kit-template-{agent}-sh-{tag}.zip"] = _zip_tree(rendered)
+
+    results: dict[str, float] = {}
+    runs = work / "runs"
+    runs.mkdir()
+    counter = iter(range(1_000_000))
+    entry = "import sys; from specify_cli import main; sys.argv[0] = 'specify'; main()"
+
+    with ReleaseStandIn(archives, tag) as standin:
+        env = {**os.environ, "SPECIFY_GITHUB_API_URL": standin.url, "SPECIFY_PROGRESS": "plain"}
+        env.pop("SPECIFY_NO_CACHE", None)
+
+        for agent in INIT_AGENTS:
+            def init(cache_dir: Path) -> None:
+                project = f"p{next(counter)}"
+                subprocess.run(
+                    [sys.executable, "-c", entry, "init", project, "--ai", agent, "--script", "sh",
+                     "--no-git", "--ignore-agent-tools", "--from-release"],
+                    cwd=runs, env={**env, "SPECIFY_CACHE_DIR": str(cache_dir)},
+                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True,
+                )
+
+            for mode in ("", "/warm"):
+                name = f"{size.name}/init[{agent}]{mode}"
+                if not wanted(name):
+                    continue
+                warm_cache = work / f"cache-{agent}"
+                if mode:
+                    init(warm_cache)  # prime the artifact store and release metadata
+                cold_caches = iter(work / f"cache-{agent}-{i}" for i in range(1_000_000))
+                results[name] = measure(lambda: init(warm_cache if mode else next(cold_caches)), repeat)
+                print(f"  {name:<48} {results[name]:9.2f} ms", flush=True)
+    return results
+
+
+def _default_workdir() -> Path | None:
+    """A tmpfs when there is one: disk writeback from one sample otherwise lands in the next."""
+    shm = Path("/dev/shm")
+    return shm if shm.is_dir() and os.access(shm, os.W_OK) else None
+
+
+def load_baseline(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if data.get("format") == BASELINE_FORMAT else {}
+
+
+def save_baseline(path: Path, baseline: dict, calibration_ms: float, results: dict[str, float], cache_link: str | None) -> None:
+    cases = dict(baseline.get("cases", {}))
+    for name, ms in results.items():
+        cases[name] = round(ms / calibration_ms, 4)
+    data = {
+        "format": BASELINE_FORMAT,
+        "recorded_on": {"python": platform.python_version(), "platform": platform.platform(), "calibration_ms": round(calibration_ms, 3),
+                        "cache_link": cache_link or "none"},
+        "cases": dict(sorted(cases.items())),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def expected_ms(baseline: dict, calibration_ms: float, name: str) -> float | None:
+    ratio = baseline.get("cases", {}).get(name)
+    return None if ratio is None else ratio * calibration_ms
+
+
+def is_regression(ms: float, expected: float | None, tolerance: float, min_delta_ms: float) -> bool:
+    return expected is not None and ms > expected * (1 + tolerance) and ms - expected > min_delta_ms
+
+
+def inversions(results: dict[str, float], tolerance: float, min_delta_ms: float) -> list[str]:
+    """Warm cases slower than their cold counterparts (beyond tolerance and the noise floor)."""
+    slower = []
+    for name, ms in results.items():
+        cold = results.get(name.removesuffix("/warm")) if name.endswith("/warm") else None
+        if cold is not None and is_regression(ms, cold, tolerance, min_delta_ms):
+            print(f"{name}: warm {ms:.2f} ms is slower than cold {cold:.2f} ms")
+            slower.append(name)
+    return slower
+
+
+def compare(baseline: dict, calibration_ms: float, results: dict[str, float], tolerance: float, min_delta_ms: float) -> list[str]:
+    """Print each case against its baseline; return the names of regressed cases."""
+    regressions = []
+    print(f"\n{'case':<50} {'median':>10} {'baseline':>10} {'change':>8}")
+    for name, ms in results.items():
+        expected = expected_ms(baseline, calibration_ms, name)
+        if expected is None:
+            print(f"{name:<50} {ms:8.2f}ms {'(new)':>10}")
+            continue
+        regressed = is_regression(ms, expected, tolerance, min_delta_ms)
+        print(f"{name:<50} {ms:8.2f}ms {expected:8.2f}ms {ms / expected - 1:+7.0%}{'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scaffolding pipeline against stored baselines.")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated tree sizes (default: {','.join(SIZES)})")
+    parser.add_argument("--only", help="Run only cases whose name contains this substring")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help=f"Samples per case; the median is reported (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--rounds", type=int, default=None,
+                        help=f"Runs of the whole suite; each case keeps the median over rounds (default: 1, {BASELINE_ROUNDS} with --update-baseline)")
+    parser.add_argument("--tolerance", type=float, default=float(os.getenv("SPECIFY_BENCH_TOLERANCE", DEFAULT_TOLERANCE)),
+                        help=f"Allowed slowdown relative to the baseline (default: {DEFAULT_TOLERANCE} = 50%% slower)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help=f"Slowdowns smaller than this are treated as noise (default: {DEFAULT_MIN_DELTA_MS})")
+    parser.add_argument("--workdir", type=Path, default=_default_workdir(),
+                        help="Where the synthetic trees and projects are written (default: /dev/shm when available)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline file (default: benchmarks/baselines/scaffold.json)")
+    parser.add_argument("--update-baseline", action="store_true", help="Record this run's results as the new baseline")
+    args = parser.parse_args()
+
+    sizes = [name.strip() for name in args.sizes.split(",") if name.strip()]
+    unknown = [name for name in sizes if name not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)} (choose from {', '.join(SIZES)})")
+
+    def wanted(name: str) -> bool:
+        return not args.only or args.only in name
+
+    with tempfile.TemporaryDirectory(prefix="specify-bench-", dir=args.workdir) as tmp:
+        work = Path(tmp)
+        # Keep the benchmark's template cache, artifact store and release metadata out of the user's cache
+        os.environ["SPECIFY_CACHE_DIR"] = str(work / "cache")
+        rounds = max(1, args.rounds or (BASELINE_ROUNDS if args.update_baseline else 1))
+        calibrations: list[float] = []
+        samples: dict[str, list[float]] = {}
+        for round_no in range(rounds):
+            calibrations.append(calibrate(args.repeat))
+            print(f"round {round_no + 1}/{rounds}, calibration: {calibrations[-1]:.2f} ms")
+            for name in sizes:
+                print(f"{name}:")
+                size_dir = work / f"{name}-{round_no}"
+                size_dir.mkdir()
+                for case, ms in run_size(SIZES[name], size_dir, args.repeat, wanted).items():
+                    samples.setdefault(case, []).append(ms)
+        calibration_ms = statistics.median(calibrations)
+        results = {case: statistics.median(values) for case, values in samples.items()}
+
+        from specify_cli.template_cache import TemplateCache
+        cache_link = TemplateCache().link_strategy(work)
+        baseline = load_baseline(args.baseline)
+        suspects = {
+            name for name, ms in results.items()
+            if is_regression(ms, expected_ms(baseline, calibration_ms, name), args.tolerance, args.min_delta_ms)
+        }
+        if suspects and not args.update_baseline:
+            # One slow sample set is usually noise: measure suspects again, longer, before failing
+            print(f"re-measuring {len(suspects)} suspected regression(s):")
+            for name in sizes:
+                if any(case.startswith(f"{name}/") for case in suspects):
+                    size_dir = work / f"{name}-confirm"
+                    size_dir.mkdir()
+                    for case, ms in run_size(SIZES[name], size_dir, args.repeat * 3, suspects.__contains__).items():
+                        results[case] = min(results[case], ms)
+    slower_warm = inversions(results, args.tolerance, args.min_delta_ms)
+    if args.update_baseline:
+        if slower_warm:
+            print(f"\nNot updating the baseline: {len(slower_warm)} warm case(s) slower than cold")
+            return 1
+        save_baseline(args.baseline, baseline, calibration_ms, results, cache_link)
+        print(f"\nBaseline updated: {args.baseline}")
+        return 0
+    regressions = compare(baseline, calibration_ms, results, args.tolerance, args.min_delta_ms) + slower_warm
+    if regressions:
+        print(f"FAIL: {len(regressions)} case(s) slower than baseline, or than cold, by more than {args.tolerance:.0%}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the `specify` entry point.
+
+Runs `python -X importtime -c "import specify_cli"` in fresh interpreters and
+fails (exit code 1) when either:
+
+* the median cumulative import time of `specify_cli` exceeds the budget, or
+* a network / TLS / interactive-UI module is imported eagerly.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 120 --runs 9
+    SPECIFY_STARTUP_BUDGET_MS=200 python benchmarks/startup.py
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 150.0
+
+# Modules that must only be loaded inside the commands that need them
+EAGER_FORBIDDEN = (
+    "httpx",
+    "httpcore",
+    "truststore",
+    "ssl",
+    "readchar",
+    "rich.live",
+    "rich.progress",
+    "rich.table",
+    "rich.tree",
+)
+
+
+def measure_once(module: str = "specify_cli") -> tuple[float, set[str]]:
+    """Import `module` in a fresh interpreter; return (cumulative ms, imported module names)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    imported: set[str] = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header row
+        name = parts[2].strip()
+        imported.add(name)
+        if name == module:
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"'{module}' not found in -X importtime output")
+    return cumulative_us / 1000.0, imported
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fail when `specify` cold start regresses past a budget.")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("SPECIFY_STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                        help=f"Maximum median import time in milliseconds (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to sample (default: 5)")
+    args = parser.parse_args()
+
+    samples = []
+    eager: set[str] = set()
+    for _ in range(max(1, args.runs)):
+        elapsed_ms, imported = measure_once()
+        samples.append(elapsed_ms)
+        eager |= imported.intersection(EAGER_FORBIDDEN)
+
+    median_ms = statistics.median(samples)
+    print(f"specify_cli import: median {median_ms:.1f} ms, min {min(samples):.1f} ms over {len(samples)} runs (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if eager:
+        print(f"FAIL: modules imported at startup that should be lazy: {', '.join(sorted(eager))}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: cold start {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,95 @@
 #!/usr/bin/env bash
 # Common functions and variables for all scripts
+#
+# The repository and branch are found by reading .git and HEAD directly, the
+# same way `specify paths` does, so resolving the feature paths starts no git
+# processes.
+
+# Find the git repository containing the working directory without running git.
+# Sets _GIT_TOPLEVEL and _GIT_DIR (both empty outside a repository).
+_find_git_repo() {
+    _GIT_TOPLEVEL="" _GIT_DIR=""
+    if [[ -n "${GIT_DIR:-}" ]]; then
+        _GIT_DIR="$(cd "$GIT_DIR" 2>/dev/null && pwd -P)" || return 1
+        _GIT_TOPLEVEL="$(cd "${GIT_WORK_TREE:-.}" 2>/dev/null && pwd -P)"
+        return 0
+    fi
+
+    local ceilings=() ceiling dir parent line target
+    IFS=: read -ra ceilings <<< "${GIT_CEILING_DIRECTORIES:-}"
+    dir="$(pwd -P)"
+    while :; do
+        if [[ -d "$dir/.git" ]]; then
+            if [[ -f "$dir/.git/HEAD" && -d "$dir/.git/objects" ]]; then
+                _GIT_TOPLEVEL="$dir" _GIT_DIR="$dir/.git"
+                return 0
+            fi
+        elif [[ -f "$dir/.git" ]]; then
+            # Worktrees and submodules: a "gitdir: <path>" file
+            line=""
+            IFS= read -r line < "$dir/.git" || true
+            if [[ "$line" == gitdir:* ]]; then
+                target="${line#gitdir:}"
+                target="${target#"${target%%[![:space:]]*}"}"
+                [[ "$target" == /* ]] || target="$dir/$target"
+                if [[ -f "$target/HEAD" ]]; then
+                    _GIT_TOPLEVEL="$dir" _GIT_DIR="$target"
+                    return 0
+                fi
+            fi
+        fi
+        [[ "$dir" == "/" ]] && return 1
+        parent="${dir%/*}"
+        parent="${parent:-/}"
+        for ceiling in "${ceilings[@]}"; do
+            [[ "$ceiling" == /* && "${ceiling%/}" == "${parent%/}" ]] && return 1
+        done
+        dir="$parent"
+    done
+}
+
+# Directory holding the refs (and the feature registry) for a git dir: the main
+# repository's for linked worktrees, the git dir itself otherwise
+_git_common_dir() {
+    local git_dir="$1" rel=""
+    if [[ -f "$git_dir/commondir" ]]; then
+        IFS= read -r rel < "$git_dir/commondir" || true
+        [[ "$rel" == /* ]] && echo "$rel" || echo "$git_dir/$rel"
+    else
+        echo "$git_dir"
+    fi
+}
+
+# Branch name as `git rev-parse --abbrev-ref HEAD` prints it, read from HEAD.
+# Sets _GIT_BRANCH; fails (like rev-parse) when HEAD names a branch with no
+# commits yet.
+_read_git_branch() {
+    local git_dir="$1" head="" ref common sha name
+    _GIT_BRANCH=""
+    IFS= read -r head < "$git_dir/HEAD" || [[ -n "$head" ]] || return 1
+    if [[ "$head" != ref:* ]]; then
+        _GIT_BRANCH="HEAD"
+        return 0
+    fi
+    ref="${head#ref:}"
+    ref="${ref#"${ref%%[![:space:]]*}"}"
+    # Linked worktrees keep their refs in the main repository
+    common="$git_dir"
+    [[ -f "$git_dir/commondir" ]] && common=$(_git_common_dir "$git_dir")
+    if [[ ! -f "$common/$ref" ]]; then
+        [[ -f "$common/packed-refs" ]] || return 1
+        while read -r sha name; do
+            [[ "$name" == "$ref" ]] && break
+        done < "$common/packed-refs"
+        [[ "$name" == "$ref" ]] || return 1
+    fi
+    _GIT_BRANCH="${ref#refs/heads/}"
+}
 
 # Get repository root, with fallback for non-git repositories
 get_repo_root() {
-    if git rev-parse --show-toplevel >/dev/null 2>&1; then
-        git rev-parse --show-toplevel
+    if _find_git_repo; then
+        echo "$_GIT_TOPLEVEL"
     else
         # Fall back to script location for non-git repos
         local script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
@@ -12,6 +97,26 @@ get_repo_root() {
     fi
 }
 
+# Latest NNN-name directory under the given specs directory (empty if none)
+_latest_feature() {
+    local specs_dir="$1" latest_feature="" highest=0 dir dirname number
+    [[ -d "$specs_dir" ]] || return 0
+    for dir in "$specs_dir"/*; do
+        if [[ -d "$dir" ]]; then
+            dirname="${dir##*/}"
+            if [[ "$dirname" =~ ^([0-9]{3})- ]]; then
+                number=${BASH_REMATCH[1]}
+                number=$((10#$number))
+                if [[ "$number" -gt "$highest" ]]; then
+                    highest=$number
+                    latest_feature=$dirname
+                fi
+            fi
+        fi
+    done
+    echo "$latest_feature"
+}
+
 # Get current branch, with fallback for non-git repositories
 get_current_branch() {
     # First check if SPECIFY_FEATURE environment variable is set
@@ -19,47 +124,26 @@ get_current_branch() {
         echo "$SPECIFY_FEATURE"
         return
     fi
-    
+
     # Then check git if available
-    if git rev-parse --abbrev-ref HEAD >/dev/null 2>&1; then
-        git rev-parse --abbrev-ref HEAD
+    if _find_git_repo && _read_git_branch "$_GIT_DIR"; then
+        echo "$_GIT_BRANCH"
         return
     fi
-    
+
     # For non-git repos, try to find the latest feature directory
-    local repo_root=$(get_repo_root)
-    local specs_dir="$repo_root/specs"
-    
-    if [[ -d "$specs_dir" ]]; then
-        local latest_feature=""
-        local highest=0
-        
-        for dir in "$specs_dir"/*; do
-            if [[ -d "$dir" ]]; then
-                local dirname=$(basename "$dir")
-                if [[ "$dirname" =~ ^([0-9]{3})- ]]; then
-                    local number=${BASH_REMATCH[1]}
-                    number=$((10#$number))
-                    if [[ "$number" -gt "$highest" ]]; then
-                        highest=$number
-                        latest_feature=$dirname
-                    fi
-                fi
-            fi
-        done
-        
-        if [[ -n "$latest_feature" ]]; then
-            echo "$latest_feature"
-            return
-        fi
+    local latest_feature=$(_latest_feature "$(get_repo_root)/specs")
+    if [[ -n "$latest_feature" ]]; then
+        echo "$latest_feature"
+        return
     fi
-    
+
     echo "main"  # Final fallback
 }
 
 # Check if we have git available
 has_git() {
-    git rev-parse --show-toplevel >/dev/null 2>&1
+    _find_git_repo
 }
 
 check_feature_branch() {
@@ -84,14 +168,25 @@ check_feature_branch() {
 get_feature_dir() { echo "$1/specs/$2"; }
 
 get_feature_paths() {
-    local repo_root=$(get_repo_root)
-    local current_branch=$(get_current_branch)
-    local has_git_repo="false"
-    
-    if has_git; then
+    # One repository lookup shared by the root, the branch and HAS_GIT
+    local repo_root current_branch="" has_git_repo="false"
+    if _find_git_repo; then
+        repo_root="$_GIT_TOPLEVEL"
         has_git_repo="true"
+    else
+        repo_root=$(get_repo_root)
     fi
-    
+
+    if [[ -n "${SPECIFY_FEATURE:-}" ]]; then
+        current_branch="$SPECIFY_FEATURE"
+    elif [[ "$has_git_repo" == "true" ]] && _read_git_branch "$_GIT_DIR"; then
+        current_branch="$_GIT_BRANCH"
+    fi
+    if [[ -z "$current_branch" ]]; then
+        current_branch=$(_latest_feature "$repo_root/specs")
+        current_branch="${current_branch:-main}"
+    fi
+
     local feature_dir=$(get_feature_dir "$repo_root" "$current_branch")
     
     cat <<EOF
@@ -35,10 +35,12 @@ find_repo_root() {
 # to searching for repository markers so the workflow still functions in repositories that
 # were initialised with --no-git.
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/common.sh"
 
-if git rev-parse --show-toplevel >/dev/null 2>&1; then
-    REPO_ROOT=$(git rev-parse --show-toplevel)
+if _find_git_repo; then
+    REPO_ROOT="$_GIT_TOPLEVEL"
     HAS_GIT=true
+    REGISTRY_DIR="$(_git_common_dir "$_GIT_DIR")/specify"
 else
     REPO_ROOT="$(find_repo_root "$SCRIPT_DIR")"
     if [ -z "$REPO_ROOT" ]; then
@@ -46,6 +48,7 @@ else
         exit 1
     fi
     HAS_GIT=false
+    REGISTRY_DIR="$REPO_ROOT/.specify"
 fi
 
 cd "$REPO_ROOT"
@@ -53,33 +56,118 @@ cd "$REPO_ROOT"
 SPECS_DIR="$REPO_ROOT/specs"
 mkdir -p "$SPECS_DIR"
 
-HIGHEST=0
-if [ -d "$SPECS_DIR" ]; then
-    for dir in "$SPECS_DIR"/*; do
-        [ -d "$dir" ] || continue
-        dirname=$(basename "$dir")
-        number=$(echo "$dirname" | grep -o '^[0-9]\+' || echo "0")
-        number=$((10#$number))
-        if [ "$number" -gt "$HIGHEST" ]; then HIGHEST=$number; fi
-    done
-fi
-
-NEXT=$((HIGHEST + 1))
-FEATURE_NUM=$(printf "%03d" "$NEXT")
-
 BRANCH_NAME=$(echo "$FEATURE_DESCRIPTION" | tr '[:upper:]' '[:lower:]' | sed 's/[^a-z0-9]/-/g' | sed 's/-\+/-/g' | sed 's/^-//' | sed 's/-$//')
 WORDS=$(echo "$BRANCH_NAME" | tr '-' '\n' | grep -v '^$' | head -3 | tr '\n' '-' | sed 's/-$//')
-BRANCH_NAME="${FEATURE_NUM}-${WORDS}"
+
+# Numbers are allocated through the feature registry shared with
+# `specify feature create`: past both specs/ and the numbers it has handed out
+# on other branches and worktrees
+REGISTRY_INDEX="$REGISTRY_DIR/features.json"
+mkdir -p "$REGISTRY_DIR"
+
+# python3 is the only writer of the index. Like FeatureRegistry.allocate() it
+# works under the registry lock, rescans specs/ only when its mtime differs
+# from the one recorded, claims the spec directory and rewrites the index
+allocate_feature() {
+    python3 - "$REGISTRY_INDEX" "$REGISTRY_DIR/features.lock" "$SPECS_DIR" "$WORDS" <<'PY'
+import json, os, re, sys
+
+index_path, lock_path, specs_dir, words = sys.argv[1:]
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+lock = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+if fcntl is not None:
+    fcntl.flock(lock, fcntl.LOCK_EX)
+
+
+def specs_mtime():
+    try:
+        return os.stat(specs_dir).st_mtime_ns
+    except OSError:
+        return None
+
+
+try:
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+except (OSError, ValueError):
+    index = None
+if not isinstance(index, dict) or index.get("version") != 1:
+    index = {"version": 1}
+if not isinstance(index.get("next"), int) or index["next"] < 1:
+    index["next"] = 1
+if not isinstance(index.get("features"), dict):
+    index["features"] = {}
+features = index["features"]
+if "specs_mtime_ns" not in index or index["specs_mtime_ns"] != specs_mtime():
+    for entry in os.scandir(specs_dir):
+        match = re.match(r"(\d+)", entry.name)
+        if match and entry.is_dir():
+            features[entry.name] = int(match.group(1))
+    index["next"] = max(index["next"], max(features.values(), default=0) + 1)
+number = index["next"]
+while True:
+    name = "%03d-%s" % (number, words)
+    try:
+        os.mkdir(os.path.join(specs_dir, name))
+        break
+    except FileExistsError:
+        number += 1
+features[name] = number
+index["next"] = number + 1
+index["specs_mtime_ns"] = specs_mtime()
+index["features"] = dict(sorted(features.items(), key=lambda item: (item[1], item[0])))
+tmp = os.path.join(os.path.dirname(index_path), ".features.json.%d.tmp" % os.getpid())
+with open(tmp, "w", encoding="utf-8") as f:
+    f.write(json.dumps(index, indent=2) + "\n")
+os.replace(tmp, index_path)
+print(number)
+PY
+}
+
+if command -v python3 >/dev/null 2>&1; then
+    NEXT=$(allocate_feature)
+    printf -v FEATURE_NUM "%03d" "$NEXT"
+    BRANCH_NAME="${FEATURE_NUM}-${WORDS}"
+    FEATURE_DIR="$SPECS_DIR/$BRANCH_NAME"
+else
+    # No python3: take the next number from the index (specs/ is only scanned
+    # when there is none) and leave the index alone; the registry rescans
+    # specs/ once it sees its mtime change
+    NEXT=""
+    if [ -f "$REGISTRY_INDEX" ] && [[ "$(<"$REGISTRY_INDEX")" =~ \"next\":\ ([0-9]+) ]]; then
+        NEXT=$((10#${BASH_REMATCH[1]}))
+    else
+        HIGHEST=0
+        for dir in "$SPECS_DIR"/*; do
+            [ -d "$dir" ] || continue
+            dirname="${dir##*/}"
+            [[ "$dirname" =~ ^([0-9]+) ]] || continue
+            number=$((10#${BASH_REMATCH[1]}))
+            if [ "$number" -gt "$HIGHEST" ]; then HIGHEST=$number; fi
+        done
+        NEXT=$((HIGHEST + 1))
+    fi
+
+    # Claim the number by creating its spec directory (mkdir is atomic); on a
+    # collision move on to the next number
+    while :; do
+        printf -v FEATURE_NUM "%03d" "$NEXT"
+        BRANCH_NAME="${FEATURE_NUM}-${WORDS}"
+        FEATURE_DIR="$SPECS_DIR/$BRANCH_NAME"
+        mkdir "$FEATURE_DIR" 2>/dev/null && break
+        NEXT=$((NEXT + 1))
+    done
+fi
 
 if [ "$HAS_GIT" = true ]; then
-    git checkout -b "$BRANCH_NAME"
+    git checkout -b "$BRANCH_NAME" || { rmdir "$FEATURE_DIR"; exit 1; }
 else
     >&2 echo "[specify] Warning: Git repository not detected; skipped branch creation for $BRANCH_NAME"
 fi
 
-FEATURE_DIR="$SPECS_DIR/$BRANCH_NAME"
-mkdir -p "$FEATURE_DIR"
-
 TEMPLATE="$REPO_ROOT/.specify/templates/spec-template.md"
 SPEC_FILE="$FEATURE_DIR/spec.md"
 if [ -f "$TEMPLATE" ]; then cp "$TEMPLATE" "$SPEC_FILE"; else touch "$SPEC_FILE"; fi
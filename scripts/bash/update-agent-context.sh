@@ -100,6 +100,11 @@ log_warning() {
     echo "WARNING: $1" >&2
 }
 
+# Escape text for the replacement side of a sed s|||: "\", "&" and the "|" delimiter
+sed_replacement() {
+    printf '%s\n' "$1" | sed 's/[\\&|]/\\&/g'
+}
+
 # Cleanup function for temporary files
 cleanup() {
     local exit_code=$?
@@ -292,16 +297,16 @@ create_new_agent_file() {
     project_structure=$(get_project_structure "$NEW_PROJECT_TYPE")
     
     local commands
-    commands=$(get_commands_for_language "$NEW_LANG")
+    commands=$(sed_replacement "$(get_commands_for_language "$NEW_LANG")")
     
     local language_conventions
-    language_conventions=$(get_language_conventions "$NEW_LANG")
+    language_conventions=$(sed_replacement "$(get_language_conventions "$NEW_LANG")")
     
-    # Perform substitutions with error checking using safer approach
-    # Escape special characters for sed by using a different delimiter or escaping
-    local escaped_lang=$(printf '%s\n' "$NEW_LANG" | sed 's/[\[\.*^$()+{}|]/\\&/g')
-    local escaped_framework=$(printf '%s\n' "$NEW_FRAMEWORK" | sed 's/[\[\.*^$()+{}|]/\\&/g')
-    local escaped_branch=$(printf '%s\n' "$CURRENT_BRANCH" | sed 's/[\[\.*^$()+{}|]/\\&/g')
+    # Values are inserted literally: escape what a sed replacement would interpret
+    local escaped_lang=$(sed_replacement "$NEW_LANG")
+    local escaped_framework=$(sed_replacement "$NEW_FRAMEWORK")
+    local escaped_branch=$(sed_replacement "$CURRENT_BRANCH")
+    project_name=$(sed_replacement "$project_name")
     
     # Build technology stack and recent change strings conditionally
     local tech_stack
@@ -363,9 +368,9 @@ update_existing_agent_file() {
     
     log_info "Updating existing agent context file..."
     
-    # Use a single temporary file for atomic update
+    # Use a single temporary file next to the target for atomic update
     local temp_file
-    temp_file=$(mktemp) || {
+    temp_file=$(mktemp "$target_file.XXXXXX") || {
         log_error "Failed to create temporary file"
         return 1
     }
@@ -376,11 +381,11 @@ update_existing_agent_file() {
     local new_change_entry=""
     
     # Prepare new technology entries
-    if [[ -n "$tech_stack" ]] && ! grep -q "$tech_stack" "$target_file"; then
+    if [[ -n "$tech_stack" ]] && ! grep -qF -- "$tech_stack" "$target_file"; then
         new_tech_entries+=("- $tech_stack ($CURRENT_BRANCH)")
     fi
     
-    if [[ -n "$NEW_DB" ]] && [[ "$NEW_DB" != "N/A" ]] && [[ "$NEW_DB" != "NEEDS CLARIFICATION" ]] && ! grep -q "$NEW_DB" "$target_file"; then
+    if [[ -n "$NEW_DB" ]] && [[ "$NEW_DB" != "N/A" ]] && [[ "$NEW_DB" != "NEEDS CLARIFICATION" ]] && ! grep -qF -- "$NEW_DB" "$target_file"; then
         new_tech_entries+=("- $NEW_DB ($CURRENT_BRANCH)")
     fi
     
@@ -390,6 +395,14 @@ update_existing_agent_file() {
     elif [[ -n "$NEW_DB" ]] && [[ "$NEW_DB" != "N/A" ]] && [[ "$NEW_DB" != "NEEDS CLARIFICATION" ]]; then
         new_change_entry="- $CURRENT_BRANCH: Added $NEW_DB"
     fi
+
+    # Re-running for the same feature does not repeat its entry; Recent Changes
+    # keeps the three most recent entries
+    if [[ -n "$new_change_entry" ]] && grep -qxF -- "$new_change_entry" "$target_file"; then
+        new_change_entry=""
+    fi
+    local max_existing_changes=3
+    [[ -n "$new_change_entry" ]] && max_existing_changes=2
     
     # Process file line by line
     local in_tech_section=false
@@ -405,14 +418,13 @@ update_existing_agent_file() {
             in_tech_section=true
             continue
         elif [[ $in_tech_section == true ]] && [[ "$line" =~ ^##[[:space:]] ]]; then
-            # Add new tech entries before closing the section
+            # Add new tech entries before closing the section; the heading itself
+            # is handled below (it may be Recent Changes)
             if [[ $tech_entries_added == false ]] && [[ ${#new_tech_entries[@]} -gt 0 ]]; then
                 printf '%s\n' "${new_tech_entries[@]}" >> "$temp_file"
                 tech_entries_added=true
             fi
-            echo "$line" >> "$temp_file"
             in_tech_section=false
-            continue
         elif [[ $in_tech_section == true ]] && [[ -z "$line" ]]; then
             # Add new tech entries before empty line in tech section
             if [[ $tech_entries_added == false ]] && [[ ${#new_tech_entries[@]} -gt 0 ]]; then
@@ -438,8 +450,8 @@ update_existing_agent_file() {
             in_changes_section=false
             continue
         elif [[ $in_changes_section == true ]] && [[ "$line" == "- "* ]]; then
-            # Keep only first 2 existing changes
-            if [[ $existing_changes_count -lt 2 ]]; then
+            # Keep only the most recent existing changes
+            if [[ $existing_changes_count -lt $max_existing_changes ]]; then
                 echo "$line" >> "$temp_file"
                 ((existing_changes_count++))
             fi
@@ -459,6 +471,12 @@ update_existing_agent_file() {
         printf '%s\n' "${new_tech_entries[@]}" >> "$temp_file"
     fi
     
+    # Leave the file (and its mtime) alone when nothing changed
+    if cmp -s "$temp_file" "$target_file"; then
+        rm -f "$temp_file"
+        return 0
+    fi
+
     # Move temp file to target atomically
     if ! mv "$temp_file" "$target_file"; then
         log_error "Failed to update target file"
@@ -501,7 +519,7 @@ update_agent_file() {
     if [[ ! -f "$target_file" ]]; then
         # Create new file from template
         local temp_file
-        temp_file=$(mktemp) || {
+        temp_file=$(mktemp "$target_file.XXXXXX") || {
             log_error "Failed to create temporary file"
             return 1
         }
@@ -27,34 +27,84 @@ Or install globally:
 import os
 import subprocess
 import sys
-import zipfile
-import tempfile
+import threading
+import time
 import shutil
 import shlex
 import json
 import re
-from pathlib import Path
-from typing import Optional, Tuple
+from contextlib import nullcontext
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Optional, Tuple
 
 import typer
-import httpx
 from rich.console import Console
 from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.text import Text
-from rich.live import Live
 from rich.align import Align
-from rich.table import Table
-from rich.tree import Tree
 from typer.core import TyperGroup
 
-# For cross-platform keyboard input
-import readchar
-import ssl
-import truststore
+from .tracing import span, traced
 
-ssl_context = truststore.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-client = httpx.Client(verify=ssl_context)
+# Network, TLS and interactive-UI modules (httpx, truststore, readchar,
+# rich.live/progress/table/tree) are imported lazily inside the code paths
+# that need them so `specify --help` and `specify check` start fast.
+if TYPE_CHECKING:
+    import httpx
+    from .artifacts import ArtifactStore
+    from .agents import AgentRegistry
+    from .planner import WritePlan
+
+_ssl_context = None
+
+
+def _get_ssl_context():
+    """Return the shared truststore-backed SSL context, creating it on first use."""
+    global _ssl_context
+    if _ssl_context is None:
+        import ssl
+        import truststore
+        _ssl_context = truststore.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    return _ssl_context
+
+
+@traced()
+def _http_client(skip_tls: bool = False) -> "httpx.Client":
+    """Create an httpx client (imported on demand) using the system trust store."""
+    import httpx
+    return httpx.Client(verify=False if skip_tls else _get_ssl_context())
+
+
+_API_EXPORTS = ("scaffold", "scaffold_async", "ScaffoldOptions", "Manifest", "ScaffoldError", "ConflictError")
+
+_REGISTRY_TABLES = {
+    "AI_CHOICES": "choices",
+    "AGENT_COMMAND_DIRS": "command_dirs",
+    "AGENT_ARG_FORMATS": "arg_formats",
+    "AGENT_EXTENSIONS": "extensions",
+}
+
+
+def __getattr__(name: str):
+    # Backwards compatibility for the former module-level `ssl_context`, `client`
+    # and agent tables (now served from the agent registry).
+    global client
+    if name == "ssl_context":
+        return _get_ssl_context()
+    if name == "client":
+        client = _http_client()
+        return client
+    if name in _REGISTRY_TABLES:
+        from .agents import registry
+        return getattr(registry(), _REGISTRY_TABLES[name])
+    if name == "CLAUDE_LOCAL_PATH":
+        from .agents import registry
+        return registry().fallbacks["claude"]
+    if name in _API_EXPORTS:
+        # The library API is loaded on first use so the CLI does not pay for it
+        from . import api
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def _github_token(cli_token: str | None = None) -> str | None:
     """Return sanitized GitHub token (cli arg takes precedence) or None."""
@@ -66,26 +116,18 @@ def _github_auth_headers(cli_token: str | None = None) -> dict:
     return {"Authorization": f"Bearer {token}"} if token else {}
 
 # Constants
-AI_CHOICES = {
-    "copilot": "GitHub Copilot",
-    "claude": "Claude Code",
-    "gemini": "Gemini CLI",
-    "cursor": "Cursor",
-    "qwen": "Qwen Code",
-    "opencode": "opencode",
-    "codex": "Codex CLI",
-    "windsurf": "Windsurf",
-    "kilocode": "Kilo Code",
-    "auggie": "Auggie CLI",
-    "roo": "Roo Code",
-    "kiro": "Kiro",
-    "adk": "ADK (Agent Development Kit)"
-}
-# Add script type choices
+# Agent metadata lives in the declarative registry (specify_cli.agents)
 SCRIPT_TYPE_CHOICES = {"sh": "POSIX Shell (bash/zsh)", "ps": "PowerShell"}
 
-# Claude CLI local installation path after migrate-installer
-CLAUDE_LOCAL_PATH = Path.home() / ".claude" / "local" / "claude"
+
+def _agents() -> "AgentRegistry":
+    """The agent registry (builtin plus user agents.toml), loaded once per process."""
+    from .agents import RegistryError, registry
+    try:
+        return registry()
+    except RegistryError as e:
+        console.print(f"[red]Error:[/red] Invalid agent registry: {e}")
+        raise typer.Exit(1)
 
 # ASCII Art Banner
 BANNER = """
@@ -101,20 +143,40 @@ TAGLINE = "GitHub Spec Kit - Spec-Driven Development Toolkit"
 class StepTracker:
     """Track and render hierarchical steps without emojis, similar to Claude Code tree output.
     Supports live auto-refresh via an attached refresh callback.
+
+    Steps are indexed by key, refresh callbacks are coalesced to at most one per
+    min_interval seconds, and the rich Tree is built once and only the nodes of
+    changed steps are relabelled. In 'plain' and 'json' modes nothing is redrawn:
+    each status change is appended to stream as a text line or a JSON event.
     """
-    def __init__(self, title: str):
+    MODES = ("tree", "plain", "json")
+
+    def __init__(self, title: str, mode: str = "tree", min_interval: float = 0.1, stream=None):
         self.title = title
         self.steps = []  # list of dicts: {key, label, status, detail}
         self.status_order = {"pending": 0, "running": 1, "done": 2, "error": 3, "skipped": 4}
+        self.mode = mode if mode in self.MODES else "tree"
+        self.min_interval = min_interval
+        self.stream = stream
+        self._index = {}  # key -> step dict (same objects as in self.steps)
         self._refresh_cb = None  # callable to trigger UI refresh
+        self._last_refresh = 0.0
+        self._refresh_pending = False
+        self._tree = None
+        self._nodes = {}  # key -> rich Tree node
+        self._dirty = {}  # keys whose node label must be rebuilt (ordered)
+        self._lock = threading.RLock()
+        self._started = time.monotonic()
 
     def attach_refresh(self, cb):
         self._refresh_cb = cb
 
+    def get(self, key: str) -> dict | None:
+        return self._index.get(key)
+
     def add(self, key: str, label: str):
-        if key not in [s["key"] for s in self.steps]:
-            self.steps.append({"key": key, "label": label, "status": "pending", "detail": ""})
-            self._maybe_refresh()
+        if key not in self._index:
+            self._append({"key": key, "label": label, "status": "pending", "detail": ""})
 
     def start(self, key: str, detail: str = ""):
         self._update(key, status="running", detail=detail)
@@ -128,63 +190,135 @@ class StepTracker:
     def skip(self, key: str, detail: str = ""):
         self._update(key, status="skipped", detail=detail)
 
+    def _append(self, step: dict):
+        with self._lock:
+            self.steps.append(step)
+            self._index[step["key"]] = step
+            self._dirty[step["key"]] = None
+        self._emit(step)
+        self._maybe_refresh()
+
     def _update(self, key: str, status: str, detail: str):
-        for s in self.steps:
-            if s["key"] == key:
-                s["status"] = status
-                if detail:
-                    s["detail"] = detail
-                self._maybe_refresh()
-                return
-        # If not present, add it
-        self.steps.append({"key": key, "label": key, "status": status, "detail": detail})
+        step = self._index.get(key)
+        if step is None:
+            # If not present, add it
+            self._append({"key": key, "label": key, "status": status, "detail": detail})
+            return
+        with self._lock:
+            step["status"] = status
+            if detail:
+                step["detail"] = detail
+            self._dirty[key] = None
+        self._emit(step)
         self._maybe_refresh()
 
+    def _emit(self, step: dict):
+        """Append one progress record in plain/json mode (tree mode redraws instead)."""
+        if self.mode == "tree":
+            return
+        stream = self.stream or sys.stdout
+        if self.mode == "json":
+            line = json.dumps({
+                "event": "step",
+                "title": self.title,
+                "key": step["key"],
+                "label": step["label"],
+                "status": step["status"],
+                "detail": step["detail"],
+                "elapsed": round(time.monotonic() - self._started, 3),
+            })
+        elif step["status"] == "pending":
+            return
+        else:
+            detail = f" ({step['detail'].strip()})" if step["detail"] else ""
+            line = f"[{step['status']}] {step['label']}{detail}"
+        stream.write(line + "\n")
+        stream.flush()
+
     def _maybe_refresh(self):
-        if self._refresh_cb:
+        if not self._refresh_cb:
+            return
+        now = time.monotonic()
+        if now - self._last_refresh < self.min_interval:
+            # Coalesce: the next refresh (or flush) picks this change up
+            self._refresh_pending = True
+            return
+        self._last_refresh = now
+        self._refresh_pending = False
+        try:
+            self._refresh_cb()
+        except Exception:
+            pass
+
+    def flush(self):
+        """Deliver a refresh that was held back by the frame interval."""
+        if self._refresh_pending and self._refresh_cb:
+            self._refresh_pending = False
+            self._last_refresh = time.monotonic()
             try:
                 self._refresh_cb()
             except Exception:
                 pass
 
-    def render(self):
-        tree = Tree(f"[cyan]{self.title}[/cyan]", guide_style="grey50")
-        for step in self.steps:
-            label = step["label"]
-            detail_text = step["detail"].strip() if step["detail"] else ""
-
-            # Circles (unchanged styling)
-            status = step["status"]
-            if status == "done":
-                symbol = "[green]●[/green]"
-            elif status == "pending":
-                symbol = "[green dim]○[/green dim]"
-            elif status == "running":
-                symbol = "[cyan]○[/cyan]"
-            elif status == "error":
-                symbol = "[red]●[/red]"
-            elif status == "skipped":
-                symbol = "[yellow]○[/yellow]"
-            else:
-                symbol = " "
+    @staticmethod
+    def _line(step: dict) -> str:
+        label = step["label"]
+        detail_text = step["detail"].strip() if step["detail"] else ""
+
+        # Circles (unchanged styling)
+        status = step["status"]
+        if status == "done":
+            symbol = "[green]●[/green]"
+        elif status == "pending":
+            symbol = "[green dim]○[/green dim]"
+        elif status == "running":
+            symbol = "[cyan]○[/cyan]"
+        elif status == "error":
+            symbol = "[red]●[/red]"
+        elif status == "skipped":
+            symbol = "[yellow]○[/yellow]"
+        else:
+            symbol = " "
+
+        if status == "pending":
+            # Entire line light gray (pending)
+            if detail_text:
+                return f"{symbol} [bright_black]{label} ({detail_text})[/bright_black]"
+            return f"{symbol} [bright_black]{label}[/bright_black]"
+        # Label white, detail (if any) light gray in parentheses
+        if detail_text:
+            return f"{symbol} [white]{label}[/white] [bright_black]({detail_text})[/bright_black]"
+        return f"{symbol} [white]{label}[/white]"
 
-            if status == "pending":
-                # Entire line light gray (pending)
-                if detail_text:
-                    line = f"{symbol} [bright_black]{label} ({detail_text})[/bright_black]"
-                else:
-                    line = f"{symbol} [bright_black]{label}[/bright_black]"
-            else:
-                # Label white, detail (if any) light gray in parentheses
-                if detail_text:
-                    line = f"{symbol} [white]{label}[/white] [bright_black]({detail_text})[/bright_black]"
+    def render(self):
+        """Return the step tree, relabelling only the nodes of steps changed since the last render."""
+        with self._lock:
+            if self._tree is None:
+                from rich.tree import Tree
+                self._tree = Tree(f"[cyan]{self.title}[/cyan]", guide_style="grey50")
+            for key in self._dirty:
+                step = self._index[key]
+                node = self._nodes.get(key)
+                if node is None:
+                    self._nodes[key] = self._tree.add(self._line(step))
                 else:
-                    line = f"{symbol} [white]{label}[/white]"
+                    node.label = self._line(step)
+            self._dirty.clear()
+            return self._tree
 
-            tree.add(line)
-        return tree
+    def __rich__(self):
+        return self.render()
 
 
+def _progress_mode(requested: str | None = None) -> str:
+    """Resolve the StepTracker output mode: explicit value, SPECIFY_PROGRESS, or tree on a terminal."""
+    mode = (requested or os.getenv("SPECIFY_PROGRESS") or "auto").strip().lower()
+    if mode == "auto":
+        return "tree" if console.is_terminal else "plain"
+    if mode not in StepTracker.MODES:
+        raise typer.BadParameter(f"Invalid progress mode '{mode}'. Choose from: auto, {', '.join(StepTracker.MODES)}")
+    return mode
+
 
 MINI_BANNER = """
 ╔═╗╔═╗╔═╗╔═╗╦╔═╗╦ ╦
@@ -194,6 +328,7 @@ MINI_BANNER = """
 
 def get_key():
     """Get a single keypress in a cross-platform way using readchar."""
+    import readchar
     key = readchar.readkey()
     
     # Arrow keys
@@ -230,6 +365,9 @@ def select_with_arrows(options: dict, prompt_text: str = "Select an option", def
     Returns:
         Selected option key
     """
+    from rich.live import Live
+    from rich.table import Table
+
     option_keys = list(options.keys())
     if default_key and default_key in option_keys:
         selected_index = option_keys.index(default_key)
@@ -333,9 +471,48 @@ def show_banner():
     console.print()
 
 
+def _print_profile(tracer, output: Path | None) -> None:
+    """Print the span breakdown to stderr and optionally export a Chrome trace."""
+    from rich.table import Table
+
+    rows = tracer.summary()
+    wall = rows[0]["total_ms"] if rows else 0.0
+    table = Table(title="Profile", title_style="bold", show_edge=False, header_style="bold cyan")
+    table.add_column("Stage")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total ms", justify="right")
+    table.add_column("Self ms", justify="right")
+    table.add_column("%", justify="right")
+    for row in rows:
+        share = 100 * row["total_ms"] / wall if wall else 0.0
+        table.add_row("  " * row["depth"] + row["name"], str(row["calls"]), f"{row['total_ms']:.1f}",
+                      f"{row['self_ms']:.1f}", f"{share:.0f}")
+    err = Console(stderr=True)
+    err.print()
+    err.print(table)
+    if output is not None:
+        try:
+            tracer.export(output)
+            err.print(f"[dim]Chrome trace written to {output} (open in https://ui.perfetto.dev or chrome://tracing)[/dim]")
+        except OSError as e:
+            err.print(f"[red]Could not write profile:[/red] {e}")
+
+
 @app.callback()
-def callback(ctx: typer.Context):
+def callback(
+    ctx: typer.Context,
+    profile: bool = typer.Option(False, "--profile", envvar="SPECIFY_PROFILE", help="Time each pipeline stage and print a breakdown to stderr when the command finishes"),
+    profile_output: Path = typer.Option(None, "--profile-output", envvar="SPECIFY_PROFILE_OUTPUT", help="Also write the spans as a Chrome trace / JSON file (implies --profile)"),
+):
     """Show banner when no subcommand is provided."""
+    if (profile or profile_output) and ctx.invoked_subcommand is not None:
+        from . import tracing
+
+        tracer = tracing.enable()
+        # Close callbacks run last-in first-out: the root span closes before the report
+        ctx.call_on_close(lambda: _print_profile(tracer, profile_output))
+        ctx.with_resource(span(f"specify {ctx.invoked_subcommand}"))
+
     # Show banner only when no subcommand and no help flag
     # (help is handled by BannerGroup)
     if ctx.invoked_subcommand is None and "--help" not in sys.argv and "-h" not in sys.argv:
@@ -365,7 +542,8 @@ def run_command(cmd: list[str], check_return: bool = True, capture: bool = False
 
 def check_tool_for_tracker(tool: str, tracker: StepTracker) -> bool:
     """Check if a tool is installed and update tracker."""
-    if shutil.which(tool):
+    from .probe import which
+    if which(tool):
         tracker.complete(tool, "available")
         return True
     else:
@@ -376,288 +554,312 @@ def check_tool_for_tracker(tool: str, tracker: StepTracker) -> bool:
 def check_tool(tool: str, install_hint: str) -> bool:
     """Check if a tool is installed."""
     
-    # Special handling for Claude CLI after `claude migrate-installer`
-    # See: https://github.com/github/spec-kit/issues/123
-    # The migrate-installer command REMOVES the original executable from PATH
-    # and creates an alias at ~/.claude/local/claude instead
-    # This path should be prioritized over other claude executables in PATH
-    if tool == "claude":
-        if CLAUDE_LOCAL_PATH.exists() and CLAUDE_LOCAL_PATH.is_file():
-            return True
+    # Some agent CLIs live outside PATH, e.g. ~/.claude/local/claude after
+    # `claude migrate-installer` removes the original executable from PATH
+    # (https://github.com/github/spec-kit/issues/123); that location wins.
+    fallback = _agents().fallbacks.get(tool)
+    if fallback is not None and fallback.is_file():
+        return True
     
-    if shutil.which(tool):
+    from .probe import which
+    if which(tool):
         return True
     else:
         return False
 
 
 def is_git_repo(path: Path = None) -> bool:
-    """Check if the specified path is inside a git repository."""
+    """Check if the specified path is inside a git repository (found by walking up for .git)."""
+    from .gitrepo import find_git_dir
+
     if path is None:
         path = Path.cwd()
     
     if not path.is_dir():
         return False
-
-    try:
-        # Use git command to check if inside a work tree
-        subprocess.run(
-            ["git", "rev-parse", "--is-inside-work-tree"],
-            check=True,
-            capture_output=True,
-            cwd=path,
-        )
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
+    return find_git_dir(path) is not None
 
 
-def init_git_repo(project_path: Path, quiet: bool = False) -> bool:
+@traced()
+def init_git_repo(project_path: Path, quiet: bool = False, files: list[str] | None = None) -> bool:
     """Initialize a git repository in the specified path.
     quiet: if True suppress console output (tracker handles status)
+    files: when given, the initial commit stages exactly these project-relative paths
+    (built with plumbing commands) instead of `git add .` over the whole tree
     """
+    from .gitrepo import bootstrap_repo
+
+    message = "Initial commit from Specify template"
     try:
-        original_cwd = Path.cwd()
-        os.chdir(project_path)
         if not quiet:
             console.print("[cyan]Initializing git repository...[/cyan]")
-        subprocess.run(["git", "init"], check=True, capture_output=True)
-        subprocess.run(["git", "add", "."], check=True, capture_output=True)
-        subprocess.run(["git", "commit", "-m", "Initial commit from Specify template"], check=True, capture_output=True)
+        if files is not None:
+            bootstrap_repo(project_path, files, message)
+        else:
+            subprocess.run(["git", "init"], check=True, capture_output=True, cwd=project_path)
+            subprocess.run(["git", "add", "."], check=True, capture_output=True, cwd=project_path)
+            subprocess.run(["git", "commit", "-m", message], check=True, capture_output=True, cwd=project_path)
         if not quiet:
             console.print("[green]✓[/green] Git repository initialized")
         return True
         
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, OSError) as e:
         if not quiet:
             console.print(f"[red]Error initializing git repository:[/red] {e}")
         return False
-    finally:
-        os.chdir(original_cwd)
 
 
-def setup_project_from_local(project_dir: Path, ai_assistant: str, script_type: str = "sh") -> dict:
-    """Set up project using local repository files and the release packaging script logic."""
-    # Find the repository root (where this script is located)
-    script_path = Path(__file__).resolve()
-    repo_root = script_path.parent.parent.parent  # Go up from src/specify_cli/__init__.py
-    
-    # Agent folder mapping (matches the release packaging script)
-    agent_folders = {
-        "claude": ".claude/commands",
-        "gemini": ".gemini/commands", 
-        "copilot": ".github/prompts",
-        "cursor": ".cursor/commands",
-        "qwen": ".qwen/commands",
-        "opencode": ".opencode/command",
-        "codex": ".codex/prompts",
-        "windsurf": ".windsurf/workflows",
-        "kilocode": ".kilocode/workflows",
-        "auggie": ".augment/commands",
-        "roo": ".roo/commands",
-        "kiro": ".kiro/specs",
-        "adk": ".adk/commands"
-    }
-    
-    # Agent argument formats (matches the release packaging script)
-    agent_arg_formats = {
-        "claude": "$ARGUMENTS",
-        "gemini": "{{args}}",
-        "copilot": "$ARGUMENTS", 
-        "cursor": "$ARGUMENTS",
-        "qwen": "{{args}}",
-        "opencode": "$ARGUMENTS",
-        "codex": "$ARGUMENTS",
-        "windsurf": "$ARGUMENTS",
-        "kilocode": "$ARGUMENTS",
-        "auggie": "$ARGUMENTS",
-        "roo": "$ARGUMENTS",
-        "kiro": "$ARGUMENTS",
-        "adk": "$ARGUMENTS"
-    }
-    
-    # Agent file extensions (matches the release packaging script)
-    agent_extensions = {
-        "claude": "md",
-        "gemini": "toml",
-        "copilot": "prompt.md",
-        "cursor": "md", 
-        "qwen": "toml",
-        "opencode": "md",
-        "codex": "md",
-        "windsurf": "md",
-        "kilocode": "md",
-        "auggie": "md",
-        "roo": "md",
-        "kiro": "md",
-        "adk": "md"
-    }
-    
-    if ai_assistant not in agent_folders:
-        raise ValueError(f"Unsupported agent: {ai_assistant}")
-    
-    # Create the required directory structure
-    agent_commands_dir = project_dir / agent_folders[ai_assistant]
-    specify_dir = project_dir / ".specify"
-    
-    agent_commands_dir.mkdir(parents=True, exist_ok=True)
-    specify_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Process command templates using the same logic as the release packaging script
+@traced()
+def setup_project_from_local(project_dir: Path, ai_assistant: str | list[str], script_type: str = "sh", use_cache: bool = True, entries: list | None = None, repo_root: Path | None = None, written: dict | None = None, registry: "AgentRegistry | None" = None) -> dict:
+    """Set up project using local repository files and the release packaging script logic.
+    ai_assistant: one agent key, or a list of agent keys to generate in a single batch
+    use_cache: reuse a previously rendered tree from the template cache when the sources are unchanged
+    entries: precomputed project manifest (from plan_project) to write instead of rebuilding it
+    repo_root: directory holding templates/, memory/ and scripts/ (default: this checkout)
+    written: filled with dest -> bytes for the files rendered straight into project_dir
+    registry: the agent registry to render with (default: the process-wide one)
+    """
+    if repo_root is None:
+        # Find the repository root (where this script is located)
+        script_path = Path(__file__).resolve()
+        repo_root = script_path.parent.parent.parent  # Go up from src/specify_cli/__init__.py
+
+    agents = [ai_assistant] if isinstance(ai_assistant, str) else list(dict.fromkeys(ai_assistant))
     try:
-        # Copy base structure first (like the fallback method)
-        _copy_base_structure(project_dir, script_type, repo_root, ai_assistant)
-        
-        # Now process command templates with placeholder replacement
-        _process_command_templates(project_dir, ai_assistant, script_type, repo_root, 
-                                 agent_commands_dir, agent_arg_formats[ai_assistant], 
-                                 agent_extensions[ai_assistant])
-        
+        return _render_local_project(project_dir, agents, script_type, use_cache=use_cache, entries=entries,
+                                     repo_root=repo_root, written=written, registry=registry)
     except Exception as e:
         # Fallback to direct copy if anything fails
         console.print(f"[yellow]Warning:[/yellow] Template processing failed, falling back to direct copy")
         console.print(f"[dim]Error: {e}[/dim]")
-        return _setup_project_fallback(project_dir, ai_assistant, script_type, repo_root, agent_commands_dir)
-    
-    # Count the commands that were actually created
-    ext_pattern = f"*.{agent_extensions[ai_assistant]}"
-    commands_created = len(list(agent_commands_dir.glob(ext_pattern))) if agent_commands_dir.exists() else 0
-    
-    return {
-        "source": "local_script",
-        "commands_created": commands_created,
-        "script_type": script_type,
-        "agent": ai_assistant
-    }
+        if written is not None:
+            written.clear()
+        agent_folders = (registry or _agents()).command_dirs
+        metas = [
+            _setup_project_fallback(project_dir, agent, script_type, repo_root, project_dir / agent_folders[agent])
+            for agent in agents
+        ]
+        if len(metas) == 1:
+            return metas[0]
+        return {
+            **metas[0],
+            "commands_created": sum(m["commands_created"] for m in metas),
+            "agent": ",".join(agents),
+            "agents": agents,
+        }
+
+
+def _render_local_project(project_dir: Path, agents: list[str], script_type: str, *, use_cache: bool = True, entries: list | None = None, repo_root: Path, written: dict | None = None, registry: "AgentRegistry | None" = None) -> dict:
+    """Write .specify/ and every agent command directory into project_dir (no console output).
+    Raises on any failure; setup_project_from_local adds the direct-copy fallback.
+    written: see materialize(); left empty when the files are linked from the template cache
+    """
+    agents_registry = registry or _agents()
+    agent_folders = agents_registry.command_dirs
+    agent_extensions = agents_registry.extensions
+
+    if not agents:
+        raise ValueError("No agent selected")
+    for agent in agents:
+        if agent not in agent_folders:
+            raise ValueError(f"Unsupported agent: {agent}")
+    agent_label = ",".join(agents)
+
+    def render(target_dir: Path, written: dict | None = None) -> dict:
+        """Render .specify/ and every agent command directory into target_dir."""
+        from .materialize import materialize
+
+        (target_dir / ".specify").mkdir(parents=True, exist_ok=True)
+
+        # The shared base structure is materialised once (plan-template.md names the
+        # first agent); each agent's command set is rendered from the same compiled
+        # templates. Everything is written in a single parallel pass.
+        for agent in agents:
+            (target_dir / agent_folders[agent]).mkdir(parents=True, exist_ok=True)
+        result = materialize(entries if entries is not None else _project_entries(repo_root, agents, script_type, registry=agents_registry), target_dir,
+                             written=written)
+
+        # Count the commands that were actually created
+        commands_created = sum(
+            len(list((target_dir / agent_folders[agent]).glob(f"*.{agent_extensions[agent]}")))
+            for agent in agents
+        )
+        return {
+            "source": "local_script",
+            "commands_created": commands_created,
+            "script_type": script_type,
+            "agent": agent_label,
+            "agents": agents,
+            "executables": result["executables"],
+        }
+
+    # Process command templates using the same logic as the release packaging script.
+    # Rendered output is cached by template content hash; warm runs just link it into place.
+    # Where files cannot be linked out of the cache, rendering directly is faster.
+    from .template_cache import cache_enabled, default_cache
+    cache = default_cache() if use_cache and cache_enabled() else None
+    if cache is not None and cache.link_strategy(project_dir) is not None:
+        with span("cache.key"):
+            key = cache.key(repo_root, agent_label, script_type, agents_registry.digest(agents))
+        if cache.has(key):
+            meta = {**cache.meta(key), "source": "local_cache"}
+        else:
+            with span("cache.build"):
+                meta = cache.build(key, render)
+        with span("cache.restore"):
+            cache.restore(key, project_dir)
+        return meta
+    return render(project_dir, written)
+
+
+def _project_entries(repo_root: Path, agents: list[str], script_type: str, sources: set[Path] | None = None, registry: "AgentRegistry | None" = None) -> list:
+    """Manifest entries for a whole project: the shared .specify/ tree plus every agent's commands.
+    sources: when given, only entries rendered from these source files (nothing else is rendered)
+    registry: the agent registry to render with (default: the process-wide one)
+    """
+    registry = registry or _agents()
+    entries = _base_structure_entries(repo_root, script_type, agents[0])
+    if sources is not None:
+        entries = [e for e in entries if e.source in sources]
+    for agent in agents:
+        spec = registry[agent]
+        entries += _command_template_entries(repo_root, Path(spec.commands_dir), agent, script_type,
+                                             spec.arg_format, spec.extension, sources=sources)
+    return entries
+
+
+def _base_structure_entries(repo_root: Path, script_type: str, ai_assistant: str | None = None) -> list:
+    """Build manifest entries for the base .specify structure (memory, scripts, templates except commands).
+    ai_assistant: when set, plan-template.md gets its {SCRIPT}/__AGENT__ placeholders processed
+    """
+    from .materialize import ManifestEntry, file_entry, tree_entries
 
+    specify_rel = Path(".specify")
+    entries = []
 
-def _copy_base_structure(project_dir: Path, script_type: str, repo_root: Path, ai_assistant: str) -> None:
-    """Copy the base .specify structure (memory, scripts, templates except commands)."""
-    specify_dir = project_dir / ".specify"
-    
-    # Copy templates to .specify (excluding commands which go to .adk/commands)
+    # Templates go to .specify (excluding commands which go to the agent folder)
     templates_src = repo_root / "templates"
     if templates_src.exists():
-        templates_dest = specify_dir / "templates"
-        templates_dest.mkdir(exist_ok=True)
-        
-        # Copy all template files and directories except 'commands'
+        templates_dest = specify_rel / "templates"
         for item in templates_src.iterdir():
-            if item.name != "commands":
-                dest_path = templates_dest / item.name
-                if item.is_dir():
-                    shutil.copytree(item, dest_path, dirs_exist_ok=True)
-                else:
-                    # Special processing for plan-template.md to replace __AGENT__ placeholder
-                    if item.name == "plan-template.md":
-                        _process_plan_template(item, dest_path, script_type, ai_assistant)
-                    else:
-                        shutil.copy2(item, dest_path)
-    
-    # Copy memory to .specify
+            if item.name == "commands":
+                continue
+            if item.is_dir():
+                entries += tree_entries(item, templates_dest / item.name)
+            elif item.name == "plan-template.md" and ai_assistant:
+                # Special processing for plan-template.md to replace __AGENT__ placeholder
+                transform = lambda content: _render_plan_template(content, script_type, ai_assistant)
+                entries.append(ManifestEntry(item, templates_dest / item.name, transform=transform))
+            else:
+                entries.append(ManifestEntry(item, templates_dest / item.name))
+
+    # Memory goes to .specify
     memory_src = repo_root / "memory"
     if memory_src.exists():
-        shutil.copytree(memory_src, specify_dir / "memory", dirs_exist_ok=True)
-        
-    # Copy scripts to .specify
+        entries += tree_entries(memory_src, specify_rel / "memory")
+
+    # Scripts go to .specify; .sh scripts get execute bits as they are written
     scripts_src = repo_root / "scripts"
     if scripts_src.exists():
-        scripts_dest = specify_dir / "scripts"
-        scripts_dest.mkdir(exist_ok=True)
-        
+        scripts_dest = specify_rel / "scripts"
+
         # Copy the appropriate script variant
         if script_type == "sh" and (scripts_src / "bash").exists():
-            shutil.copytree(scripts_src / "bash", scripts_dest / "bash", dirs_exist_ok=True)
+            entries += tree_entries(scripts_src / "bash", scripts_dest / "bash", script_suffix=".sh")
         elif script_type == "ps" and (scripts_src / "powershell").exists():
-            shutil.copytree(scripts_src / "powershell", scripts_dest / "powershell", dirs_exist_ok=True)
-            
+            entries += tree_entries(scripts_src / "powershell", scripts_dest / "powershell", script_suffix=".sh")
+
         # Copy any script files that aren't in variant-specific directories
         for item in scripts_src.iterdir():
             if item.is_file():
-                shutil.copy2(item, scripts_dest / item.name)
+                entries.append(file_entry(item, scripts_dest / item.name, script_suffix=".sh"))
 
+    return entries
 
-def _process_plan_template(src_file: Path, dest_file: Path, script_type: str, ai_assistant: str) -> None:
-    """Process plan-template.md to replace __AGENT__ placeholder with the agent name."""
+
+@traced()
+def _copy_base_structure(project_dir: Path, script_type: str, repo_root: Path, ai_assistant: str) -> None:
+    """Copy the base .specify structure (memory, scripts, templates except commands)."""
+    from .materialize import materialize
+    materialize(_base_structure_entries(repo_root, script_type, ai_assistant), project_dir)
+
+
+def _render_plan_template(content: str, script_type: str, ai_assistant: str) -> str:
+    """Replace the {SCRIPT} and __AGENT__ placeholders in plan-template.md content."""
     try:
-        # Read the template file
-        content = src_file.read_text(encoding='utf-8')
-        
         # Extract script command from YAML frontmatter
         script_command = _extract_script_command(content, script_type)
-        
+
         if script_command:
             # Always prefix with .specify/ for plan usage
             script_command = f".specify/{script_command}"
             # Replace {SCRIPT} placeholder with the script command and __AGENT__ with agent name
             content = content.replace("{SCRIPT}", script_command)
             content = content.replace("__AGENT__", ai_assistant)
-            
+
             # Remove the scripts: section from frontmatter while preserving YAML structure
-            content = _remove_scripts_section(content)
-            
-            # Write the processed file
-            dest_file.write_text(content, encoding='utf-8')
-        else:
-            # If no script command found, copy as-is but still replace __AGENT__
-            content = content.replace("__AGENT__", ai_assistant)
-            dest_file.write_text(content, encoding='utf-8')
-            
-    except Exception as e:
-        # If processing fails, copy as-is but still replace __AGENT__
-        content = src_file.read_text(encoding='utf-8')
-        content = content.replace("__AGENT__", ai_assistant)
-        dest_file.write_text(content, encoding='utf-8')
+            return _remove_scripts_section(content)
+    except Exception:
+        pass
+    # If no script command found (or processing fails), keep as-is but still replace __AGENT__
+    return content.replace("__AGENT__", ai_assistant)
 
 
-def _process_command_templates(project_dir: Path, ai_assistant: str, script_type: str, repo_root: Path, commands_dir: Path, arg_format: str, file_extension: str) -> None:
-    """Process command templates with placeholder replacement like the release script does."""
-    import re
-    
+def _process_plan_template(src_file: Path, dest_file: Path, script_type: str, ai_assistant: str) -> None:
+    """Process plan-template.md to replace __AGENT__ placeholder with the agent name."""
+    content = src_file.read_text(encoding='utf-8')
+    dest_file.write_text(_render_plan_template(content, script_type, ai_assistant), encoding='utf-8')
+
+
+def _render_command_template(content: str, ai_assistant: str, script_type: str, arg_format: str, file_extension: str, name: str = "") -> str:
+    """Render one command template to its final agent-specific content."""
+    from .command_templates import CommandTemplate
+    try:
+        return CommandTemplate(name, content).render(ai_assistant, script_type, arg_format, file_extension)
+    except Exception:
+        # If processing fails for any file, copy as-is
+        return content
+
+
+def _command_template_entries(repo_root: Path, commands_dir: Path, ai_assistant: str, script_type: str, arg_format: str, file_extension: str, sources: set[Path] | None = None) -> list:
+    """Build manifest entries rendering every command template into commands_dir.
+    Each template is parsed once; rendering for the agent is a single pass over precomputed segments.
+    sources: when given, only the templates at these paths are rendered
+    """
+    from .command_templates import load_command_templates
+    from .materialize import ManifestEntry
+
     commands_src = repo_root / "templates" / "commands"
-    
     if not commands_src.exists():
-        return
-    
-    for cmd_file in commands_src.glob("*.md"):
+        return []
+
+    entries = []
+    for template in load_command_templates(commands_src):
+        source = commands_src / f"{template.name}.md"
+        if sources is not None and source not in sources:
+            continue
+        dest = commands_dir / f"{template.name}.{file_extension}"
         try:
-            # Read the template file
-            content = cmd_file.read_text(encoding='utf-8')
-            
-            # Extract script command from YAML frontmatter
-            script_command = _extract_script_command(content, script_type)
-            
-            if script_command:
-                # Replace {SCRIPT} placeholder with the script command (without prefix first)
-                content = content.replace("{SCRIPT}", script_command)
-                
-                # Remove the scripts: section from frontmatter while preserving YAML structure
-                content = _remove_scripts_section(content)
-                
-                # Apply other substitutions
-                content = content.replace("{ARGS}", arg_format)
-                content = content.replace("__AGENT__", ai_assistant)
-                
-                # Rewrite paths to use .specify/ prefix (this will add the prefix to script paths)
-                content = _rewrite_paths(content)
-                
-                # Generate output file based on format
-                output_file = _generate_command_file(commands_dir, cmd_file, content, file_extension, arg_format)
-            else:
-                # If no script command found, copy as-is (fallback)
-                output_file = commands_dir / f"{cmd_file.stem}.{file_extension}"
-                shutil.copy2(cmd_file, output_file)
-                
-        except Exception as e:
-            # If processing fails for any file, copy as-is
-            output_file = commands_dir / f"{cmd_file.stem}.{file_extension}"
-            shutil.copy2(cmd_file, output_file)
+            if template.script_command(script_type):
+                entries.append(ManifestEntry(source, dest, content=template.render(ai_assistant, script_type, arg_format, file_extension)))
+                continue
+        except Exception:
+            pass
+        # If no script command found (or processing fails), copy as-is
+        entries.append(ManifestEntry(source, dest))
+    return entries
 
 
-def _generate_command_file(commands_dir: Path, cmd_file: Path, content: str, file_extension: str, arg_format: str) -> Path:
-    """Generate command file in the appropriate format (TOML or Markdown)."""
-    output_file = commands_dir / f"{cmd_file.stem}.{file_extension}"
-    
+@traced()
+def _process_command_templates(project_dir: Path, ai_assistant: str, script_type: str, repo_root: Path, commands_dir: Path, arg_format: str, file_extension: str) -> None:
+    """Process command templates with placeholder replacement like the release script does."""
+    from .materialize import materialize
+    entries = _command_template_entries(repo_root, commands_dir, ai_assistant, script_type, arg_format, file_extension)
+    materialize(entries, project_dir)
+
+
+def _format_command_file(content: str, file_extension: str) -> str:
+    """Convert rendered command content to the appropriate format (TOML or Markdown)."""
     if file_extension == "toml":
         # Extract description from YAML frontmatter for TOML format
         description = ""
@@ -686,12 +888,15 @@ def _generate_command_file(commands_dir: Path, cmd_file: Path, content: str, fil
         body = '\n'.join(body_lines).strip()
         
         # Generate TOML content
-        toml_content = f'description = "{description}"\n\nprompt = """\n{body}\n"""'
-        output_file.write_text(toml_content, encoding='utf-8')
-    else:
-        # For Markdown and other formats, write as-is
-        output_file.write_text(content, encoding='utf-8')
-    
+        return f'description = "{description}"\n\nprompt = """\n{body}\n"""'
+    # For Markdown and other formats, write as-is
+    return content
+
+
+def _generate_command_file(commands_dir: Path, cmd_file: Path, content: str, file_extension: str, arg_format: str) -> Path:
+    """Generate command file in the appropriate format (TOML or Markdown)."""
+    output_file = commands_dir / f"{cmd_file.stem}.{file_extension}"
+    output_file.write_text(_format_command_file(content, file_extension), encoding='utf-8')
     return output_file
 
 
@@ -745,68 +950,32 @@ def _remove_scripts_section(content: str) -> str:
 
 def _rewrite_paths(content: str) -> str:
     """Rewrite paths to use .specify/ prefix, but avoid double prefixes."""
-    import re
-    
-    # Only add .specify/ prefix if it's not already there
-    content = re.sub(r'(?<!\.specify/)(/?)memory/', r'.specify/memory/', content)
-    content = re.sub(r'(?<!\.specify/)(/?)scripts/', r'.specify/scripts/', content) 
-    content = re.sub(r'(?<!\.specify/)(/?)templates/', r'.specify/templates/', content)
-    
-    return content
+    from .command_templates import rewrite_paths
+    return rewrite_paths(content)
 
 
+@traced()
 def _setup_project_fallback(project_dir: Path, ai_assistant: str, script_type: str, repo_root: Path, agent_commands_dir: Path) -> dict:
     """Fallback method to set up project by direct copying (original behavior)."""
+    from .materialize import ManifestEntry, materialize
+
     # Create the required directory structure
     specify_dir = project_dir / ".specify"
     
     agent_commands_dir.mkdir(parents=True, exist_ok=True)
     specify_dir.mkdir(parents=True, exist_ok=True)
     
-    # Copy templates to .specify (excluding commands which go to .adk/commands)
-    templates_src = repo_root / "templates"
-    if templates_src.exists():
-        templates_dest = specify_dir / "templates"
-        templates_dest.mkdir(exist_ok=True)
-        
-        # Copy all template files and directories except 'commands'
-        for item in templates_src.iterdir():
-            if item.name != "commands":
-                dest_path = templates_dest / item.name
-                if item.is_dir():
-                    shutil.copytree(item, dest_path, dirs_exist_ok=True)
-                else:
-                    shutil.copy2(item, dest_path)
-    
-    # Copy memory to .specify
-    memory_src = repo_root / "memory"
-    if memory_src.exists():
-        shutil.copytree(memory_src, specify_dir / "memory", dirs_exist_ok=True)
-        
-    # Copy scripts to .specify
-    scripts_src = repo_root / "scripts"
-    if scripts_src.exists():
-        scripts_dest = specify_dir / "scripts"
-        scripts_dest.mkdir(exist_ok=True)
-        
-        # Copy the appropriate script variant
-        if script_type == "sh" and (scripts_src / "bash").exists():
-            shutil.copytree(scripts_src / "bash", scripts_dest / "bash", dirs_exist_ok=True)
-        elif script_type == "ps" and (scripts_src / "powershell").exists():
-            shutil.copytree(scripts_src / "powershell", scripts_dest / "powershell", dirs_exist_ok=True)
-            
-        # Copy any script files that aren't in variant-specific directories
-        for item in scripts_src.iterdir():
-            if item.is_file():
-                shutil.copy2(item, scripts_dest / item.name)
+    # Copy templates, memory and scripts to .specify without placeholder processing
+    entries = _base_structure_entries(repo_root, script_type)
     
     # Copy command templates directly (like other platforms do)
     commands_src = repo_root / "templates" / "commands"
     if commands_src.exists():
         # Simply copy all command template files
+        commands_rel = agent_commands_dir.relative_to(project_dir)
         for cmd_file in commands_src.glob("*.md"):
-            output_file = agent_commands_dir / cmd_file.name
-            shutil.copy2(cmd_file, output_file)
+            entries.append(ManifestEntry(cmd_file, commands_rel / cmd_file.name))
+    result = materialize(entries, project_dir)
     
     # Count the commands that were actually created
     commands_created = len(list(agent_commands_dir.glob("*.md"))) if agent_commands_dir.exists() else 0
@@ -815,36 +984,40 @@ def _setup_project_fallback(project_dir: Path, ai_assistant: str, script_type: s
         "source": "local_fallback",
         "commands_created": commands_created,
         "script_type": script_type,
-        "agent": ai_assistant
+        "agent": ai_assistant,
+        "executables": result["executables"],
     }
 
-def download_template_from_github(ai_assistant: str, download_dir: Path, *, script_type: str = "sh", verbose: bool = True, show_progress: bool = True, client: httpx.Client = None, debug: bool = False, github_token: str = None) -> Tuple[Path, dict]:
+def download_template_from_github(ai_assistant: str, download_dir: Path, *, script_type: str = "sh", verbose: bool = True, show_progress: bool = True, client: "httpx.Client" = None, debug: bool = False, github_token: str = None, offline: bool | None = None, release_ttl: float | None = None, store: "ArtifactStore | None" = None) -> Tuple[Path, dict]:
+    """Download the release template archive for an agent/script type into download_dir.
+    Release metadata is served from the on-disk release cache while fresh and revalidated with
+    conditional requests afterwards (see specify_cli.releases). offline: only use cached metadata.
+    The archive is fetched with resumable, ranged requests and checked against the size and digest
+    declared by the release (see specify_cli.download). With a store, the archive is looked up in
+    (and published to) the shared artifact store instead of download_dir.
+    """
+    from .download import download_file
+    from .releases import fetch_latest_release, find_template_asset
+
     repo_owner = "github"
     repo_name = "spec-kit"
     if client is None:
-        client = httpx.Client(verify=ssl_context)
+        client = _http_client()
     
     if verbose:
         console.print("[cyan]Fetching latest release information...[/cyan]")
-    api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/releases/latest"
     
     try:
-        response = client.get(
-            api_url,
-            timeout=30,
-            follow_redirects=True,
-            headers=_github_auth_headers(github_token),
-        )
-        status = response.status_code
-        if status != 200:
-            msg = f"GitHub API returned {status} for {api_url}"
-            if debug:
-                msg += f"\nResponse headers: {response.headers}\nBody (truncated 500): {response.text[:500]}"
-            raise RuntimeError(msg)
-        try:
-            release_data = response.json()
-        except ValueError as je:
-            raise RuntimeError(f"Failed to parse release JSON: {je}\nRaw (truncated 400): {response.text[:400]}")
+        with span("fetch", agent=ai_assistant):
+            release_data, release_source = fetch_latest_release(
+                client,
+                repo_owner,
+                repo_name,
+                headers=_github_auth_headers(github_token),
+                offline=offline,
+                ttl=release_ttl,
+                debug=debug,
+            )
     except Exception as e:
         console.print(f"[red]Error fetching release information[/red]")
         console.print(Panel(str(e), title="Fetch Error", border_style="red"))
@@ -853,12 +1026,7 @@ def download_template_from_github(ai_assistant: str, download_dir: Path, *, scri
     # Find the template asset for the specified AI assistant
     assets = release_data.get("assets", [])
     pattern = f"spec-kit-template-{ai_assistant}-{script_type}"
-    matching_assets = [
-        asset for asset in assets
-        if pattern in asset["name"] and asset["name"].endswith(".zip")
-    ]
-
-    asset = matching_assets[0] if matching_assets else None
+    asset = find_template_asset(release_data, ai_assistant, script_type)
 
     if asset is None:
         console.print(f"[red]No matching release asset found[/red] for [bold]{ai_assistant}[/bold] (expected pattern: [bold]{pattern}[/bold])")
@@ -875,95 +1043,332 @@ def download_template_from_github(ai_assistant: str, download_dir: Path, *, scri
         console.print(f"[cyan]Size:[/cyan] {file_size:,} bytes")
         console.print(f"[cyan]Release:[/cyan] {release_data['tag_name']}")
 
-    zip_path = download_dir / filename
-    if verbose:
-        console.print(f"[cyan]Downloading template...[/cyan]")
-    
-    try:
-        with client.stream(
-            "GET",
-            download_url,
-            timeout=60,
-            follow_redirects=True,
-            headers=_github_auth_headers(github_token),
-        ) as response:
-            if response.status_code != 200:
-                body_sample = response.text[:400]
-                raise RuntimeError(f"Download failed with {response.status_code}\nHeaders: {response.headers}\nBody (truncated): {body_sample}")
-            total_size = int(response.headers.get('content-length', 0))
-            with open(zip_path, 'wb') as f:
-                if total_size == 0:
-                    for chunk in response.iter_bytes(chunk_size=8192):
-                        f.write(chunk)
-                else:
-                    if show_progress:
-                        with Progress(
-                            SpinnerColumn(),
-                            TextColumn("[progress.description]{task.description}"),
-                            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-                            console=console,
-                        ) as progress:
-                            task = progress.add_task("Downloading...", total=total_size)
-                            downloaded = 0
-                            for chunk in response.iter_bytes(chunk_size=8192):
-                                f.write(chunk)
-                                downloaded += len(chunk)
-                                progress.update(task, completed=downloaded)
-                    else:
-                        for chunk in response.iter_bytes(chunk_size=8192):
-                            f.write(chunk)
-    except Exception as e:
-        console.print(f"[red]Error downloading template[/red]")
-        detail = str(e)
-        if zip_path.exists():
-            zip_path.unlink()
-        console.print(Panel(detail, title="Download Error", border_style="red"))
-        raise typer.Exit(1)
-    if verbose:
-        console.print(f"Downloaded: {filename}")
+    @traced("download")
+    def download(target_dir: Path) -> Path:
+        zip_path = target_dir / filename
+        if verbose:
+            console.print(f"[cyan]Downloading template...[/cyan]")
+        try:
+            if show_progress:
+                from rich.progress import Progress, SpinnerColumn, TextColumn
+                with Progress(
+                    SpinnerColumn(),
+                    TextColumn("[progress.description]{task.description}"),
+                    TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+                    console=console,
+                ) as progress:
+                    task = progress.add_task("Downloading...", total=file_size or None)
+                    download_file(
+                        client,
+                        download_url,
+                        zip_path,
+                        expected_size=file_size,
+                        expected_digest=asset.get("digest"),
+                        headers=_github_auth_headers(github_token),
+                        progress=lambda done, total: progress.update(task, completed=done, total=total),
+                    )
+            else:
+                download_file(
+                    client,
+                    download_url,
+                    zip_path,
+                    expected_size=file_size,
+                    expected_digest=asset.get("digest"),
+                    headers=_github_auth_headers(github_token),
+                )
+        except Exception as e:
+            # A partial download (and its range state) is kept so the next run resumes it
+            console.print(f"[red]Error downloading template[/red]")
+            console.print(Panel(str(e), title="Download Error", border_style="red"))
+            raise typer.Exit(1)
+        if verbose:
+            console.print(f"Downloaded: {filename}")
+        return zip_path
+
+    if store is None:
+        zip_path, artifact = download(download_dir), "downloaded"
+    else:
+        zip_path, cached = store.fetch(release_data["tag_name"], ai_assistant, script_type, download)
+        artifact = "cached" if cached else "downloaded"
+        if cached and verbose:
+            console.print(f"[cyan]Using cached archive:[/cyan] {zip_path}")
     metadata = {
         "filename": filename,
         "size": file_size,
         "release": release_data["tag_name"],
-        "asset_url": download_url
+        "asset_url": download_url,
+        "release_source": release_source,
+        "artifact": artifact,
     }
     return zip_path, metadata
 
 
-def download_and_extract_template(project_path: Path, ai_assistant: str, script_type: str, is_current_dir: bool = False, *, verbose: bool = True, tracker: StepTracker | None = None, client: httpx.Client = None, debug: bool = False, github_token: str = None) -> Path:
-    """Set up a new project using local repository files.
-    Returns project_path. Uses tracker if provided (with keys: fetch, download, extract, cleanup)
-    All agents (including Windsurf) use local repository templates instead of downloading from GitHub.
+_TEMPLATE_PLACEHOLDERS = ("{SCRIPT}", "{ARGS}", "__AGENT__")
+
+
+def _archive_member_transform(ai_assistant: str, script_type: str, registry: "AgentRegistry | None" = None):
+    """Choose the local-pipeline transform for a release archive member.
+    Release archives normally ship rendered files; members that still carry template
+    placeholders (plan-template.md, the agent's markdown commands) are rendered while
+    streaming exactly as the local pipeline would. Rendered members pass through untouched.
     """
-    current_dir = Path.cwd()
-    
+    spec = (registry or _agents())[ai_assistant]
+    commands_dir = PurePosixPath(spec.commands_dir)
+    arg_format = spec.arg_format
+    extension = spec.extension
+    plan_template = PurePosixPath(".specify/templates/plan-template.md")
+
+    def when_raw(render):
+        return lambda text: render(text) if any(p in text for p in _TEMPLATE_PLACEHOLDERS) else text
+
+    def choose(rel: PurePosixPath):
+        if rel == plan_template:
+            return when_raw(lambda text: _render_plan_template(text, script_type, ai_assistant))
+        if rel.parent == commands_dir and rel.suffix == ".md" and extension != "toml":
+            return when_raw(lambda text: _render_command_template(text, ai_assistant, script_type, arg_format, extension, rel.stem))
+        return None
+
+    return choose
+
+
+def _extract_template_zip(zip_path: Path, project_path: Path, ai_assistant: str | None = None, script_type: str = "sh", registry: "AgentRegistry | None" = None) -> dict:
+    """Stream a template archive into project_path, flattening a single top-level folder.
+    Members are written straight to their final path (no temporary staging copy).
+    Returns {"files", "bytes", "transformed"}.
+    """
+    from .artifacts import open_zip
+    from .extract import stream_extract
+
+    registry = registry or _agents()
+    transform = _archive_member_transform(ai_assistant, script_type, registry) if ai_assistant in registry else None
+    with span("extract", archive=zip_path.name), open_zip(zip_path) as zip_ref:
+        return stream_extract(zip_ref, project_path, transform=transform)
+
+
+def _fetch_release_archive(ai_assistant: str, script_type: str, *, tracker: StepTracker | None, client: "httpx.Client", debug: bool, github_token: str | None, offline: bool | None, release_ttl: float | None, use_cache: bool = True) -> Tuple[Path, dict, bool]:
+    """Fetch the GitHub release archive for one agent. Returns (zip_path, metadata, temporary).
+    Archives come from the shared artifact store when caching is enabled, so identical
+    releases are downloaded once per machine rather than once per project; otherwise
+    the archive is temporary and removed once it has been extracted.
+    """
+    from .template_cache import cache_enabled, cache_root
+
+    store = None
+    if use_cache and cache_enabled():
+        from .artifacts import ArtifactStore
+        store = ArtifactStore()
+    if tracker:
+        tracker.start("fetch", "contacting GitHub API")
+    # Persistent download dir: an interrupted transfer is resumed by the next run
+    download_dir = cache_root() / "downloads"
+    download_dir.mkdir(parents=True, exist_ok=True)
+    zip_path, meta = download_template_from_github(
+        ai_assistant,
+        download_dir,
+        script_type=script_type,
+        verbose=tracker is None,
+        show_progress=tracker is None,
+        client=client,
+        debug=debug,
+        github_token=github_token,
+        offline=offline,
+        release_ttl=release_ttl,
+        store=store,
+    )
+    if tracker:
+        tracker.complete("fetch", f"release {meta['release']} ({meta['release_source']})")
+        tracker.complete("download", f"{meta['filename']} ({meta['size']:,} bytes, {meta['artifact']})")
+    return zip_path, meta, store is None
+
+
+@traced()
+def plan_project(agents: list[str], script_type: str, *, tracker: StepTracker | None = None, client: "httpx.Client" = None, debug: bool = False, github_token: str = None, use_cache: bool = True, from_release: bool = False, offline: bool | None = None, release_ttl: float | None = None, skip_tls: bool = False, registry: "AgentRegistry | None" = None) -> "WritePlan":
+    """Compute every output of an init run without writing to the project directory.
+    Local templates are planned from the materialize manifest; release plans fetch each
+    agent's archive (into the artifact store) and list its members.
+    registry: the agent registry to plan with (default: the process-wide one)
+    """
+    from .planner import WritePlan
+
+    if from_release or not _local_templates_available():
+        from .artifacts import open_zip
+
+        if client is None:
+            client = _http_client(skip_tls)
+        plan = WritePlan(agents, script_type, "release", [])
+        try:
+            for agent in agents:
+                zip_path, meta, temporary = _fetch_release_archive(agent, script_type, tracker=tracker, client=client, debug=debug,
+                                                                   github_token=github_token, offline=offline,
+                                                                   release_ttl=release_ttl, use_cache=use_cache)
+                plan.archives.append((agent, zip_path))
+                plan.release = meta["release"]
+                plan.temporary = plan.temporary or temporary
+                with open_zip(zip_path) as zip_ref:
+                    plan.files += _release_upgrade_plan(zip_ref, agent, script_type, registry)
+        except Exception as e:
+            plan.discard()
+            if tracker:
+                tracker.error("fetch", str(e))
+            raise
+        return plan
+
+    repo_root = Path(__file__).resolve().parent.parent.parent
+    entries = _project_entries(repo_root, agents, script_type, registry=registry)
+    return WritePlan(agents, script_type, "local", _local_upgrade_plan(agents, script_type, entries, registry), entries=entries)
+
+
+def _local_templates_available() -> bool:
+    """True when running from a checkout that ships templates/commands next to the package."""
+    repo_root = Path(__file__).resolve().parent.parent.parent
+    return (repo_root / "templates" / "commands").is_dir()
+
+
+def _local_upgrade_plan(agents: list[str], script_type: str, entries: list | None = None, registry: "AgentRegistry | None" = None) -> list:
+    """Upgrade plan rendered from the local templates (one PlannedFile per output).
+    entries: the project manifest, when the caller has already built it
+    registry: the agent registry to plan with (default: the process-wide one)
+    """
+    import hashlib
+    from functools import partial
+    from .materialize import entry_bytes
+    from .template_cache import default_cache
+    from .upgrade import PlannedFile
+
+    repo_root = Path(__file__).resolve().parent.parent.parent
+    cache = default_cache()
+    # The agents' registry entries are part of the salt: an override in agents.toml changes the outputs
+    salt = f"local:{cache.package_digest()}:{','.join(agents)}:{(registry or _agents()).digest(agents)}:{script_type}"
+    if entries is None:
+        entries = _project_entries(repo_root, agents, script_type, registry=registry)
+    by_dest = {e.dest: e for e in entries}
+    plan = []
+    for dest, entry in by_dest.items():
+        source_hash = hashlib.sha256(f"{salt}:{dest.as_posix()}:{cache.file_digest(entry.source)}".encode()).hexdigest()
+        plan.append(PlannedFile(dest.as_posix(), source_hash, partial(entry_bytes, entry), entry.mode is not None,
+                                rendered=entry.transform is not None or entry.content is not None))
+    cache._save_index()
+    return plan
+
+
+def _release_upgrade_plan(zip_ref, ai_assistant: str, script_type: str, registry: "AgentRegistry | None" = None) -> list:
+    """Upgrade plan for the members of one agent's release archive (zip_ref must stay open while rendering)."""
+    import hashlib
+    from .extract import archive_prefix, _safe_relpath
+    from .upgrade import PlannedFile
+
+    infos = [i for i in zip_ref.infolist() if not i.is_dir()]
+    prefix = archive_prefix([i.filename for i in zip_ref.infolist()])
+    choose = _archive_member_transform(ai_assistant, script_type, registry)
+    plan = []
+    for info in infos:
+        rel = _safe_relpath(info.filename[len(prefix):] if prefix else info.filename)
+        if rel is None:
+            continue
+        transform = choose(rel)
+
+        def render(info=info, transform=transform) -> bytes:
+            data = zip_ref.read(info)
+            return transform(data.decode("utf-8")).encode("utf-8") if transform else data
+
+        source_hash = hashlib.sha256(f"release:{ai_assistant}:{script_type}:{rel}:{info.CRC}:{info.file_size}".encode()).hexdigest()
+        plan.append(PlannedFile(rel.as_posix(), source_hash, render, rel.suffix == ".sh", rendered=transform is not None))
+    return plan
+
+
+@traced()
+def _record_upgrade_baseline(project_path: Path, plan_factory, agents: list[str], script_type: str, source: str, release: str | None = None, written: dict | None = None) -> None:
+    """Write .specify/manifest.json so `specify upgrade` can later tell template changes from local edits."""
+    from .upgrade import write_manifest
+    info = {"agents": agents, "script_type": script_type, "source": source}
+    if release:
+        info["release"] = release
+    try:
+        write_manifest(project_path, plan_factory(), info, written)
+    except Exception:
+        # The baseline only enables incremental upgrades; init itself has succeeded
+        pass
+
+
+@traced()
+def download_and_extract_template(project_path: Path, ai_assistant: str | list[str], script_type: str, is_current_dir: bool = False, *, verbose: bool = True, tracker: StepTracker | None = None, client: "httpx.Client" = None, debug: bool = False, github_token: str = None, use_cache: bool = True, from_release: bool = False, offline: bool | None = None, release_ttl: float | None = None, skip_tls: bool = False, plan: "WritePlan | None" = None, registry: "AgentRegistry | None" = None) -> Path:
+    """Set up a new project using local repository files, or the GitHub release archives.
+    Returns project_path. Uses tracker if provided (with keys: fetch, download, extract, chmod, cleanup)
+    Local repository templates are used when available; from_release (or a package install without
+    templates) downloads the release archive for each agent instead.
+    plan: a WritePlan from plan_project() (e.g. the one shown to the user); computed here when omitted
+    registry: the agent registry to render with (default: the process-wide one)
+    """
+    agents = [ai_assistant] if isinstance(ai_assistant, str) else list(dict.fromkeys(ai_assistant))
+    if plan is None:
+        plan = plan_project(agents, script_type, tracker=tracker, client=client, debug=debug, github_token=github_token,
+                            use_cache=use_cache, from_release=from_release, offline=offline, release_ttl=release_ttl,
+                            skip_tls=skip_tls, registry=registry)
+    elif tracker and plan.source == "release":
+        tracker.complete("fetch", f"release {plan.release} (planned)")
+        tracker.complete("download", f"{len(plan.archives)} archive(s)")
+
+    if plan.source == "release":
+        try:
+            for agent, zip_path in plan.archives:
+                if tracker:
+                    tracker.start("extract")
+                result = _extract_template_zip(zip_path, project_path, agent, script_type, registry)
+                if tracker:
+                    tracker.complete("extract", f"streamed {result['bytes']:,} bytes")
+                    tracker.complete("zip-list", f"{result['files']} files")
+                    tracker.complete("extracted-summary", f"{agent.upper()} release template extracted")
+        except Exception as e:
+            if tracker:
+                tracker.error("extract", str(e))
+            raise
+        finally:
+            plan.discard()
+        if tracker:
+            tracker.complete("cleanup", "downloaded archive removed" if plan.temporary else "archive kept in artifact store")
+        ensure_executable_scripts(project_path, tracker=tracker)
+        _record_upgrade_baseline(project_path, lambda: plan.files, agents, script_type, "release", plan.release)
+        return project_path
+
     # Use local files for all agents instead of downloading
     if tracker:
         tracker.start("fetch", "using local repository files")
+    # The bytes written become the upgrade baseline without reading the tree back
+    written: dict = {}
     try:
-        meta = setup_project_from_local(project_path, ai_assistant, script_type=script_type)
+        meta = setup_project_from_local(project_path, ai_assistant, script_type=script_type, use_cache=use_cache,
+                                        entries=plan.entries, written=written, registry=registry)
         if tracker:
-            tracker.complete("fetch", f"local setup ({meta['commands_created']} commands)")
+            source = "cached" if meta["source"] == "local_cache" else "local"
+            tracker.complete("fetch", f"{source} setup ({meta['commands_created']} commands)")
             tracker.complete("download", "local files")
             tracker.complete("extract", "files copied")
             tracker.complete("zip-list", "local directory structure")
-            tracker.complete("extracted-summary", f"{ai_assistant.upper()} project structure created")
-        return project_path
+            tracker.complete("extracted-summary", f"{meta['agent'].upper()} project structure created")
+        if "executables" in meta:
+            # Execute bits were applied while the files were written
+            if tracker:
+                tracker.add("chmod", "Set script permissions recursively")
+                tracker.complete("chmod", f"{meta['executables']} set during copy")
+        else:
+            ensure_executable_scripts(project_path, tracker=tracker)
     except Exception as e:
         if tracker:
             tracker.error("fetch", str(e))
         raise
+    _record_upgrade_baseline(project_path, lambda: plan.files, agents, script_type, "local", written=written)
+    return project_path
 
 
-def ensure_executable_scripts(project_path: Path, tracker: StepTracker | None = None) -> None:
-    """Ensure POSIX .sh scripts under .specify/scripts (recursively) have execute bits (no-op on Windows)."""
-    if os.name == "nt":
-        return  # Windows: skip silently
+def _make_scripts_executable(project_path: Path) -> tuple[int, list[str]]:
+    """Add execute bits to .sh scripts with a shebang under .specify/scripts (no console output).
+    Returns (number updated, failure descriptions).
+    """
     scripts_root = project_path / ".specify" / "scripts"
-    if not scripts_root.is_dir():
-        return
     failures: list[str] = []
     updated = 0
+    if os.name == "nt" or not scripts_root.is_dir():
+        return updated, failures
     for script in scripts_root.rglob("*.sh"):
         try:
             if script.is_symlink() or not script.is_file():
@@ -987,6 +1392,17 @@ def ensure_executable_scripts(project_path: Path, tracker: StepTracker | None =
             updated += 1
         except Exception as e:
             failures.append(f"{script.relative_to(scripts_root)}: {e}")
+    return updated, failures
+
+
+@traced()
+def ensure_executable_scripts(project_path: Path, tracker: StepTracker | None = None) -> None:
+    """Ensure POSIX .sh scripts under .specify/scripts (recursively) have execute bits (no-op on Windows)."""
+    if os.name == "nt":
+        return  # Windows: skip silently
+    if not (project_path / ".specify" / "scripts").is_dir():
+        return
+    updated, failures = _make_scripts_executable(project_path)
     if tracker:
         detail = f"{updated} updated" + (f", {len(failures)} failed" if failures else "")
         tracker.add("chmod", "Set script permissions recursively")
@@ -999,10 +1415,35 @@ def ensure_executable_scripts(project_path: Path, tracker: StepTracker | None =
             for f in failures:
                 console.print(f"  - {f}")
 
+def _print_paths(paths: list[str], limit: int = 20) -> None:
+    for rel in paths[:limit]:
+        console.print(f"  - {rel}")
+    if len(paths) > limit:
+        console.print(f"  ... and {len(paths) - limit} more")
+
+
+def _print_write_plan(plan: "WritePlan", project_path: Path, conflicts) -> None:
+    """Human-readable summary of an init --dry-run."""
+    files = {f.dest: f for f in plan.files}
+    rendered = sum(f.rendered for f in files.values())
+    executable = sum(f.executable for f in files.values())
+    source = f"release {plan.release}" if plan.source == "release" else "local templates"
+    console.print(f"[cyan]Dry run:[/cyan] nothing written to [green]{project_path}[/green]")
+    console.print(f"{len(files)} files planned from {source} ({rendered} rendered, {executable} executable)")
+    if conflicts.overwrite:
+        console.print(f"[yellow]Would overwrite {len(conflicts.overwrite)} existing file(s):[/yellow]")
+        _print_paths(conflicts.overwrite)
+    if conflicts.blocked:
+        console.print(f"[red]Blocked by {len(conflicts.blocked)} existing path(s):[/red]")
+        _print_paths(conflicts.blocked)
+    if not conflicts:
+        console.print("[green]No conflicts with existing files[/green]")
+
+
 @app.command()
 def init(
     project_name: str = typer.Argument(None, help="Name for your new project directory (optional if using --here, or use '.' for current directory)"),
-    ai_assistant: str = typer.Option(None, "--ai", help="AI assistant to use: claude, gemini, copilot, cursor, qwen, opencode, codex, windsurf, kilocode, auggie, roo, or adk"),
+    ai_assistant: str = typer.Option(None, "--ai", help="AI assistant to use: claude, gemini, copilot, cursor, qwen, opencode, codex, windsurf, kilocode, auggie, roo, or adk. Pass a comma separated list or 'all' to generate several agents at once"),
     script_type: str = typer.Option(None, "--script", help="Script type to use: sh or ps"),
     ignore_agent_tools: bool = typer.Option(False, "--ignore-agent-tools", help="Skip checks for AI agent tools like Claude Code"),
     no_git: bool = typer.Option(False, "--no-git", help="Skip git repository initialization"),
@@ -1011,6 +1452,13 @@ def init(
     skip_tls: bool = typer.Option(False, "--skip-tls", help="Skip SSL/TLS verification (not recommended)"),
     debug: bool = typer.Option(False, "--debug", help="Show verbose diagnostic output for network and extraction failures"),
     github_token: str = typer.Option(None, "--github-token", help="GitHub token to use for API requests (or set GH_TOKEN or GITHUB_TOKEN environment variable)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Regenerate templates instead of reusing the on-disk template cache (used only where files can be reflinked, e.g. btrfs/XFS: on ext4 or tmpfs it does nothing unless SPECIFY_CACHE_LINK=hardlink or copy)"),
+    from_release: bool = typer.Option(False, "--from-release", help="Download the latest GitHub release templates instead of using local repository files"),
+    offline: bool = typer.Option(False, "--offline", help="With --from-release, use the last cached release metadata without contacting GitHub"),
+    release_ttl: float = typer.Option(None, "--release-ttl", help="Seconds cached release metadata is used before revalidating with GitHub (default 600, or SPECIFY_RELEASE_TTL)"),
+    progress: str = typer.Option(None, "--progress", help="Progress output: auto (tree on a terminal, plain lines otherwise), tree, plain or json (or SPECIFY_PROGRESS)"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Plan every file init would write, report conflicts with existing files, and exit without writing"),
+    json_output: bool = typer.Option(False, "--json", help="With --dry-run, print the write plan as JSON"),
 ):
     """
     Initialize a new Specify project from local repository templates.
@@ -1038,16 +1486,28 @@ def init(
         specify init my-project --ai auggie
         specify init my-project --ai roo
         specify init my-project --ai adk    # ADK automatically uses --ignore-agent-tools
+        specify init my-project --ai claude,gemini,copilot
+        specify init my-project --ai all   # Generate commands for every supported agent
         specify init --ignore-agent-tools my-project
         specify init . --ai claude         # Initialize in current directory
         specify init .                     # Initialize in current directory (interactive AI selection)
         specify init --here --ai claude    # Alternative syntax for current directory
         specify init --here --ai codex
         specify init --here
-        specify init --here --force  # Skip confirmation when current directory not empty
+        specify init --here --force  # Skip confirmation when existing files would be overwritten
+        specify init --here --dry-run --json   # List planned files and conflicts, write nothing
     """
+    if json_output and not dry_run:
+        console.print("[red]Error:[/red] --json is only supported together with --dry-run")
+        raise typer.Exit(1)
+    if json_output:
+        # stdout carries only the JSON plan
+        console.quiet = True
+
     # Show banner first
     show_banner()
+
+    progress_mode = _progress_mode(progress)
     
     # Handle '.' as shorthand for current directory (equivalent to --here)
     if project_name == ".":
@@ -1067,20 +1527,7 @@ def init(
     if here:
         project_name = Path.cwd().name
         project_path = Path.cwd()
-        
-        # Check if current directory has any files
-        existing_items = list(project_path.iterdir())
-        if existing_items:
-            console.print(f"[yellow]Warning:[/yellow] Current directory is not empty ({len(existing_items)} items)")
-            console.print("[yellow]Template files will be merged with existing content and may overwrite existing files[/yellow]")
-            if force:
-                console.print("[cyan]--force supplied: skipping confirmation and proceeding with merge[/cyan]")
-            else:
-                # Ask for confirmation
-                response = typer.confirm("Do you want to continue?")
-                if not response:
-                    console.print("[yellow]Operation cancelled[/yellow]")
-                    raise typer.Exit(0)
+        # Existing files are checked against the write plan once agents are selected
     else:
         project_path = Path(project_name).resolve()
         # Check if project directory already exists
@@ -1120,71 +1567,47 @@ def init(
         if not should_init_git:
             console.print("[yellow]Git not found - will skip repository initialization[/yellow]")
 
-    # AI assistant selection
+    # AI assistant selection ('all' or a comma separated list selects a batch of agents)
+    agents_registry = _agents()
     if ai_assistant:
-        if ai_assistant not in AI_CHOICES:
-            console.print(f"[red]Error:[/red] Invalid AI assistant '{ai_assistant}'. Choose from: {', '.join(AI_CHOICES.keys())}")
+        if ai_assistant.strip().lower() == "all":
+            selected_agents = list(agents_registry.choices)
+        else:
+            selected_agents = list(dict.fromkeys(a.strip() for a in ai_assistant.split(",") if a.strip()))
+        invalid = [a for a in selected_agents if a not in agents_registry]
+        if invalid or not selected_agents:
+            console.print(f"[red]Error:[/red] Invalid AI assistant '{','.join(invalid) or ai_assistant}'. Choose from: {', '.join(agents_registry.choices)}, or all")
             raise typer.Exit(1)
-        selected_ai = ai_assistant
     else:
         # Use arrow-key selection interface
-        selected_ai = select_with_arrows(
-            AI_CHOICES, 
+        selected_agents = [select_with_arrows(
+            agents_registry.choices, 
             "Choose your AI assistant:", 
             "copilot"
+        )]
+    selected_ai = selected_agents[0]
+    batch = len(selected_agents) > 1
+    
+    # Check agent tools unless ignored, for every selected agent. Only agents that declare
+    # requires_cli are checked: IDE-based agents (Copilot, Cursor, ...) and ADK have nothing to require.
+    missing = [] if ignore_agent_tools else [
+        agents_registry[key] for key in selected_agents
+        if agents_registry[key].requires_cli and not check_tool(agents_registry[key].cli, agents_registry[key].install_url or "")
+    ]
+    if missing:
+        lines = [f"[cyan]{agent.key}[/cyan] not found\nInstall with: [cyan]{agent.install_url}[/cyan]" for agent in missing]
+        names = ", ".join(agent.name for agent in missing)
+        error_panel = Panel(
+            "\n".join(lines) + "\n"
+            f"{names} {'is' if len(missing) == 1 else 'are'} required to continue with this project type.\n\n"
+            "Tip: Use [cyan]--ignore-agent-tools[/cyan] to skip this check",
+            title="[red]Agent Detection Error[/red]",
+            border_style="red",
+            padding=(1, 2)
         )
-    
-    # Check agent tools unless ignored (ADK automatically ignores agent tools)
-    if not ignore_agent_tools and selected_ai != "adk":
-        agent_tool_missing = False
-        install_url = ""
-        if selected_ai == "claude":
-            if not check_tool("claude", "https://docs.anthropic.com/en/docs/claude-code/setup"):
-                install_url = "https://docs.anthropic.com/en/docs/claude-code/setup"
-                agent_tool_missing = True
-        elif selected_ai == "gemini":
-            if not check_tool("gemini", "https://github.com/google-gemini/gemini-cli"):
-                install_url = "https://github.com/google-gemini/gemini-cli"
-                agent_tool_missing = True
-        elif selected_ai == "qwen":
-            if not check_tool("qwen", "https://github.com/QwenLM/qwen-code"):
-                install_url = "https://github.com/QwenLM/qwen-code"
-                agent_tool_missing = True
-        elif selected_ai == "opencode":
-            if not check_tool("opencode", "https://opencode.ai"):
-                install_url = "https://opencode.ai"
-                agent_tool_missing = True
-        elif selected_ai == "codex":
-            if not check_tool("codex", "https://github.com/openai/codex"):
-                install_url = "https://github.com/openai/codex"
-                agent_tool_missing = True
-        elif selected_ai == "auggie":
-            if not check_tool("auggie", "https://docs.augmentcode.com/cli/setup-auggie/install-auggie-cli"):
-                install_url = "https://docs.augmentcode.com/cli/setup-auggie/install-auggie-cli"
-                agent_tool_missing = True
-        elif selected_ai == "roo":
-            if not check_tool("roo", "https://roo.ai"):
-                install_url = "https://roo.ai"
-                agent_tool_missing = True
-        elif selected_ai == "adk":
-            if not check_tool("adk", "Install from: https://github.com/google/adk-python"):
-                console.print("[red]Error:[/red] ADK CLI is required for ADK projects")
-                agent_tool_missing = True
-        # GitHub Copilot and Cursor checks are not needed as they're typically available in supported IDEs
-
-        if agent_tool_missing:
-            error_panel = Panel(
-                f"[cyan]{selected_ai}[/cyan] not found\n"
-                f"Install with: [cyan]{install_url}[/cyan]\n"
-                f"{AI_CHOICES[selected_ai]} is required to continue with this project type.\n\n"
-                "Tip: Use [cyan]--ignore-agent-tools[/cyan] to skip this check",
-                title="[red]Agent Detection Error[/red]",
-                border_style="red",
-                padding=(1, 2)
-            )
-            console.print()
-            console.print(error_panel)
-            raise typer.Exit(1)
+        console.print()
+        console.print(error_panel)
+        raise typer.Exit(1)
     
     # Determine script type (explicit, interactive, or OS default)
     if script_type:
@@ -1201,23 +1624,59 @@ def init(
         else:
             selected_script = default_script
     
-    console.print(f"[cyan]Selected AI assistant:[/cyan] {selected_ai}")
+    console.print(f"[cyan]Selected AI assistant:[/cyan] {', '.join(selected_agents)}")
     console.print(f"[cyan]Selected script type:[/cyan] {selected_script}")
     
     # Inform user when ADK automatically ignores agent tools
-    if selected_ai == "adk" and not ignore_agent_tools:
+    if selected_ai == "adk" and not batch and not ignore_agent_tools:
         console.print("[dim]ADK automatically skips agent tool checks[/dim]")
+
+    # Plan every output up front when it has to be checked against existing files;
+    # the real run then executes exactly this plan.
+    plan = None
+    if here or dry_run:
+        try:
+            plan = plan_project(selected_agents, selected_script, debug=debug, github_token=github_token, use_cache=not no_cache,
+                                from_release=from_release, offline=offline or None, release_ttl=release_ttl, skip_tls=skip_tls)
+        except Exception as e:
+            console.print(Panel(f"Planning failed: {e}", title="Failure", border_style="red"))
+            raise typer.Exit(1)
+        with span("conflicts"):
+            conflicts = plan.find_conflicts(project_path)
+        if dry_run:
+            if json_output:
+                print(json.dumps({"dry_run": True, **plan.to_dict(project_path, conflicts)}, indent=2))
+            else:
+                _print_write_plan(plan, project_path, conflicts)
+            plan.discard()
+            raise typer.Exit(1 if conflicts.blocked else 0)
+        if conflicts.blocked:
+            console.print("[red]Error:[/red] Existing paths block files init needs to write:")
+            _print_paths(conflicts.blocked)
+            plan.discard()
+            raise typer.Exit(1)
+        if conflicts.overwrite:
+            console.print(f"[yellow]Warning:[/yellow] {len(conflicts.overwrite)} existing file(s) will be overwritten:")
+            _print_paths(conflicts.overwrite)
+            if force:
+                console.print("[cyan]--force supplied: skipping confirmation and proceeding with merge[/cyan]")
+            elif not typer.confirm("Do you want to continue?"):
+                console.print("[yellow]Operation cancelled[/yellow]")
+                plan.discard()
+                raise typer.Exit(0)
+        elif any(project_path.iterdir()):
+            console.print("[cyan]Current directory is not empty; template files will be merged without overwriting any existing file[/cyan]")
     
     # Download and set up project
     # New tree-based progress (no emojis); include earlier substeps
-    tracker = StepTracker("Initialize Specify Project")
+    tracker = StepTracker("Initialize Specify Project", mode=progress_mode)
     # Flag to allow suppressing legacy headings
     sys._specify_tracker_active = True
     # Pre steps recorded as completed before live rendering
     tracker.add("precheck", "Check required tools")
     tracker.complete("precheck", "ok")
     tracker.add("ai-select", "Select AI assistant")
-    tracker.complete("ai-select", f"{selected_ai}")
+    tracker.complete("ai-select", ", ".join(selected_agents))
     tracker.add("script-select", "Select script type")
     tracker.complete("script-select", selected_script)
     for key, label in [
@@ -1233,19 +1692,23 @@ def init(
     ]:
         tracker.add(key, label)
 
-    # Use transient so live tree is replaced by the final static render (avoids duplicate output)
-    with Live(tracker.render(), console=console, refresh_per_second=8, transient=True) as live:
-        tracker.attach_refresh(lambda: live.update(tracker.render()))
-        try:
-            # Create a httpx client with verify based on skip_tls
-            verify = not skip_tls
-            local_ssl_context = ssl_context if verify else False
-            local_client = httpx.Client(verify=local_ssl_context)
-
-            download_and_extract_template(project_path, selected_ai, selected_script, here, verbose=False, tracker=tracker, client=local_client, debug=debug, github_token=github_token)
+    if tracker.mode == "tree":
+        from rich.live import Live
+        # Use transient so live tree is replaced by the final static render (avoids duplicate output).
+        # Live re-renders the tracker itself, so throttled refreshes never leave a stale frame.
+        display = Live(tracker, console=console, refresh_per_second=8, transient=True)
+    else:
+        # Non-TTY / --progress plain|json: append-only progress lines, no redraws
+        display = nullcontext()
 
-            # Ensure scripts are executable (POSIX)
-            ensure_executable_scripts(project_path, tracker=tracker)
+    with display as live:
+        if live is not None:
+            tracker.attach_refresh(live.refresh)
+        try:
+            # Templates come from the local checkout unless --from-release is given;
+            # an HTTP client is only created (lazily) when a download actually happens.
+            # Also ensures scripts are executable (POSIX)
+            download_and_extract_template(project_path, selected_agents if batch else selected_ai, selected_script, here, verbose=False, tracker=tracker, debug=debug, github_token=github_token, use_cache=not no_cache, from_release=from_release, offline=offline or None, release_ttl=release_ttl, skip_tls=skip_tls, plan=plan)
 
             # Git step
             if not no_git:
@@ -1253,7 +1716,9 @@ def init(
                 if is_git_repo(project_path):
                     tracker.complete("git", "existing repo detected")
                 elif should_init_git:
-                    if init_git_repo(project_path, quiet=True):
+                    from .upgrade import manifest_paths
+                    # Commit only what init generated and its manifest (falls back to `git add .` without one)
+                    if init_git_repo(project_path, quiet=True, files=manifest_paths(project_path)):
                         tracker.complete("git", "initialized")
                     else:
                         tracker.error("git", "init failed")
@@ -1283,27 +1748,14 @@ def init(
             pass
 
     # Final static tree (ensures finished state visible after Live context ends)
-    console.print(tracker.render())
+    if tracker.mode == "tree":
+        console.print(tracker.render())
     console.print("\n[bold green]Project ready.[/bold green]")
     
     # Agent folder security notice
-    agent_folder_map = {
-        "claude": ".claude/",
-        "gemini": ".gemini/",
-        "cursor": ".cursor/",
-        "qwen": ".qwen/",
-        "opencode": ".opencode/",
-        "codex": ".codex/",
-        "windsurf": ".windsurf/",
-        "kilocode": ".kilocode/",
-        "auggie": ".augment/",
-        "roo": ".roo/",
-        "adk": ".adk/",
-        "copilot": ".github/"
-    }
-    
-    if selected_ai in agent_folder_map:
-        agent_folder = agent_folder_map[selected_ai]
+    agent_folders = list(dict.fromkeys(agents_registry.folders[a] for a in selected_agents))
+    if agent_folders:
+        agent_folder = ", ".join(agent_folders)
         security_notice = Panel(
             f"Some agents may store credentials, auth tokens, or other identifying and private artifacts in the agent folder within your project.\n"
             f"Consider adding [cyan]{agent_folder}[/cyan] (or parts of it) to [cyan].gitignore[/cyan] to prevent accidental credential leakage.",
@@ -1324,7 +1776,7 @@ def init(
         step_num = 2
 
     # Add Codex-specific setup step if needed
-    if selected_ai == "codex":
+    if "codex" in selected_agents:
         codex_path = project_path / ".codex"
         quoted_path = shlex.quote(str(codex_path))
         if os.name == "nt":  # Windows
@@ -1334,7 +1786,7 @@ def init(
         
         steps_lines.append(f"{step_num}. Set [cyan]CODEX_HOME[/cyan] environment variable before running Codex: [cyan]{cmd}[/cyan]")
         step_num += 1
-    elif selected_ai == "adk":
+    if "adk" in selected_agents:
         steps_lines.append(f"{step_num}. Use ADK CLI commands")
         steps_lines.append("   - Run adk specify to create specifications")
         steps_lines.append("   - Run adk plan to create implementation plans")
@@ -1363,7 +1815,7 @@ def init(
     console.print()
     console.print(enhancements_panel)
 
-    if selected_ai == "codex":
+    if "codex" in selected_agents:
         warning_text = """[bold yellow]Important Note:[/bold yellow]
 
 Custom prompts do not yet support arguments in Codex. You may need to manually specify additional project instructions directly in prompt files located in [cyan].codex/prompts/[/cyan].
@@ -1375,49 +1827,578 @@ For more information, see: [cyan]https://github.com/openai/codex/issues/2890[/cy
         console.print(warning_panel)
 
 @app.command()
-def check():
+def check(
+    refresh: bool = typer.Option(False, "--refresh", help="Ignore cached probe results and re-run every version probe"),
+):
     """Check that all required tools are installed."""
     show_banner()
     console.print("[bold]Checking for installed tools...[/bold]\n")
 
-    tracker = StepTracker("Check Available Tools")
-    
-    tracker.add("git", "Git version control")
-    tracker.add("claude", "Claude Code CLI")
-    tracker.add("gemini", "Gemini CLI")
-    tracker.add("qwen", "Qwen Code CLI")
-    tracker.add("code", "Visual Studio Code")
-    tracker.add("code-insiders", "Visual Studio Code Insiders")
-    tracker.add("cursor-agent", "Cursor IDE agent")
-    tracker.add("codex", "Codex CLI")
-    tracker.add("auggie", "Auggie CLI")
-    tracker.add("roo", "Roo Code")
-    tracker.add("adk", "ADK CLI")
-    
-    git_ok = check_tool_for_tracker("git", tracker)
-    claude_ok = check_tool_for_tracker("claude", tracker)  
-    gemini_ok = check_tool_for_tracker("gemini", tracker)
-    qwen_ok = check_tool_for_tracker("qwen", tracker)
-    code_ok = check_tool_for_tracker("code", tracker)
-    code_insiders_ok = check_tool_for_tracker("code-insiders", tracker)
-    cursor_ok = check_tool_for_tracker("cursor-agent", tracker)
-    windsurf_ok = check_tool_for_tracker("windsurf", tracker)
-    kilocode_ok = check_tool_for_tracker("kilocode", tracker)
-    opencode_ok = check_tool_for_tracker("opencode", tracker)
-    codex_ok = check_tool_for_tracker("codex", tracker)
-    auggie_ok = check_tool_for_tracker("auggie", tracker)
-    roo_ok = check_tool_for_tracker("roo", tracker)
-    adk_ok = check_tool_for_tracker("adk", tracker)
-    console.print(tracker.render())
+    tracker = StepTracker("Check Available Tools", mode=_progress_mode())
+
+    agents_registry = _agents()
+    tools = {"git": "Git version control", **agents_registry.check_tools}
+    for tool, label in tools.items():
+        tracker.add(tool, label)
+
+    # One PATH scan for every tool; `--version` probes run concurrently and are
+    # cached until PATH or one of the binaries changes
+    from .probe import probe_tools
+    results = probe_tools(list(tools), fallbacks=agents_registry.fallbacks, use_cache=False if refresh else None)
+    for tool, result in results.items():
+        if not result.found:
+            tracker.error(tool, "not found")
+        elif result.error:
+            tracker.complete(tool, f"available, {result.error}")
+        else:
+            tracker.complete(tool, f"v{result.version}" if result.version and result.version[0].isdigit() else "available")
+    found = {tool for tool, result in results.items() if result.found}
+    git_ok = "git" in found
+
+    if tracker.mode == "tree":
+        console.print(tracker.render())
 
     console.print("\n[bold green]Specify CLI is ready to use![/bold green]")
 
     if not git_ok:
         console.print("[dim]Tip: Install git for repository management[/dim]")
-    if not (claude_ok or gemini_ok or cursor_ok or qwen_ok or windsurf_ok or kilocode_ok or opencode_ok or codex_ok or auggie_ok or roo_ok or adk_ok):
+    if not found & agents_registry.assistant_tools:
         console.print("[dim]Tip: Install an AI assistant for the best experience[/dim]")
 
 
+@app.command()
+def upgrade(
+    paths: list[Path] = typer.Argument(None, help="Project directories to upgrade (default: current directory)"),
+    recursive: bool = typer.Option(False, "--recursive", "-r", help="Upgrade every project with a .specify/manifest.json below the given directories"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Report what would change without writing anything"),
+    json_output: bool = typer.Option(False, "--json", help="Print the upgrade reports as JSON"),
+    from_release: bool = typer.Option(False, "--from-release", help="Upgrade from the latest GitHub release templates instead of local repository files"),
+    skip_tls: bool = typer.Option(False, "--skip-tls", help="Skip SSL/TLS verification (not recommended)"),
+    debug: bool = typer.Option(False, "--debug", help="Show verbose diagnostic output for network failures"),
+    github_token: str = typer.Option(None, "--github-token", help="GitHub token to use for API requests (or set GH_TOKEN or GITHUB_TOKEN environment variable)"),
+):
+    """
+    Re-sync generated template files in existing projects.
+
+    Only outputs whose template source changed are regenerated. Files you have not
+    touched are replaced, files you edited are three-way merged with the new version
+    (conflicting hunks are marked with <<<<<<< local / >>>>>>> upstream), and templates
+    removed upstream are deleted when unmodified.
+
+    Examples:
+        specify upgrade
+        specify upgrade --dry-run
+        specify upgrade -r services/   # every project below services/
+    """
+    from contextlib import ExitStack
+    from .upgrade import find_projects, load_manifest, upgrade_project
+
+    roots = [p.resolve() for p in (paths or [Path.cwd()])]
+    projects = find_projects(roots, recursive=recursive)
+    if not projects:
+        console.print("[red]Error:[/red] No project with a .specify/manifest.json found (projects created before this version need `specify init --here --force` once)")
+        raise typer.Exit(1)
+
+    use_release = from_release or not _local_templates_available()
+    client = None
+    release_tag = None
+    reports = []
+    plans: dict[tuple, list] = {}
+    with ExitStack() as stack:
+        for project in projects:
+            manifest = load_manifest(project)
+            agents = manifest.get("agents") or []
+            script_type = manifest.get("script_type") or "sh"
+            if not agents or any(a not in _agents() for a in agents) or script_type not in SCRIPT_TYPE_CHOICES:
+                console.print(f"[red]Error:[/red] {project}: manifest does not name supported agents/script type")
+                raise typer.Exit(1)
+
+            key = (tuple(agents), script_type)
+            if key not in plans:
+                if use_release:
+                    from .artifacts import ArtifactStore, open_zip
+                    from .template_cache import cache_enabled, cache_root
+                    if client is None:
+                        client = _http_client(skip_tls)
+                    plan = []
+                    for agent in agents:
+                        zip_path, release_meta = download_template_from_github(
+                            agent, cache_root() / "downloads", script_type=script_type, verbose=False, show_progress=False,
+                            client=client, debug=debug, github_token=github_token,
+                            store=ArtifactStore() if cache_enabled() else None,
+                        )
+                        plan += _release_upgrade_plan(stack.enter_context(open_zip(zip_path)), agent, script_type)
+                    plans[key] = plan
+                    release_tag = release_meta["release"]
+                else:
+                    plans[key] = _local_upgrade_plan(agents, script_type)
+
+            info = {"agents": agents, "script_type": script_type, "source": "release" if use_release else "local"}
+            if use_release:
+                info["release"] = release_tag
+            reports.append(upgrade_project(project, plans[key], info, dry_run=dry_run))
+
+    if json_output:
+        print(json.dumps({"dry_run": dry_run, "projects": [r.to_dict() for r in reports]}, indent=2))
+    else:
+        from rich.table import Table
+        table = Table(title="Dry run: nothing written" if dry_run else None, show_edge=False)
+        for column in ("Project", "Added", "Updated", "Merged", "Conflicts", "Removed", "Kept", "Unchanged"):
+            table.add_column(column, justify="left" if column == "Project" else "right")
+        for r in reports:
+            table.add_row(str(r.project), *(str(len(x)) for x in (r.added, r.updated, r.merged, r.conflicts, r.removed, r.kept)), str(r.unchanged))
+        console.print(table)
+        for r in reports:
+            for rel in r.conflicts:
+                console.print(f"[yellow]Conflict:[/yellow] {r.project / rel}")
+    if not dry_run and any(r.conflicts for r in reports):
+        raise typer.Exit(2)
+
+
+class _CommandRegenerator:
+    """Re-render only the project outputs whose template sources changed (for `specify watch`)."""
+
+    def __init__(self, project_path: Path, agents: list[str], script_type: str):
+        self.project_path = project_path
+        self.agents = agents
+        self.script_type = script_type
+        self.repo_root = Path(__file__).resolve().parent.parent.parent
+        self.dests_by_source: dict[Path, set[Path]] = {}
+        self._index(_project_entries(self.repo_root, agents, script_type), replace_all=True)
+
+    def _index(self, entries: list, replace_all: bool = False) -> None:
+        if replace_all:
+            self.dests_by_source = {}
+        else:
+            for source in {e.source for e in entries}:
+                self.dests_by_source.pop(source, None)
+        for entry in entries:
+            self.dests_by_source.setdefault(entry.source, set()).add(entry.dest)
+
+    def regenerate(self, changed: set[Path]) -> dict:
+        """Write the outputs of changed sources; delete outputs of removed ones. Returns a summary."""
+        from .materialize import materialize
+
+        present = {p for p in changed if p.is_file()}
+        removed = {p for p in changed if not p.exists()}
+        # Directories (created, moved, or the roots after an event overflow) and removed
+        # paths that were not sources (possibly whole directories) need a full render
+        full = any(p.is_dir() for p in changed) or any(p not in self.dests_by_source for p in removed)
+
+        entries = _project_entries(self.repo_root, self.agents, self.script_type, None if full else present) if (full or present) else []
+        if entries:
+            materialize(entries, self.project_path)
+
+        if full:
+            removed |= set(self.dests_by_source) - {e.source for e in entries}
+        written = {e.dest for e in entries}
+        deleted = []
+        for source in removed:
+            for dest in self.dests_by_source.pop(source, ()):
+                if dest not in written and (self.project_path / dest).is_file():
+                    (self.project_path / dest).unlink()
+                    deleted.append(dest)
+        self._index(entries, replace_all=full)
+        if entries or deleted:
+            _record_upgrade_baseline(self.project_path, lambda: _local_upgrade_plan(self.agents, self.script_type),
+                                     self.agents, self.script_type, "local")
+        return {"written": sorted(d.as_posix() for d in written), "deleted": sorted(d.as_posix() for d in deleted)}
+
+
+@app.command()
+def watch(
+    path: Path = typer.Argument(None, help="Project whose generated files are kept up to date (default: current directory)"),
+    ai_assistant: str = typer.Option(None, "--ai", help="Agent(s) to render for, comma separated (default: the agents recorded in .specify/manifest.json)"),
+    script_type: str = typer.Option(None, "--script", help="Script type: sh or ps (default: the one recorded in .specify/manifest.json)"),
+    poll: bool = typer.Option(False, "--poll", help="Use the polling watcher instead of inotify (or set SPECIFY_WATCH_POLL=1)"),
+    debounce: int = typer.Option(30, "--debounce", help="Milliseconds without further changes before a batch is regenerated"),
+):
+    """
+    Watch templates/, memory/ and scripts/ and live-regenerate the project's generated files.
+
+    Each save re-renders only the outputs produced from the changed sources (for example
+    one .claude/commands/*.md or .gemini/commands/*.toml per agent); outputs of deleted
+    templates are removed. Requires the local templates (a spec-kit checkout).
+
+    Examples:
+        specify watch
+        specify watch my-project --ai claude,gemini
+    """
+    from .template_cache import TEMPLATE_SOURCE_DIRS
+    from .upgrade import load_manifest
+    from .watcher import make_watcher, watch as watch_loop
+
+    if not _local_templates_available():
+        console.print("[red]Error:[/red] specify watch needs the local templates (run it from a spec-kit checkout)")
+        raise typer.Exit(1)
+    project_path = (path or Path.cwd()).resolve()
+    manifest = load_manifest(project_path) or {}
+    registry = _agents()
+    if ai_assistant:
+        agents = list(dict.fromkeys(a.strip() for a in ai_assistant.split(",") if a.strip()))
+    else:
+        agents = manifest.get("agents") or []
+    invalid = [a for a in agents if a not in registry]
+    if not agents or invalid:
+        console.print(f"[red]Error:[/red] {'Invalid AI assistant ' + ','.join(invalid) if invalid else 'No agents recorded for this project'}; pass --ai")
+        raise typer.Exit(1)
+    script_type = script_type or manifest.get("script_type") or ("ps" if os.name == "nt" else "sh")
+    if script_type not in SCRIPT_TYPE_CHOICES:
+        console.print(f"[red]Error:[/red] Invalid script type '{script_type}'. Choose from: {', '.join(SCRIPT_TYPE_CHOICES)}")
+        raise typer.Exit(1)
+
+    regenerator = _CommandRegenerator(project_path, agents, script_type)
+    roots = [regenerator.repo_root / name for name in TEMPLATE_SOURCE_DIRS if (regenerator.repo_root / name).is_dir()]
+    watcher = make_watcher(roots, poll=poll or None)
+    kind = "polling" if type(watcher).__name__ == "PollingWatcher" else "inotify"
+    console.print(f"[cyan]Watching[/cyan] {', '.join(str(r) for r in roots)} [dim]({kind}; {', '.join(agents)}/{script_type} -> {project_path})[/dim]", highlight=False)
+    console.print("[dim]Press Ctrl+C to stop[/dim]")
+
+    def on_change(changed: set[Path]) -> None:
+        started = time.perf_counter()
+        try:
+            result = regenerator.regenerate(changed)
+        except Exception as e:
+            console.print(f"[red]Regeneration failed:[/red] {e}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        if not result["written"] and not result["deleted"]:
+            return
+        stamp = time.strftime("%H:%M:%S")
+        console.print(f"[dim]{stamp}[/dim] {len(result['written'])} written, {len(result['deleted'])} removed in {elapsed:.1f} ms", highlight=False)
+        for rel in result["written"][:10] + result["deleted"][:10]:
+            console.print(f"  {rel}", highlight=False)
+
+    try:
+        watch_loop(watcher, on_change, debounce=max(debounce, 0) / 1000)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+@app.command()
+def paths(
+    as_json: bool = typer.Option(False, "--json", help="Print the paths as a JSON object"),
+    feature: str = typer.Option(None, "--feature", help="Feature directory to use instead of the current branch (default: $SPECIFY_FEATURE)"),
+):
+    """
+    Print the current feature's paths, like common.sh get_feature_paths.
+
+    The repository, branch and feature directory are read from .git/HEAD and specs/
+    without running git. The default output is KEY='value' lines for eval.
+
+    Examples:
+        eval "$(specify paths)"
+        specify paths --json
+    """
+    from .features import format_shell, resolve_cached
+
+    resolved = resolve_cached(feature=feature)
+    if as_json:
+        sys.stdout.write(json.dumps(resolved.to_dict(), ensure_ascii=False) + "\n")
+    else:
+        sys.stdout.write(format_shell(resolved))
+
+
+@app.command()
+def prereqs(
+    as_json: bool = typer.Option(False, "--json", help="Output in JSON format"),
+    require_tasks: bool = typer.Option(False, "--require-tasks", help="Require tasks.md to exist (for implementation phase)"),
+    include_tasks: bool = typer.Option(False, "--include-tasks", help="Include tasks.md in AVAILABLE_DOCS list"),
+    paths_only: bool = typer.Option(False, "--paths-only", help="Only output path variables (no prerequisite validation)"),
+):
+    """
+    Check the current feature's prerequisites, like check-prerequisites.sh.
+
+    Takes the same options and prints the same output and errors as
+    .specify/scripts/bash/check-prerequisites.sh, without starting bash or git.
+
+    Examples:
+        specify prereqs --json
+        specify prereqs --json --require-tasks --include-tasks
+        specify prereqs --paths-only
+    """
+    from .features import (FeatureError, check_feature_branch, format_paths_only, format_prerequisites,
+                           prerequisites, resolve_cached)
+
+    resolved = resolve_cached()
+    try:
+        if not resolved.has_git:
+            typer.echo("[specify] Warning: Git repository not detected; skipped branch validation", err=True)
+        check_feature_branch(resolved)
+        if paths_only:
+            sys.stdout.write(format_paths_only(resolved, as_json))
+            return
+        result = prerequisites(resolved, require_tasks=require_tasks, include_tasks=include_tasks)
+    except FeatureError as e:
+        typer.echo(f"ERROR: {e}", err=True)
+        raise typer.Exit(1)
+    sys.stdout.write(format_prerequisites(resolved, result, as_json, include_tasks))
+
+
+@app.command("update-agent-context")
+def update_agent_context(
+    agent: str = typer.Argument(None, help="Agent whose context file to update (default: every existing context file)"),
+    as_json: bool = typer.Option(False, "--json", help="Print the parsed plan and per-file results as JSON"),
+):
+    """
+    Merge the current feature's plan.md into the agent context files (CLAUDE.md, AGENTS.md, ...).
+
+    Produces the same files as .specify/scripts/bash/update-agent-context.sh. plan.md is
+    parsed once, all files are written concurrently and atomically, and files whose
+    content would not change are left untouched.
+
+    Examples:
+        specify update-agent-context
+        specify update-agent-context claude --json
+    """
+    from .agent_context import AgentContextError, update_agent_context as update_files
+    from .features import resolve_cached
+
+    resolved = resolve_cached()
+    try:
+        plan, results = update_files(resolved, agent or None, registry=_agents())
+    except AgentContextError as e:
+        if as_json:
+            sys.stdout.write(json.dumps({"error": str(e)}) + "\n")
+        else:
+            console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(1)
+    failed = [r for r in results if r.error]
+    if as_json:
+        sys.stdout.write(json.dumps({"feature": resolved.branch, "plan": plan.to_dict(),
+                                     "files": [r.to_dict() for r in results]}, ensure_ascii=False) + "\n")
+    else:
+        console.print(f"[cyan]Feature[/cyan] {resolved.branch}: {plan.tech_stack or '[dim]no language in plan[/dim]'}", highlight=False)
+        styles = {"created": "green", "updated": "green", "unchanged": "dim", "failed": "red"}
+        for r in results:
+            rel = r.path.relative_to(resolved.repo_root)
+            detail = f" ({r.error})" if r.error else ""
+            console.print(f"  [{styles[r.action]}]{r.action:<9}[/{styles[r.action]}] {rel} [dim]{', '.join(r.names)}[/dim]{detail}", highlight=False)
+    if failed:
+        raise typer.Exit(1)
+
+
+@app.command()
+def query(
+    document: str = typer.Argument("tasks", help="spec, plan, tasks, research, data-model, quickstart, or a path to a Markdown file"),
+    section: str = typer.Option(None, "--section", "-s", help="Print the section with this title or slug (a title prefix also matches)"),
+    field_name: str = typer.Option(None, "--field", "-f", help="Print the value of a **Field**: line"),
+    task: str = typer.Option(None, "--task", "-t", help="Print the task with this ID (T012)"),
+    as_json: bool = typer.Option(False, "--json", help="Output in JSON format"),
+):
+    """
+    Query the current feature's spec.md, plan.md or tasks.md without re-reading it.
+
+    Documents are parsed into sections, fields and tasks once and cached on disk
+    until they change. Without a selector the document outline is printed.
+
+    Examples:
+        specify query plan --field "Language/Version"
+        specify query tasks --task T012 --json
+        specify query spec --section "User Scenarios"
+    """
+    from .documents import DocumentError, document_path, load_document, query as query_document
+    from .features import resolve_cached
+
+    path = document_path(document, resolve_cached().feature_dir)
+    try:
+        result = query_document(load_document(path), section=section, field_name=field_name, task=task)
+    except FileNotFoundError:
+        typer.echo(f"ERROR: {path} not found", err=True)
+        raise typer.Exit(1)
+    except DocumentError as e:
+        typer.echo(f"ERROR: {e}", err=True)
+        raise typer.Exit(1)
+    if as_json:
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+    elif section is not None or task is not None:
+        sys.stdout.write(result["text"] if section is not None else result["source"])
+    elif field_name is not None:
+        sys.stdout.write(result["value"] + "\n")
+    else:
+        for s in result["sections"]:
+            sys.stdout.write(f"{s['line']:>5}  {'  ' * (s['level'] - 1)}{s['title']}\n")
+        tasks = result["tasks"]
+        if tasks["total"]:
+            sys.stdout.write(f"\ntasks: {tasks['done']}/{tasks['total']} done\n")
+        if result["fields"]:
+            sys.stdout.write(f"fields: {', '.join(result['fields'])}\n")
+
+
+feature_app = typer.Typer(help="Create and look up numbered features (specs/NNN-name) through the feature registry", add_completion=False)
+app.add_typer(feature_app, name="feature")
+
+
+@feature_app.command("create")
+def feature_create(
+    description: list[str] = typer.Argument(..., help="Feature description (the first three words name the branch)"),
+    as_json: bool = typer.Option(False, "--json", help="Output in JSON format"),
+):
+    """
+    Allocate the next feature number, create its branch, spec directory and spec.md.
+
+    Same output as create-new-feature.sh. Numbers come from the registry lock, so
+    agents creating features at the same time (in any worktree) get distinct numbers.
+
+    Example:
+        specify feature create --json "Add photo albums"
+    """
+    from .features import FeatureError, create_feature
+
+    try:
+        result = create_feature(" ".join(description))
+    except FeatureError as e:
+        typer.echo(f"ERROR: {e}", err=True)
+        raise typer.Exit(1)
+    if as_json:
+        sys.stdout.write(json.dumps(result, ensure_ascii=False, separators=(",", ":")) + "\n")
+    else:
+        for key, value in result.items():
+            sys.stdout.write(f"{key}: {value}\n")
+
+
+@feature_app.command("list")
+def feature_list(
+    as_json: bool = typer.Option(False, "--json", help="Output in JSON format"),
+):
+    """List registered features, including numbers allocated on other branches."""
+    from .feature_registry import FeatureRegistry
+
+    registry = FeatureRegistry.for_project()
+    features = registry.features()
+    if as_json:
+        sys.stdout.write(json.dumps({"next": registry.next_number(), "features": [f.to_dict() for f in features]}, ensure_ascii=False) + "\n")
+        return
+    from rich.table import Table
+
+    table = Table(show_edge=False, header_style="bold cyan")
+    table.add_column("#", justify="right")
+    table.add_column("Feature")
+    table.add_column("Spec directory")
+    for feature in features:
+        table.add_row(feature.num, feature.name, str(feature.spec_dir) if feature.spec_dir.is_dir() else "[dim]not in this checkout[/dim]")
+    console.print(table)
+    console.print(f"[dim]Next number: {registry.next_number():03d}[/dim]")
+
+
+@feature_app.command("show")
+def feature_show(
+    key: str = typer.Argument(..., help="Feature number (7 or 007), directory name (007-photo-albums) or name (photo-albums)"),
+    as_json: bool = typer.Option(False, "--json", help="Output in JSON format"),
+):
+    """Look up one feature by number or name."""
+    from .feature_registry import FeatureRegistry
+
+    feature = FeatureRegistry.for_project().lookup(key)
+    if feature is None:
+        typer.echo(f"ERROR: No feature matches '{key}'", err=True)
+        raise typer.Exit(1)
+    if as_json:
+        sys.stdout.write(json.dumps(feature.to_dict(), ensure_ascii=False) + "\n")
+    else:
+        for field_name, value in feature.to_dict().items():
+            sys.stdout.write(f"{field_name}: {value}\n")
+
+
+tasks_app = typer.Typer(help="Follow the current feature's tasks.md as a dependency graph", add_completion=False)
+app.add_typer(tasks_app, name="tasks")
+
+
+def _tasks_query(tasks_file: Path | None, query):
+    from .features import resolve_cached
+
+    path = tasks_file or resolve_cached().feature_dir / "tasks.md"
+    try:
+        return query(path)
+    except FileNotFoundError:
+        typer.echo(f"ERROR: tasks.md not found at {path}\nRun /tasks first to create the task list.", err=True)
+        raise typer.Exit(1)
+
+
+@tasks_app.command("next")
+def tasks_next(
+    as_json: bool = typer.Option(False, "--json", help="Output in JSON format"),
+    limit: int = typer.Option(None, "--limit", "-n", min=1, help="Return at most this many ready tasks"),
+    tasks_file: Path = typer.Option(None, "--file", help="tasks.md to use instead of the current feature's"),
+):
+    """
+    Print the tasks that can run now: open tasks whose dependencies are all done.
+
+    Dependencies follow /implement's rules: document order, consecutive [P] tasks
+    as one parallel step, and tasks on the same file one after another. JSON output
+    includes each task's tasks.md text, so the rest of the file need not be read.
+
+    Examples:
+        specify tasks next --json
+        specify tasks next -n 1
+    """
+    from .taskgraph import next_batch
+
+    batch = _tasks_query(tasks_file, lambda path: next_batch(path, limit))
+    if as_json:
+        sys.stdout.write(json.dumps(batch, ensure_ascii=False) + "\n")
+        return
+    for task in batch["ready"]:
+        marker = " [P]" if task["parallel"] else ""
+        files = f"  ({', '.join(task['files'])})" if task["files"] else ""
+        sys.stdout.write(f"{task['id']}{marker} {task['text']}{files}\n")
+    if not batch["ready"]:
+        sys.stdout.write("All tasks are done.\n" if not batch["open"] else "No task is ready.\n")
+    sys.stdout.write(f"\n{batch['done']}/{batch['total']} done, critical path {len(batch['critical_path'])} task(s)\n")
+
+
+@tasks_app.command("graph")
+def tasks_graph(
+    tasks_file: Path = typer.Option(None, "--file", help="tasks.md to use instead of the current feature's"),
+):
+    """Print the whole task graph (tasks, dependencies, ready set, critical path) as JSON."""
+    from .taskgraph import task_graph
+
+    graph = _tasks_query(tasks_file, lambda path: task_graph(path).to_dict())
+    sys.stdout.write(json.dumps(graph, ensure_ascii=False) + "\n")
+
+
+@app.command()
+def serve(
+    socket_path: Path = typer.Option(None, "--socket", help="Listen on this Unix socket instead of stdin/stdout"),
+):
+    """
+    Run a long-lived JSON-RPC 2.0 daemon for IDE extensions and agent harnesses.
+
+    Requests are newline-delimited JSON objects on stdin (responses on stdout) or on a
+    Unix socket. Methods: ping, agents, check, paths, prereqs, feature.create,
+    context.update, document, tasks.next, init, shutdown. The agent registry, tool probes, feature
+    paths and parsed documents stay warm between requests and are invalidated when the
+    files they came from change.
+
+    Examples:
+        specify serve
+        specify serve --socket ~/.cache/specify-cli/serve.sock
+    """
+    from .server import SpecifyService, serve_socket, serve_stdio
+
+    service = SpecifyService()
+    if socket_path is None:
+        # stdout carries only protocol messages; anything else printed goes to stderr
+        protocol_out = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            serve_stdio(service, sys.stdin, protocol_out)
+        finally:
+            sys.stdout = protocol_out
+        return
+    try:
+        console.print(f"[cyan]Listening on[/cyan] {socket_path}", highlight=False)
+        serve_socket(service, socket_path.expanduser())
+    except RuntimeError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
 def main():
     app()
 
@@ -0,0 +1,311 @@
+"""
+Agent context files (CLAUDE.md, GEMINI.md, AGENTS.md, ...) updated from plan.md.
+
+The Python counterpart of `update-agent-context.sh`, producing the same
+files. The script greps plan.md once per field and rewrites the agent files
+one after another. Here the plan comes from the parsed-document cache
+(`documents.load_document`) as a `PlanData` record, every target file is
+rendered in memory, and the files are written concurrently.
+Each write goes through a temporary file in the target's own directory and
+`os.replace`, so a reader never sees a half-written file. A file whose
+rendered content already matches the disk is not written, so its mtime does
+not change. A run with nothing new to add is a no-op.
+
+Which file belongs to which agent comes from the agent registry
+(`Agent.context_file`); agents sharing a file (opencode and Codex use
+AGENTS.md) update it once.
+"""
+
+import datetime
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .agents import AgentRegistry
+    from .documents import Document
+    from .features import FeaturePaths
+
+TEMPLATE_PATH = Path(".specify") / "templates" / "agent-file-template.md"
+DEFAULT_AGENT = "claude"
+MAX_WORKERS = 8
+
+# plan.md "**Field**: value" lines read into PlanData
+PLAN_FIELDS = {
+    "Language/Version": "language",
+    "Primary Dependencies": "framework",
+    "Storage": "database",
+    "Project Type": "project_type",
+}
+_SECTION_RE = re.compile(r"^##\s")
+_LAST_UPDATED_RE = re.compile(r"\*\*Last updated\*\*:.*\d{4}-\d{2}-\d{2}")
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class AgentContextError(RuntimeError):
+    """The agent context files cannot be updated (no plan.md, unknown agent, ...)."""
+
+
+@dataclass(frozen=True)
+class PlanData:
+    """The Technical Context fields of a plan.md ('' when missing or unresolved)."""
+    language: str = ""
+    framework: str = ""
+    database: str = ""
+    project_type: str = ""
+
+    @property
+    def tech_stack(self) -> str:
+        return " + ".join(part for part in (self.language, self.framework) if part)
+
+    def to_dict(self) -> dict:
+        return {"language": self.language, "framework": self.framework,
+                "database": self.database, "project_type": self.project_type}
+
+
+def plan_data(doc: "Document") -> PlanData:
+    """The first top-level (not list item) value of each PLAN_FIELDS field of a parsed plan.md.
+
+    Values still marked NEEDS CLARIFICATION, and N/A, count as missing.
+    """
+    values: dict[str, str] = {}
+    for name, attr in PLAN_FIELDS.items():
+        value = next((f.value for f in doc.field_values(name) if not f.bullet), None)
+        if value is not None:
+            values[attr] = "" if "NEEDS CLARIFICATION" in value or value == "N/A" else value
+    return PlanData(**values)
+
+
+def parse_plan(text: str) -> PlanData:
+    from .documents import parse_document
+
+    return plan_data(parse_document(text))
+
+
+def project_structure(project_type: str) -> str:
+    if "web" in project_type:
+        return "backend/\nfrontend/\ntests/"
+    if "simics" in project_type:
+        return ("simics-project/\n└── modules/device-name/\n    ├── device-name.dml\n    ├── registers.dml\n"
+                "    ├── interfaces.dml\n    ├── sub-feature.dml\n    ├── module_load.py\n    ├── CMakeLists.txt\n"
+                "    └── test/\n        ├── CMakeLists.txt\n        ├── SUITEINFO\n        ├── s-device-name.py\n"
+                "        ├── test_name_common.py\n        └── README")
+    return "src/\ntests/"
+
+
+def language_commands(language: str) -> str:
+    if "Python" in language:
+        return "cd src && pytest && ruff check ."
+    if "Rust" in language:
+        return "cargo test && cargo clippy"
+    if "JavaScript" in language or "TypeScript" in language:
+        return "npm test && npm run lint"
+    return f"# Add commands for {language}"
+
+
+def render_new(template: str, plan: PlanData, project_name: str, branch: str, date: str) -> str:
+    """A new context file from agent-file-template.md."""
+    stack = plan.tech_stack
+    substitutions = {
+        "[PROJECT NAME]": project_name,
+        "[DATE]": date,
+        "[EXTRACTED FROM ALL PLAN.MD FILES]": f"- {stack} ({branch})" if stack else f"- ({branch})",
+        "[ACTUAL STRUCTURE FROM PLANS]": project_structure(plan.project_type),
+        "[ONLY COMMANDS FOR ACTIVE TECHNOLOGIES]": language_commands(plan.language),
+        "[LANGUAGE-SPECIFIC, ONLY FOR LANGUAGES IN USE]": f"{plan.language}: Follow standard conventions",
+        "[LAST 3 FEATURES AND WHAT THEY ADDED]": f"- {branch}: Added {stack}" if stack else f"- {branch}: Added",
+    }
+    for placeholder, value in substitutions.items():
+        template = template.replace(placeholder, value)
+    return template
+
+
+def render_update(text: str, plan: PlanData, branch: str, date: str) -> str:
+    """An existing context file with this feature's technologies and change entry merged in.
+
+    New technologies go at the end of "## Active Technologies"; the change entry
+    goes first under "## Recent Changes", which keeps the three most recent
+    entries. Entries already present are not added again.
+    """
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    stack = plan.tech_stack
+    new_tech = [f"- {item} ({branch})" for item in (stack, plan.database) if item and item not in text]
+    change = f"- {branch}: Added {stack or plan.database}" if stack or plan.database else ""
+    if change in lines:
+        change = ""
+    keep_changes = 2 if change else 3
+
+    out: list[str] = []
+    in_tech = in_changes = tech_added = False
+    kept_changes = 0
+    for line in lines:
+        if line == "## Active Technologies":
+            out.append(line)
+            in_tech = True
+            continue
+        if in_tech and (_SECTION_RE.match(line) or not line):
+            # New technologies close the list: before its blank line or the next section
+            if not tech_added:
+                out += new_tech
+                tech_added = True
+            if line:
+                # The next section's heading is handled below (it may be Recent Changes)
+                in_tech = False
+            else:
+                out.append(line)
+                continue
+
+        if line == "## Recent Changes":
+            out.append(line)
+            if change:
+                out.append(change)
+            in_changes = True
+            continue
+        if in_changes and _SECTION_RE.match(line):
+            out.append(line)
+            in_changes = False
+            continue
+        if in_changes and line.startswith("- "):
+            if kept_changes < keep_changes:
+                out.append(line)
+                kept_changes += 1
+            continue
+
+        if _LAST_UPDATED_RE.search(line):
+            line = _DATE_RE.sub(date, line, count=1)
+        out.append(line)
+    if in_tech and not tech_added:
+        out += new_tech
+    return "\n".join(out) + "\n" if out else ""
+
+
+def _read(path: Path) -> str:
+    # Line endings are kept as they are, like the script's read/echo loop
+    with open(path, encoding="utf-8", errors="surrogateescape", newline="") as f:
+        return f.read()
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Atomically replace path with content unless it already holds exactly that."""
+    data = content.encode("utf-8", errors="surrogateescape")
+    try:
+        if path.read_bytes() == data:
+            return False
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return True
+
+
+@dataclass
+class ContextUpdate:
+    """The outcome for one context file: created, updated, unchanged or failed."""
+    path: Path
+    agents: list[str] = field(default_factory=list)
+    names: list[str] = field(default_factory=list)
+    action: str = ""
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        return {"path": str(self.path), "agents": self.agents, "names": self.names,
+                "action": self.action, "error": self.error}
+
+
+def _targets(repo_root: Path, registry: "AgentRegistry", agent: str | None) -> list[ContextUpdate]:
+    """The files to update: the agent's, or every existing one (Claude's if none exist)."""
+    by_path: dict[Path, ContextUpdate] = {}
+    if agent:
+        if agent not in registry:
+            raise AgentContextError(f"Unknown agent type '{agent}'")
+        if not registry[agent].context_file:
+            raise AgentContextError(f"Agent '{agent}' has no context file")
+        candidates = [registry[agent]]
+    else:
+        candidates = [a for a in registry if a.context_file and (repo_root / a.context_file).is_file()]
+        if not candidates and DEFAULT_AGENT in registry:
+            candidates = [registry[DEFAULT_AGENT]]
+    for a in candidates:
+        target = by_path.setdefault(repo_root / a.context_file, ContextUpdate(repo_root / a.context_file))
+        target.agents.append(a.key)
+        target.names.append(a.name)
+    return list(by_path.values())
+
+
+def update_agent_context(paths: "FeaturePaths", agent: str | None = None, *, registry: "AgentRegistry | None" = None,
+                         date: str | None = None) -> tuple[PlanData, list[ContextUpdate]]:
+    """Merge the current feature's plan.md into the agent context files.
+
+    agent: update only this agent's file (created from the template if missing);
+           by default every existing context file is updated.
+    Per-file failures are reported in the returned ContextUpdate list; problems
+    with the feature itself raise AgentContextError.
+    """
+    if registry is None:
+        from .agents import registry as load_registry
+        registry = load_registry()
+    from .documents import load_document
+
+    plan_file = paths.feature_dir / "plan.md"
+    try:
+        plan = plan_data(load_document(plan_file))
+    except FileNotFoundError:
+        raise AgentContextError(f"No plan.md found at {plan_file}") from None
+    except OSError as e:
+        raise AgentContextError(f"Plan file is not readable: {plan_file} ({e})") from e
+
+    root = paths.repo_root
+    targets = _targets(root, registry, agent)
+    date = date or datetime.date.today().isoformat()
+    template_path = root / TEMPLATE_PATH
+    template: list[str | None] = []
+    template_lock = threading.Lock()
+
+    def load_template() -> str | None:
+        with template_lock:
+            if not template:
+                try:
+                    template.append(_read(template_path))
+                except OSError:
+                    template.append(None)
+            return template[0]
+
+    def update(target: ContextUpdate) -> ContextUpdate:
+        try:
+            try:
+                current = _read(target.path)
+            except FileNotFoundError:
+                current = None
+            if current is None:
+                text = load_template()
+                if text is None:
+                    raise AgentContextError(f"Template not found at {template_path}")
+                content = render_new(text, plan, root.name, paths.branch, date)
+                action = "created"
+            else:
+                content = render_update(current, plan, paths.branch, date)
+                action = "updated"
+            target.action = action if write_if_changed(target.path, content) else "unchanged"
+        except (OSError, AgentContextError) as e:
+            target.action, target.error = "failed", str(e)
+        return target
+
+    if len(targets) == 1:
+        return plan, [update(targets[0])]
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(targets))) as pool:
+        return plan, list(pool.map(update, targets))
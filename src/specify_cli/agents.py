@@ -0,0 +1,206 @@
+"""
+Declarative registry of supported AI agents.
+
+Everything the CLI knows about an agent (display name, command directory,
+argument placeholder, file extension, the CLI to look for and where to get it)
+is declared once here. The registry is loaded once per process and compiled
+into the lookup tables that `init`, `check`, `upgrade` and the template
+pipeline use, so adding an agent is a data change rather than an edit to each
+of those code paths.
+
+Users can add agents, or override fields of builtin ones, in a TOML file:
+
+    [agents.myagent]
+    name = "My Agent"
+    commands_dir = ".myagent/commands"
+    arg_format = "$ARGUMENTS"      # default
+    extension = "md"               # default; "toml" renders Gemini-style files
+    cli = "myagent"                # probed by `specify check`
+    install_url = "https://example.com/install"
+    context_file = "MYAGENT.md"    # updated from plan.md by update-agent-context
+    requires_cli = true            # `init` fails without the CLI unless --ignore-agent-tools
+
+Environment:
+    SPECIFY_AGENTS_FILE  Path of the user registry (default: agents.toml in the
+                         platformdirs user config dir for specify-cli)
+"""
+
+import hashlib
+import json
+import os
+import tomllib
+from dataclasses import asdict, dataclass, field, fields, replace
+from pathlib import Path
+
+
+class RegistryError(ValueError):
+    """The user agent registry file is invalid."""
+
+
+@dataclass(frozen=True)
+class Agent:
+    """One AI agent.
+
+    commands_dir: where command files are generated (project relative)
+    folder:       top-level folder the agent owns (security notice); defaults to the
+                  first component of commands_dir
+    cli:          executable of the agent's CLI, probed by `specify check`
+    cli_fallback: location checked when cli is not on PATH (e.g. `claude migrate-installer`)
+    requires_cli: `init` requires cli (with install_url as the hint) unless tool checks are skipped
+    ide_tools:    other executables worth reporting in `check` ({executable: label}); they
+                  do not count as an installed assistant
+    context_file: the agent's context file kept up to date from plan.md by
+                  update-agent-context (project relative; agents may share one)
+    """
+    key: str
+    name: str
+    commands_dir: str
+    arg_format: str = "$ARGUMENTS"
+    extension: str = "md"
+    folder: str | None = None
+    cli: str | None = None
+    cli_label: str | None = None
+    cli_fallback: str | None = None
+    install_url: str | None = None
+    requires_cli: bool = False
+    ide_tools: dict[str, str] = field(default_factory=dict)
+    context_file: str | None = None
+
+    @property
+    def owned_folder(self) -> str:
+        return self.folder or self.commands_dir.strip("/").split("/", 1)[0] + "/"
+
+
+BUILTIN_AGENTS = (
+    Agent("copilot", "GitHub Copilot", ".github/prompts", extension="prompt.md", folder=".github/",
+          context_file=".github/copilot-instructions.md",
+          ide_tools={"code": "Visual Studio Code", "code-insiders": "Visual Studio Code Insiders"}),
+    Agent("claude", "Claude Code", ".claude/commands", cli="claude", cli_label="Claude Code CLI",
+          cli_fallback="~/.claude/local/claude", install_url="https://docs.anthropic.com/en/docs/claude-code/setup",
+          requires_cli=True, context_file="CLAUDE.md"),
+    Agent("gemini", "Gemini CLI", ".gemini/commands", arg_format="{{args}}", extension="toml", cli="gemini",
+          install_url="https://github.com/google-gemini/gemini-cli", requires_cli=True, context_file="GEMINI.md"),
+    Agent("cursor", "Cursor", ".cursor/commands", cli="cursor-agent", cli_label="Cursor IDE agent",
+          context_file=".cursor/rules/specify-rules.mdc"),
+    Agent("qwen", "Qwen Code", ".qwen/commands", arg_format="{{args}}", extension="toml", cli="qwen",
+          cli_label="Qwen Code CLI", install_url="https://github.com/QwenLM/qwen-code", requires_cli=True,
+          context_file="QWEN.md"),
+    Agent("opencode", "opencode", ".opencode/command", cli="opencode", install_url="https://opencode.ai",
+          requires_cli=True, context_file="AGENTS.md"),
+    Agent("codex", "Codex CLI", ".codex/prompts", cli="codex", install_url="https://github.com/openai/codex",
+          requires_cli=True, context_file="AGENTS.md"),
+    Agent("windsurf", "Windsurf", ".windsurf/workflows", cli="windsurf", cli_label="Windsurf IDE",
+          context_file=".windsurf/rules/specify-rules.md"),
+    Agent("kilocode", "Kilo Code", ".kilocode/workflows", cli="kilocode", cli_label="Kilo Code IDE",
+          context_file=".kilocode/rules/specify-rules.md"),
+    Agent("auggie", "Auggie CLI", ".augment/commands", cli="auggie",
+          install_url="https://docs.augmentcode.com/cli/setup-auggie/install-auggie-cli", requires_cli=True,
+          context_file=".augment/rules/specify-rules.md"),
+    Agent("roo", "Roo Code", ".roo/commands", cli="roo", install_url="https://roo.ai", requires_cli=True,
+          context_file=".roo/rules/specify-rules.md"),
+    Agent("kiro", "Kiro", ".kiro/specs"),
+    # ADK projects always skip the agent tool check
+    Agent("adk", "ADK (Agent Development Kit)", ".adk/commands", cli="adk", cli_label="ADK CLI",
+          install_url="https://github.com/google/adk-python", context_file="ADK.md"),
+)
+
+_FIELD_TYPES = {f.name: f.type for f in fields(Agent) if f.name != "key"}
+
+
+class AgentRegistry:
+    """Agents in display order, with the lookup tables the CLI needs precomputed."""
+
+    def __init__(self, agents: list[Agent]):
+        self.agents = {agent.key: agent for agent in agents}
+        self.choices = {key: a.name for key, a in self.agents.items()}
+        self.command_dirs = {key: a.commands_dir for key, a in self.agents.items()}
+        self.arg_formats = {key: a.arg_format for key, a in self.agents.items()}
+        self.extensions = {key: a.extension for key, a in self.agents.items()}
+        self.folders = {key: a.owned_folder for key, a in self.agents.items()}
+        self.fallbacks = {a.cli: Path(a.cli_fallback).expanduser() for a in self.agents.values() if a.cli and a.cli_fallback}
+        # Executables reported by `specify check`, and the subset that are assistants
+        self.check_tools: dict[str, str] = {}
+        self.assistant_tools: set[str] = set()
+        for a in self.agents.values():
+            self.check_tools.update(a.ide_tools)
+            if a.cli:
+                self.check_tools.setdefault(a.cli, a.cli_label or a.name)
+                self.assistant_tools.add(a.cli)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.agents
+
+    def __getitem__(self, key: str) -> Agent:
+        return self.agents[key]
+
+    def __iter__(self):
+        return iter(self.agents.values())
+
+    def digest(self, keys: list[str]) -> str:
+        """Hash of the resolved entries of keys, so outputs rendered for them can
+        be told apart once a user override changes one."""
+        data = [asdict(self.agents[key]) for key in keys]
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def user_registry_path() -> Path:
+    override = os.getenv("SPECIFY_AGENTS_FILE")
+    if override:
+        return Path(override).expanduser()
+    from platformdirs import user_config_dir
+    return Path(user_config_dir("specify-cli")) / "agents.toml"
+
+
+def _validate(key: str, values: dict, path: Path) -> dict:
+    unknown = set(values) - set(_FIELD_TYPES)
+    if unknown:
+        raise RegistryError(f"{path}: agent '{key}' has unknown field(s): {', '.join(sorted(unknown))}")
+    for name, value in values.items():
+        if name == "requires_cli":
+            ok = isinstance(value, bool)
+        elif name == "ide_tools":
+            ok = isinstance(value, dict) and all(isinstance(v, str) for v in value.values())
+        else:
+            ok = isinstance(value, str) and value != ""
+        if not ok:
+            raise RegistryError(f"{path}: agent '{key}' field '{name}' has an invalid value")
+    return values
+
+
+def load_registry(path: Path | None = None) -> AgentRegistry:
+    """Builtin agents merged with the user registry file (if it exists)."""
+    agents = {agent.key: agent for agent in BUILTIN_AGENTS}
+    path = user_registry_path() if path is None else path
+    try:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    except FileNotFoundError:
+        return AgentRegistry(list(agents.values()))
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise RegistryError(f"{path}: {e}") from e
+
+    table = data.get("agents", {})
+    if not isinstance(table, dict):
+        raise RegistryError(f"{path}: [agents] must be a table")
+    for key, values in table.items():
+        if not isinstance(values, dict):
+            raise RegistryError(f"{path}: [agents.{key}] must be a table")
+        values = _validate(key, values, path)
+        if key in agents:
+            agents[key] = replace(agents[key], **values)
+        else:
+            if "commands_dir" not in values:
+                raise RegistryError(f"{path}: new agent '{key}' needs commands_dir")
+            agents[key] = Agent(key, **{"name": key, **values})
+    return AgentRegistry(list(agents.values()))
+
+
+_registry: AgentRegistry | None = None
+
+
+def registry() -> AgentRegistry:
+    """The process-wide registry, loaded on first use."""
+    global _registry
+    if _registry is None:
+        _registry = load_registry()
+    return _registry
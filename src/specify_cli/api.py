@@ -0,0 +1,248 @@
+"""
+Library API for scaffolding projects in-process.
+
+`scaffold()` performs the same work as `specify init` (plan, conflict check,
+write templates or extract release archives, record the `specify upgrade`
+baseline, optionally make the first commit) without any console output,
+prompts or process exits, and returns a `Manifest` describing what was
+written. Problems are raised as `ScaffoldError` (`ConflictError` when the
+target already holds files the plan would replace). Nothing is deleted on
+failure; files written before the error are left in place.
+
+Calls share nothing but the on-disk caches, which are safe for concurrent use,
+so many projects can be scaffolded from a thread pool, or from asyncio via
+`scaffold_async()`:
+
+    from specify_cli import ScaffoldOptions, scaffold
+
+    manifest = scaffold("my-project", ["claude", "gemini"], "sh", ScaffoldOptions(git=True))
+    print(manifest.files)
+"""
+
+import asyncio
+import shutil
+import subprocess
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+    from .planner import WritePlan
+
+SCRIPT_TYPES = ("sh", "ps")
+SOURCES = ("auto", "local", "release")
+DEFAULT_COMMIT_MESSAGE = "Initial commit from Specify template"
+
+
+class ScaffoldError(RuntimeError):
+    """The project could not be scaffolded."""
+
+
+class ConflictError(ScaffoldError):
+    """Planned files collide with what already exists in the project directory."""
+
+    def __init__(self, message: str, overwrite: list[str], blocked: list[str]):
+        super().__init__(message)
+        self.overwrite = overwrite
+        self.blocked = blocked
+
+
+@dataclass(frozen=True)
+class ScaffoldOptions:
+    """How scaffold() sources and writes a project.
+
+    source:      "local" (templates next to the package), "release" (GitHub release
+                 archives) or "auto" (local when available, like `specify init`)
+    overwrite:   replace existing files the plan writes (otherwise ConflictError)
+    git:         create a repository with the generated files as its first commit
+                 (skipped when the directory is already inside a repository)
+    use_cache:   use the template cache and the release artifact store
+    dry_run:     plan and check conflicts only; nothing is written
+    """
+    source: str = "auto"
+    overwrite: bool = False
+    git: bool = False
+    use_cache: bool = True
+    dry_run: bool = False
+    github_token: str | None = None
+    offline: bool | None = None
+    release_ttl: float | None = None
+    skip_tls: bool = False
+    commit_message: str = DEFAULT_COMMIT_MESSAGE
+
+
+@dataclass
+class Manifest:
+    """What scaffold() wrote (or, for a dry run, would write).
+
+    files:       project-relative POSIX paths of every generated file
+    overwritten: the subset of files that existed before
+    sha256:      digest of each written file (empty for dry runs)
+    commit:      id of the initial commit when options.git created one
+    """
+    project_dir: Path
+    agents: list[str]
+    script_type: str
+    source: str
+    release: str | None = None
+    files: list[str] = field(default_factory=list)
+    overwritten: list[str] = field(default_factory=list)
+    sha256: dict[str, str] = field(default_factory=dict)
+    commit: str | None = None
+    dry_run: bool = False
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "project_dir": str(self.project_dir)}
+
+
+def _agent_list(agents: str | list[str]) -> list[str]:
+    from .agents import RegistryError, registry
+
+    keys = agents.split(",") if isinstance(agents, str) else list(agents)
+    keys = list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+    try:
+        known = registry()
+    except RegistryError as e:
+        raise ScaffoldError(f"Invalid agent registry: {e}") from e
+    if not keys:
+        raise ScaffoldError("At least one agent is required")
+    unknown = [key for key in keys if key not in known]
+    if unknown:
+        raise ScaffoldError(f"Unknown agent(s): {', '.join(unknown)}")
+    return keys
+
+
+def _fetch_archive(client: "httpx.Client", agent: str, script_type: str, options: ScaffoldOptions, download_dir: Path) -> tuple[Path, str]:
+    """(archive path, release tag) for one agent, from the artifact store when possible."""
+    from . import _github_auth_headers
+    from .download import download_file
+    from .releases import fetch_latest_release, find_template_asset
+    from .template_cache import cache_enabled
+
+    headers = _github_auth_headers(options.github_token)
+    release_data, _ = fetch_latest_release(client, "github", "spec-kit", headers=headers,
+                                           offline=options.offline, ttl=options.release_ttl)
+    asset = find_template_asset(release_data, agent, script_type)
+    if asset is None:
+        raise ScaffoldError(f"No release asset for {agent}/{script_type} in {release_data.get('tag_name')}")
+
+    def download(target_dir: Path) -> Path:
+        return download_file(client, asset["browser_download_url"], target_dir / asset["name"],
+                             expected_size=asset.get("size"), expected_digest=asset.get("digest"), headers=headers)
+
+    tag = release_data["tag_name"]
+    if options.use_cache and cache_enabled():
+        from .artifacts import ArtifactStore
+        zip_path, _ = ArtifactStore().fetch(tag, agent, script_type, download)
+        return zip_path, tag
+    return download(download_dir), tag
+
+
+def _plan(agents: list[str], script_type: str, options: ScaffoldOptions, client: "httpx.Client | None", download_dir: Path) -> "WritePlan":
+    from . import _local_templates_available, _local_upgrade_plan, _project_entries, _release_upgrade_plan
+    from .artifacts import open_zip
+    from .planner import WritePlan
+
+    local = _local_templates_available()
+    if options.source == "local" and not local:
+        raise ScaffoldError("Local templates are not available (not running from a spec-kit checkout)")
+    if options.source == "local" or (options.source == "auto" and local):
+        repo_root = Path(__file__).resolve().parent.parent.parent
+        entries = _project_entries(repo_root, agents, script_type)
+        return WritePlan(agents, script_type, "local", _local_upgrade_plan(agents, script_type, entries), entries=entries)
+
+    own_client = client is None
+    if own_client:
+        from . import _http_client
+        client = _http_client(options.skip_tls)
+    plan = WritePlan(agents, script_type, "release", [])
+    try:
+        for agent in agents:
+            zip_path, plan.release = _fetch_archive(client, agent, script_type, options, download_dir)
+            plan.archives.append((agent, zip_path))
+            with open_zip(zip_path) as zip_ref:
+                plan.files += _release_upgrade_plan(zip_ref, agent, script_type)
+    except ScaffoldError:
+        raise
+    except Exception as e:
+        raise ScaffoldError(f"Could not fetch the release templates: {e}") from e
+    finally:
+        if own_client:
+            client.close()
+    return plan
+
+
+def scaffold(project_dir: str | Path, agents: str | list[str], script_type: str = "sh", options: ScaffoldOptions | None = None, *, client: "httpx.Client | None" = None) -> Manifest:
+    """Scaffold a Specify project into project_dir (created if missing) and return its Manifest.
+
+    agents: agent keys, as a list or a comma separated string
+    client: httpx client to reuse for release downloads (one is created per call otherwise)
+    """
+    from . import _extract_template_zip, _make_scripts_executable, _render_local_project
+    from .gitrepo import bootstrap_repo, find_git_dir
+    from .upgrade import MANIFEST_PATH, write_manifest
+
+    options = options or ScaffoldOptions()
+    if script_type not in SCRIPT_TYPES:
+        raise ScaffoldError(f"Invalid script type '{script_type}' (choose from {', '.join(SCRIPT_TYPES)})")
+    if options.source not in SOURCES:
+        raise ScaffoldError(f"Invalid source '{options.source}' (choose from {', '.join(SOURCES)})")
+    agent_keys = _agent_list(agents)
+    project_dir = Path(project_dir).resolve()
+
+    # Private download directory: concurrent calls never share partial downloads
+    download_dir = Path(tempfile.mkdtemp(prefix="specify-scaffold-"))
+    try:
+        plan = _plan(agent_keys, script_type, options, client, download_dir)
+        conflicts = plan.find_conflicts(project_dir)
+        if conflicts.blocked:
+            raise ConflictError(f"{len(conflicts.blocked)} planned path(s) are blocked in {project_dir}",
+                                conflicts.overwrite, conflicts.blocked)
+        if conflicts.overwrite and not options.overwrite:
+            raise ConflictError(f"{len(conflicts.overwrite)} existing file(s) would be overwritten in {project_dir}",
+                                conflicts.overwrite, conflicts.blocked)
+
+        manifest = Manifest(project_dir, agent_keys, script_type, plan.source, plan.release,
+                            files=plan.dests(), overwritten=conflicts.overwrite, dry_run=options.dry_run)
+        if options.dry_run:
+            return manifest
+
+        written: dict = {}
+        try:
+            project_dir.mkdir(parents=True, exist_ok=True)
+            if plan.source == "release":
+                for agent, zip_path in plan.archives:
+                    _extract_template_zip(zip_path, project_dir, agent, script_type)
+                _make_scripts_executable(project_dir)
+            else:
+                _render_local_project(project_dir, agent_keys, script_type, use_cache=options.use_cache,
+                                      entries=plan.entries, repo_root=Path(__file__).resolve().parent.parent.parent,
+                                      written=written)
+        except OSError as e:
+            raise ScaffoldError(f"Could not write {project_dir}: {e}") from e
+
+        info = {"agents": agent_keys, "script_type": script_type, "source": plan.source}
+        if plan.release:
+            info["release"] = plan.release
+        recorded = write_manifest(project_dir, plan.files, info, written)
+        manifest.sha256 = {path: entry["sha256"] for path, entry in recorded["files"].items()}
+    finally:
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+    if options.git and find_git_dir(project_dir) is None:
+        if shutil.which("git") is None:
+            raise ScaffoldError("git is not installed")
+        try:
+            # The upgrade manifest is committed with the files it describes, so clones can upgrade too
+            manifest.commit = bootstrap_repo(project_dir, [*manifest.files, MANIFEST_PATH.as_posix()], options.commit_message)
+        except (subprocess.CalledProcessError, OSError) as e:
+            detail = getattr(e, "stderr", None) or str(e)
+            raise ScaffoldError(f"git repository initialisation failed: {detail.strip()}") from e
+    return manifest
+
+
+async def scaffold_async(project_dir: str | Path, agents: str | list[str], script_type: str = "sh", options: ScaffoldOptions | None = None) -> Manifest:
+    """scaffold() run in a worker thread, for use from an asyncio event loop."""
+    return await asyncio.to_thread(scaffold, project_dir, agents, script_type, options)
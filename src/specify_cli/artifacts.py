@@ -0,0 +1,165 @@
+"""
+Machine-wide store of downloaded release template archives.
+
+Archives are kept under `<cache root>/artifacts/`, keyed by release tag, agent
+and script type, so every project (and every CI job sharing the cache dir)
+extracts from the same zip instead of downloading it again. A per-artifact
+lock makes concurrent `specify` processes download a missing archive only
+once; finished downloads are published with an atomic rename. The store is
+kept under a size cap by evicting the least recently used archives (access
+time is tracked through the file mtime).
+
+Environment:
+    SPECIFY_ARTIFACT_MAX_MB  Size cap for the store in MiB (default 1024, 0 disables eviction)
+    SPECIFY_ARTIFACT_MMAP    Set to 1 to read archives through a memory-mapped zipfile
+"""
+
+import mmap
+import os
+import re
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+from .locks import file_lock
+from .template_cache import cache_root
+
+DEFAULT_MAX_MB = 1024
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def artifact_max_bytes() -> int:
+    try:
+        return int(float(os.getenv("SPECIFY_ARTIFACT_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_MAX_MB * 1024 * 1024
+
+
+def mmap_enabled() -> bool:
+    return os.getenv("SPECIFY_ARTIFACT_MMAP", "").strip().lower() in ("1", "true", "yes")
+
+
+class _MappedFile:
+    """File-like view of an mmap; zipfile also expects seekable()."""
+
+    def __init__(self, mapped: mmap.mmap):
+        self._mapped = mapped
+
+    def __getattr__(self, name):
+        return getattr(self._mapped, name)
+
+    def seekable(self) -> bool:
+        return True
+
+
+@contextmanager
+def open_zip(path: Path, use_mmap: bool | None = None) -> Iterator[zipfile.ZipFile]:
+    """Open an archive for reading, optionally backed by a read-only memory map."""
+    use_mmap = mmap_enabled() if use_mmap is None else use_mmap
+    if not use_mmap:
+        with zipfile.ZipFile(path, "r") as zf:
+            yield zf
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with zipfile.ZipFile(_MappedFile(mapped), "r") as zf:
+            yield zf
+
+
+class ArtifactStore:
+    """Shared, size-capped LRU store of template archives."""
+
+    def __init__(self, root: Path | None = None, max_bytes: int | None = None):
+        self.root = (root or cache_root()) / "artifacts"
+        self.max_bytes = artifact_max_bytes() if max_bytes is None else max_bytes
+
+    @staticmethod
+    def _safe(part: str) -> str:
+        return _UNSAFE_RE.sub("_", part)
+
+    def path(self, tag: str, ai_assistant: str, script_type: str) -> Path:
+        return self.root / self._safe(tag) / f"{self._safe(ai_assistant)}-{self._safe(script_type)}.zip"
+
+    @property
+    def staging_dir(self) -> Path:
+        """Directory for in-progress downloads (same filesystem, so publishing is a rename)."""
+        return self.root / ".partial"
+
+    @contextmanager
+    def lock(self, tag: str, ai_assistant: str, script_type: str) -> Iterator[None]:
+        path = self.path(tag, ai_assistant, script_type)
+        with file_lock(path.with_name(path.name + ".lock")):
+            yield
+
+    def get(self, tag: str, ai_assistant: str, script_type: str) -> Path | None:
+        """Return the stored archive (marking it as recently used), or None."""
+        path = self.path(tag, ai_assistant, script_type)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def add(self, tag: str, ai_assistant: str, script_type: str, source: Path) -> Path:
+        """Move a completed download into the store atomically and enforce the size cap."""
+        path = self.path(tag, ai_assistant, script_type)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, path)
+        os.utime(path)
+        self.evict(keep=path)
+        return path
+
+    def fetch(self, tag: str, ai_assistant: str, script_type: str, download: Callable[[Path], Path]) -> tuple[Path, bool]:
+        """Return (archive path, was_cached), calling download(staging_dir) -> file when missing.
+
+        Holding the artifact lock means concurrent processes asking for the same
+        archive wait for the first download instead of repeating it.
+        """
+        with self.lock(tag, ai_assistant, script_type):
+            cached = self.get(tag, ai_assistant, script_type)
+            if cached is not None:
+                return cached, True
+            self.staging_dir.mkdir(parents=True, exist_ok=True)
+            downloaded = download(self.staging_dir)
+            return self.add(tag, ai_assistant, script_type, downloaded), False
+
+    def entries(self) -> list[tuple[Path, os.stat_result]]:
+        """All stored archives with their stat results, least recently used first."""
+        if not self.root.is_dir():
+            return []
+        found = []
+        for tag_dir in self.root.iterdir():
+            if not tag_dir.is_dir() or tag_dir.name.startswith("."):
+                continue
+            for path in tag_dir.glob("*.zip"):
+                try:
+                    found.append((path, path.stat()))
+                except FileNotFoundError:
+                    continue
+        found.sort(key=lambda item: item[1].st_mtime_ns)
+        return found
+
+    def evict(self, keep: Path | None = None) -> list[Path]:
+        """Delete least recently used archives until the store fits the size cap."""
+        if self.max_bytes <= 0:
+            return []
+        removed = []
+        with file_lock(self.root / ".evict.lock"):
+            entries = self.entries()
+            total = sum(st.st_size for _, st in entries)
+            for path, st in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= st.st_size
+                removed.append(path)
+        return removed
+
+    def clear(self) -> None:
+        for path, _ in self.entries():
+            path.unlink(missing_ok=True)
@@ -0,0 +1,175 @@
+"""
+Compiled representation of `templates/commands/*.md`.
+
+The release packaging logic renders a command template through a chain of
+passes: extract the script command, replace `{SCRIPT}`, strip the `scripts:`
+frontmatter section, replace `{ARGS}` and `__AGENT__`, rewrite
+`memory/`/`scripts/`/`templates/` paths and, for TOML agents, split the
+frontmatter off again. `CommandTemplate` does the agent-independent work once:
+
+* one line pass at compile time indexes frontmatter fields and boundaries;
+* one preparation per script type substitutes `{SCRIPT}`, drops the
+  `scripts:` section, rewrites paths and records the `{ARGS}`/`__AGENT__`
+  spans (plus the TOML description/body split);
+* `render()` per agent is then a single join over precomputed segments.
+
+Output is identical to the original pass chain in `specify_cli`.
+"""
+
+import re
+from pathlib import Path
+
+_FIELD_RE = re.compile(r"^\s*([^\s:]+):\s*(.+)$")
+_SECTION_KEY_RE = re.compile(r"^[a-zA-Z].*:")
+_INDENTED_RE = re.compile(r"^\s+")
+_PLACEHOLDER_RE = re.compile(r"\{ARGS\}|__AGENT__")
+_PATH_RES = (
+    (re.compile(r"(?<!\.specify/)(/?)memory/"), ".specify/memory/"),
+    (re.compile(r"(?<!\.specify/)(/?)scripts/"), ".specify/scripts/"),
+    (re.compile(r"(?<!\.specify/)(/?)templates/"), ".specify/templates/"),
+)
+
+
+def rewrite_paths(content: str) -> str:
+    """Rewrite paths to use .specify/ prefix, but avoid double prefixes."""
+    for pattern, replacement in _PATH_RES:
+        content = pattern.sub(replacement, content)
+    return content
+
+
+def _segments(text: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Split text into literal chunks around {ARGS}/__AGENT__ placeholders."""
+    literals, slots, pos = [], [], 0
+    for m in _PLACEHOLDER_RE.finditer(text):
+        literals.append(text[pos:m.start()])
+        slots.append(m.group(0))
+        pos = m.end()
+    literals.append(text[pos:])
+    return tuple(literals), tuple(slots)
+
+
+def _join(segments: tuple[tuple[str, ...], tuple[str, ...]], values: dict[str, str]) -> str:
+    literals, slots = segments
+    if not slots:
+        return literals[0]
+    parts = [literals[0]]
+    for slot, literal in zip(slots, literals[1:]):
+        parts.append(values[slot])
+        parts.append(literal)
+    return "".join(parts)
+
+
+class _Prepared:
+    """Script-type specific, agent-independent rendering state."""
+    __slots__ = ("full", "description", "body")
+
+    def __init__(self, full, description, body):
+        self.full = full
+        self.description = description
+        self.body = body
+
+
+class CommandTemplate:
+    """A command template parsed once and renderable for any agent/format."""
+
+    def __init__(self, name: str, content: str):
+        self.name = name
+        self.content = content
+        self._lines = content.split("\n")
+        # First `key: value` match per key anywhere in the file (script commands)
+        self.fields: dict[str, str] = {}
+        # Indices of the '---' lines and of lines inside the first frontmatter block
+        self._dash_lines: set[int] = set()
+        self._frontmatter: list[int] = []
+        self._prepared: dict[str, _Prepared | None] = {}
+
+        dash_count = 0
+        for i, line in enumerate(self._lines):
+            m = _FIELD_RE.match(line)
+            if m and m.group(1) not in self.fields:
+                self.fields[m.group(1)] = m.group(2).strip()
+            if line.strip() == "---":
+                dash_count += 1
+                self._dash_lines.add(i)
+            elif dash_count == 1:
+                self._frontmatter.append(i)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "CommandTemplate":
+        return cls(path.stem, path.read_text(encoding="utf-8"))
+
+    def script_command(self, script_type: str) -> str:
+        return self.fields.get(script_type, "")
+
+    def _prepare(self, script_type: str) -> _Prepared | None:
+        if script_type in self._prepared:
+            return self._prepared[script_type]
+        script_command = self.script_command(script_type)
+        if not script_command:
+            self._prepared[script_type] = None
+            return None
+
+        # Substitute {SCRIPT} and drop the scripts: section from the frontmatter
+        lines = [line.replace("{SCRIPT}", script_command) for line in self._lines]
+        skipped = set()
+        skip_scripts = False
+        for i in self._frontmatter:
+            line = lines[i]
+            if line.strip() == "scripts:":
+                skip_scripts = True
+                skipped.add(i)
+                continue
+            if skip_scripts and _SECTION_KEY_RE.match(line):
+                skip_scripts = False
+            if skip_scripts and _INDENTED_RE.match(line):
+                skipped.add(i)
+        kept = [(i, line) for i, line in enumerate(lines) if i not in skipped]
+
+        text = rewrite_paths("\n".join(line for _, line in kept))
+
+        # Locate the TOML description line and body (lines outside frontmatter)
+        out_lines = text.split("\n")
+        frontmatter = set(self._frontmatter) | self._dash_lines
+        description = next((line for line in out_lines if line.startswith("description:")), None)
+        body = "\n".join(line for (i, _), line in zip(kept, out_lines) if i not in frontmatter)
+
+        prepared = _Prepared(
+            _segments(text),
+            _segments(description) if description is not None else None,
+            _segments(body),
+        )
+        self._prepared[script_type] = prepared
+        return prepared
+
+    def render(self, ai_assistant: str, script_type: str, arg_format: str, file_extension: str) -> str:
+        """Render the final file content for one agent."""
+        prepared = self._prepare(script_type)
+        if prepared is None:
+            # If no script command found, copy as-is
+            return self.content
+        values = {"{ARGS}": arg_format, "__AGENT__": ai_assistant}
+        if file_extension != "toml":
+            return _join(prepared.full, values)
+        description = ""
+        if prepared.description is not None:
+            description = _join(prepared.description, values).split(":", 1)[1].strip().strip("\"'")
+        body = _join(prepared.body, values).strip()
+        return f'description = "{description}"\n\nprompt = """\n{body}\n"""'
+
+
+_compiled: dict[Path, tuple[int, int, CommandTemplate]] = {}
+
+
+def load_command_templates(commands_dir: Path) -> list[CommandTemplate]:
+    """Compile every *.md template in commands_dir, reusing unchanged compilations."""
+    templates = []
+    for path in commands_dir.glob("*.md"):
+        st = path.stat()
+        cached = _compiled.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            templates.append(cached[2])
+            continue
+        template = CommandTemplate.from_file(path)
+        _compiled[path] = (st.st_mtime_ns, st.st_size, template)
+        templates.append(template)
+    return templates
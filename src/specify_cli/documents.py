@@ -0,0 +1,366 @@
+"""
+Parsed spec.md / plan.md / tasks.md documents, cached on disk.
+
+Feature documents grow to tens of kilobytes (a generated tasks.md easily
+passes 60 KB), and every consumer used to grep the raw text for the one thing
+it needed. `parse_document()` turns a Markdown file into a light AST in one
+pass:
+
+    sections  the heading tree (title, level, line span, parent)
+    fields    `**Name**: value` lines, including `- **Name**: value` list items
+    tasks     `- [ ] T001 [P] [US1] description` checklist items
+
+Each of the three is indexed (by slug and title, by field name, by task ID).
+Headings, fields and tasks inside fenced code blocks are ignored.
+
+`load_document()` serves documents from an in-process memo and an on-disk
+cache. An entry is reused while the file's mtime and size are unchanged. When
+they change but the content hash is the same (a touch, a checkout that
+rewrote an identical file), the entry is reused and re-stamped. Otherwise the
+file is parsed again.
+
+Environment:
+    SPECIFY_CACHE_DIR   Cache root (documents/ below it)
+    SPECIFY_NO_CACHE    Set to 1 to skip the on-disk cache
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from .statmemo import StatMemo
+
+CACHE_FORMAT = 1
+# Documents a feature directory holds, by the short name `specify query` accepts
+FEATURE_DOCUMENTS = {
+    "spec": "spec.md",
+    "plan": "plan.md",
+    "tasks": "tasks.md",
+    "research": "research.md",
+    "data-model": "data-model.md",
+    "quickstart": "quickstart.md",
+}
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$")
+_FENCE_RE = re.compile(r"^\s*(`{3,}|~{3,})")
+_FIELD_RE = re.compile(r"^\s*(?P<bullet>[-*+]\s+)?\*\*(?P<name>[^*]+?)(?::\*\*|\*\*:)[ \t]*(?P<value>.*?)\s*$")
+_TASK_RE = re.compile(r"^(?P<indent>\s*)[-*+]\s+\[(?P<mark>[ xX])\]\s+(?P<id>T\d+)\b[ \t]*(?P<rest>.*?)\s*$")
+_LABELS_RE = re.compile(r"^((?:\[[^\]]+\]\s*)*)(.*)$")
+_SLUG_DROP_RE = re.compile(r"[^\w\- ]", re.UNICODE)
+
+
+class DocumentError(RuntimeError):
+    """A document, or the section, field or task asked for in it, does not exist."""
+
+
+def slugify(title: str) -> str:
+    """GitHub-style anchor for a heading."""
+    return _SLUG_DROP_RE.sub("", title.strip().lower()).replace(" ", "-")
+
+
+@dataclass
+class Section:
+    title: str
+    level: int
+    line: int                 # 1-based line of the heading
+    end: int                  # last line of the section (before the next heading of the same or a higher level)
+    parent: int | None = None  # index in Document.sections
+
+    @property
+    def slug(self) -> str:
+        return slugify(self.title)
+
+
+@dataclass
+class Field:
+    name: str
+    value: str
+    line: int
+    section: int | None = None
+    bullet: bool = False
+
+
+@dataclass
+class Task:
+    id: str
+    done: bool
+    text: str
+    line: int
+    end: int                  # last line of the item, including indented continuation lines
+    section: int | None = None
+    labels: list[str] = field(default_factory=list)
+
+    @property
+    def parallel(self) -> bool:
+        return "P" in self.labels
+
+
+@dataclass
+class Document:
+    path: str
+    sha256: str
+    lines: int
+    front_matter: str = ""
+    sections: list[Section] = field(default_factory=list)
+    fields: list[Field] = field(default_factory=list)
+    tasks: list[Task] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._fields: dict[str, list[Field]] = {}
+        for f in self.fields:
+            self._fields.setdefault(f.name.lower(), []).append(f)
+        self._tasks = {t.id: t for t in self.tasks}
+
+    # -- indexes ----------------------------------------------------------
+
+    def section(self, key: str) -> Section | None:
+        """Section by title or slug (case-insensitive), else the first whose title starts with key."""
+        wanted = key.strip().lower()
+        slug = slugify(key)
+        for s in self.sections:
+            if s.title.lower() == wanted or s.slug == slug:
+                return s
+        return next((s for s in self.sections if s.title.lower().startswith(wanted)), None)
+
+    def section_path(self, index: int | None) -> list[str]:
+        """Titles from the top-level heading down to sections[index]."""
+        titles = []
+        while index is not None:
+            titles.append(self.sections[index].title)
+            index = self.sections[index].parent
+        return titles[::-1]
+
+    def field_values(self, name: str) -> list[Field]:
+        return self._fields.get(name.lower(), [])
+
+    def field_value(self, name: str, default: str | None = None) -> str | None:
+        """Value of the first `**name**:` line (list items included)."""
+        found = self.field_values(name)
+        return found[0].value if found else default
+
+    def task(self, task_id: str) -> Task | None:
+        return self._tasks.get(task_id.upper())
+
+    def text(self, start: int = 1, end: int | None = None) -> str:
+        """Lines start..end (1-based, inclusive) of the file as it is now."""
+        with open(self.path, encoding="utf-8", errors="replace", newline="") as f:
+            lines = f.read().splitlines(keepends=True)
+        return "".join(lines[start - 1:end])
+
+    def section_text(self, section: Section) -> str:
+        return self.text(section.line, section.end)
+
+    # -- serialisation ----------------------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "sha256": self.sha256,
+            "lines": self.lines,
+            "front_matter": self.front_matter,
+            "sections": [asdict(s) for s in self.sections],
+            "fields": [asdict(f) for f in self.fields],
+            "tasks": [asdict(t) for t in self.tasks],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Document":
+        return cls(
+            data["path"], data["sha256"], data["lines"], data.get("front_matter", ""),
+            [Section(**s) for s in data["sections"]],
+            [Field(**f) for f in data["fields"]],
+            [Task(**t) for t in data["tasks"]],
+        )
+
+    def outline(self) -> dict:
+        """Headings, field names and task counts: what a tool needs to decide what to query."""
+        done = sum(t.done for t in self.tasks)
+        return {
+            "path": self.path,
+            "lines": self.lines,
+            "sections": [{"title": s.title, "slug": s.slug, "level": s.level, "line": s.line, "end": s.end} for s in self.sections],
+            "fields": sorted({f.name for f in self.fields}),
+            "tasks": {"total": len(self.tasks), "done": done, "open": len(self.tasks) - done},
+        }
+
+
+def parse_document(text: str, path: str = "", sha256: str = "") -> Document:
+    """One pass over text building the section tree and the field and task lists."""
+    lines = text.splitlines()
+    doc = Document(path, sha256 or hashlib.sha256(text.encode("utf-8", errors="surrogateescape")).hexdigest(), len(lines))
+
+    start = 0
+    if lines and lines[0].strip() == "---":
+        for i in range(1, len(lines)):
+            if lines[i].strip() == "---":
+                doc.front_matter = "\n".join(lines[1:i])
+                start = i + 1
+                break
+
+    stack: list[int] = []     # open sections, outermost first
+    fence: str | None = None
+    task: Task | None = None
+    for i in range(start, len(lines)):
+        line = lines[i]
+        number = i + 1
+        fence_match = _FENCE_RE.match(line)
+        if fence is not None:
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+                fence = None
+            if task is not None:
+                task.end = number
+            continue
+        if fence_match:
+            fence = fence_match.group(1)
+            # An indented block belongs to the task item above it
+            if task is not None and line[:1].isspace():
+                task.end = number
+            else:
+                task = None
+            continue
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            while stack and doc.sections[stack[-1]].level >= level:
+                doc.sections[stack.pop()].end = number - 1
+            doc.sections.append(Section(heading.group(2), level, number, len(lines), stack[-1] if stack else None))
+            stack.append(len(doc.sections) - 1)
+            task = None
+            continue
+        current = stack[-1] if stack else None
+
+        match = _TASK_RE.match(line)
+        if match:
+            labels, rest = _LABELS_RE.match(match.group("rest")).groups()
+            task = Task(match.group("id"), match.group("mark") != " ", rest.strip(), number, number, current,
+                        re.findall(r"\[([^\]]+)\]", labels))
+            doc.tasks.append(task)
+            continue
+        if task is not None:
+            # Indented lines (and blank lines between them) continue the task item
+            if line.strip() and not line[:1].isspace():
+                task = None
+            elif line.strip():
+                task.end = number
+
+        match = _FIELD_RE.match(line)
+        if match:
+            doc.fields.append(Field(match.group("name").strip(), match.group("value"), number, current,
+                                    bool(match.group("bullet"))))
+    doc.__post_init__()
+    return doc
+
+
+def _stamp(path: Path) -> list[int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class DocumentCache:
+    """Parsed documents persisted as JSON, one file per document path."""
+
+    def __init__(self, root: Path | None = None):
+        if root is None:
+            from .template_cache import cache_root
+            root = cache_root()
+        self.root = root / "documents"
+
+    def _entry(self, path: Path) -> Path:
+        return self.root / (hashlib.sha256(str(path).encode()).hexdigest()[:24] + ".json")
+
+    def load(self, path: Path) -> dict | None:
+        try:
+            data = json.loads(self._entry(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT or data.get("path") != str(path):
+            return None
+        return data
+
+    def save(self, path: Path, stamp: list[int], doc: Document) -> None:
+        entry = self._entry(path)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"format": CACHE_FORMAT, "path": str(path), "stamp": stamp, "doc": doc.to_dict()}),
+                       encoding="utf-8")
+        os.replace(tmp, entry)
+
+
+def _load_uncached(path: Path, use_cache: bool) -> Document:
+    stamp = _stamp(path)
+    if stamp is None:
+        raise FileNotFoundError(path)
+    cache = DocumentCache() if use_cache else None
+    entry = cache.load(path) if cache is not None else None
+    if entry is not None and entry.get("stamp") == stamp:
+        return Document.from_dict(entry["doc"])
+
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if entry is not None and entry["doc"].get("sha256") == digest:
+        doc = Document.from_dict(entry["doc"])
+    else:
+        doc = parse_document(data.decode("utf-8", errors="surrogateescape"), str(path), digest)
+    if cache is not None:
+        try:
+            cache.save(path, stamp, doc)
+        except OSError:
+            pass
+    return doc
+
+
+_memo = StatMemo()
+
+
+def load_document(path: Path, use_cache: bool | None = None) -> Document:
+    """The parsed document at path, from memory or the on-disk cache when it is unchanged.
+
+    Raises FileNotFoundError when path does not exist.
+    """
+    from .template_cache import cache_enabled
+
+    path = Path(path).resolve()
+    use_cache = cache_enabled() if use_cache is None else use_cache
+    return _memo.get((str(path), use_cache), lambda: (_load_uncached(path, use_cache), [path]))
+
+
+def document_path(name: str, feature_dir: Path) -> Path:
+    """A FEATURE_DOCUMENTS short name inside feature_dir; anything else is taken as a path."""
+    if name in FEATURE_DOCUMENTS:
+        return feature_dir / FEATURE_DOCUMENTS[name]
+    return Path(name)
+
+
+def query(doc: Document, *, section: str | None = None, field_name: str | None = None,
+          task: str | None = None) -> dict:
+    """The JSON answer for one selector (the outline when none is given)."""
+    if sum(key is not None for key in (section, field_name, task)) > 1:
+        raise DocumentError("Give only one of section, field and task")
+    if section is not None:
+        found = doc.section(section)
+        if found is None:
+            raise DocumentError(f"No section '{section}' in {doc.path}")
+        index = doc.sections.index(found)
+        return {"title": found.title, "slug": found.slug, "level": found.level, "line": found.line,
+                "end": found.end, "path": doc.section_path(index), "text": doc.section_text(found)}
+    if field_name is not None:
+        found = doc.field_values(field_name)
+        if not found:
+            raise DocumentError(f"No field '{field_name}' in {doc.path}")
+        return {"name": found[0].name, "value": found[0].value,
+                "values": [{"value": f.value, "line": f.line, "section": doc.section_path(f.section)} for f in found]}
+    if task is not None:
+        found = doc.task(task)
+        if found is None:
+            raise DocumentError(f"No task '{task}' in {doc.path}")
+        return {**asdict(found), "parallel": found.parallel, "section": doc.section_path(found.section),
+                "text": found.text, "source": doc.text(found.line, found.end)}
+    return doc.outline()
@@ -0,0 +1,223 @@
+"""
+Resumable, optionally parallel, HTTP downloads for template archives.
+
+Bytes are written to `<dest>.part` and only renamed to `dest` once the size
+(and digest, when the release declares one) check out. A sidecar
+`<dest>.part.json` records which byte ranges are complete, so an interrupted
+transfer resumes with HTTP `Range` requests instead of starting over. Large
+assets on servers that accept ranges are split into several ranges fetched
+concurrently over the same pooled `httpx.Client`.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    import httpx
+
+MIN_CHUNK = 64 * 1024
+MAX_CHUNK = 1024 * 1024
+PARALLEL_MIN_SIZE = 8 * 1024 * 1024
+MAX_PARTS = 4
+
+
+class DownloadError(RuntimeError):
+    """Download failed; resumable state (if any) is kept next to the destination."""
+
+
+class _HTTPStatusError(DownloadError):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _RangeUnsupported(DownloadError):
+    pass
+
+
+def chunk_size_for(total: int | None) -> int:
+    """Pick a read size that scales with the asset (64 KiB .. 1 MiB)."""
+    if not total:
+        return MIN_CHUNK
+    return max(MIN_CHUNK, min(MAX_CHUNK, total // 64))
+
+
+def _split(total: int, parts: int) -> list[list[int]]:
+    """Split [0, total) into `parts` [start, end, done] ranges (end exclusive)."""
+    step = -(-total // parts)
+    return [[start, min(start + step, total), 0] for start in range(0, total, step)]
+
+
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+def _content_range(value: str | None) -> tuple[int, int, int | None] | None:
+    """(first, last, total) of a `Content-Range: bytes first-last/total` header, None if malformed."""
+    match = _CONTENT_RANGE_RE.match((value or "").strip())
+    if not match:
+        return None
+    first, last, total = match.groups()
+    return int(first), int(last), None if total == "*" else int(total)
+
+
+def _digest_hasher(expected_digest: str) -> tuple:
+    """(algorithm, hasher, expected hex) for a '<algo>:<hex>' (or bare sha256 hex) digest."""
+    algo, _, want = expected_digest.partition(":")
+    if not want:
+        algo, want = "sha256", algo
+    try:
+        return algo, hashlib.new(algo), want
+    except ValueError:
+        raise DownloadError(f"Unsupported digest algorithm '{algo}' in {expected_digest}") from None
+
+
+def verify_file(path: Path, expected_size: int | None = None, expected_digest: str | None = None) -> None:
+    """Raise DownloadError when path does not match the declared size or 'sha256:<hex>' digest."""
+    size = path.stat().st_size
+    if expected_size and size != expected_size:
+        raise DownloadError(f"Size mismatch for {path.name}: expected {expected_size:,} bytes, got {size:,}")
+    if expected_digest:
+        algo, h, want = _digest_hasher(expected_digest)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(MAX_CHUNK), b""):
+                h.update(block)
+        if h.hexdigest().lower() != want.lower():
+            raise DownloadError(f"Digest mismatch for {path.name}: expected {expected_digest}, got {algo}:{h.hexdigest()}")
+
+
+class _State:
+    """Completed byte ranges of a partial download, persisted as JSON."""
+
+    def __init__(self, path: Path, url: str, total: int | None, ranges: list[list[int]]):
+        self.path = path
+        self.url = url
+        self.total = total
+        self.ranges = ranges
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path, url: str, total: int | None) -> "_State | None":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("url") != url or data.get("total") != total:
+            return None
+        return cls(path, url, total, data["ranges"])
+
+    def save(self) -> None:
+        with self.lock:
+            self.path.write_text(json.dumps({"url": self.url, "total": self.total, "ranges": self.ranges}), encoding="utf-8")
+
+    @property
+    def downloaded(self) -> int:
+        return sum(r[2] for r in self.ranges)
+
+
+def download_file(client: "httpx.Client", url: str, dest: Path, *, expected_size: int | None = None, expected_digest: str | None = None, headers: dict | None = None, progress: Callable[[int, int | None], None] | None = None, max_parts: int = MAX_PARTS, retries: int = 3, timeout: float = 60) -> Path:
+    """Download url to dest, resuming a previous partial transfer when possible.
+
+    progress(downloaded, total) is called as bytes arrive. Failed attempts are
+    retried (resuming) up to `retries` times; the partial state is kept on final
+    failure so the next call picks up where this one stopped.
+    """
+    if expected_digest:
+        # An unknown algorithm fails now rather than after the whole transfer
+        _digest_hasher(expected_digest)
+    part = dest.with_name(dest.name + ".part")
+    state_path = dest.with_name(dest.name + ".part.json")
+    headers = dict(headers or {})
+
+    state = _State.load(state_path, url, expected_size) if part.exists() else None
+    if state is None:
+        total = expected_size
+        parts = max_parts if total and total >= PARALLEL_MIN_SIZE else 1
+        ranges = _split(total, parts) if total else [[0, 0, 0]]
+        state = _State(state_path, url, total, ranges)
+        part.write_bytes(b"")
+        if total:
+            os.truncate(part, total)
+
+    def fetch_range(rng: list[int]) -> None:
+        start, end, done = rng
+        if end and done >= end - start:
+            return
+        request_headers = dict(headers)
+        if done or len(state.ranges) > 1:
+            request_headers["Range"] = f"bytes={start + done}-{end - 1}" if end else f"bytes={start + done}-"
+        with client.stream("GET", url, timeout=timeout, follow_redirects=True, headers=request_headers) as response:
+            if response.status_code == 200 and "Range" in request_headers:
+                if len(state.ranges) > 1:
+                    raise _RangeUnsupported("Server ignored the Range request")
+                # Server does not support resume: start this (only) range over
+                rng[2] = done = 0
+            elif response.status_code not in (200, 206):
+                body_sample = response.read()[:400].decode("utf-8", "replace")
+                raise _HTTPStatusError(response.status_code, f"Download failed with {response.status_code}\nHeaders: {response.headers}\nBody (truncated): {body_sample}")
+            elif response.status_code == 206:
+                # Only append bytes that are exactly the ones asked for
+                served = _content_range(response.headers.get("content-range"))
+                if (served is None or served[0] != start + done or (end and served[1] > end - 1)
+                        or (state.total and served[2] not in (None, state.total))):
+                    raise _RangeUnsupported(
+                        f"Server answered bytes={start + done}-{end - 1 if end else ''} with "
+                        f"Content-Range {response.headers.get('content-range')!r}")
+            if state.total is None and response.status_code == 200:
+                content_length = int(response.headers.get("content-length", 0)) or None
+                state.total = content_length
+            with open(part, "r+b") as f:
+                f.seek(start + done)
+                if rng[2] == 0 and not end:
+                    f.truncate()
+                for chunk in response.iter_bytes(chunk_size=chunk_size_for(state.total)):
+                    f.write(chunk)
+                    with state.lock:
+                        rng[2] += len(chunk)
+                    if progress:
+                        progress(state.downloaded, state.total)
+
+    last_error: Exception | None = None
+    try:
+        for _ in range(retries + 1):
+            try:
+                pending = [r for r in state.ranges if not (r[1] and r[2] >= r[1] - r[0])]
+                if len(pending) > 1:
+                    with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                        list(pool.map(fetch_range, pending))
+                elif pending:
+                    fetch_range(pending[0])
+                last_error = None
+                break
+            except _RangeUnsupported as e:
+                # Fall back to a single sequential stream
+                last_error = e
+                state.ranges = [[0, state.total or 0, 0]]
+            except _HTTPStatusError as e:
+                last_error = e
+                if e.status_code < 500 and e.status_code != 429:
+                    break
+            except Exception as e:
+                last_error = e
+    finally:
+        # Persist progress even on Ctrl-C so the next call resumes
+        state.save()
+
+    if last_error is not None:
+        raise DownloadError(str(last_error)) from last_error
+
+    try:
+        verify_file(part, expected_size, expected_digest)
+    except DownloadError:
+        # Corrupt transfer: discard so the next attempt starts clean
+        part.unlink(missing_ok=True)
+        state_path.unlink(missing_ok=True)
+        raise
+    os.replace(part, dest)
+    state_path.unlink(missing_ok=True)
+    return dest
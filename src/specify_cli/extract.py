@@ -0,0 +1,80 @@
+"""
+Streaming extraction of template archives.
+
+Members are read from the zip and written directly to their final location in
+the project; nothing is staged in a temporary directory and copied again, so
+every byte is written once and peak disk usage is the final footprint. A
+single top-level folder (as in GitHub-style archives) is stripped from member
+names on the fly. Text members can be passed through a transform while they
+are streamed, which is how placeholder substitution and path rewriting are
+applied to archives that still carry raw templates.
+"""
+
+import shutil
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Callable
+
+CHUNK_SIZE = 256 * 1024
+
+# Chooses a text transform for a member (by its flattened relative path), or None to copy bytes
+TransformChooser = Callable[[PurePosixPath], Callable[[str], str] | None]
+
+
+def archive_prefix(names: list[str]) -> str:
+    """Return the single top-level folder shared by every member ('' if there is none)."""
+    tops = {name.split("/", 1)[0] for name in names if name}
+    if len(tops) != 1:
+        return ""
+    top = next(iter(tops))
+    # A lone top-level *file* is not a folder to flatten
+    if not any(name.startswith(top + "/") for name in names):
+        return ""
+    return top + "/"
+
+
+def _safe_relpath(name: str) -> PurePosixPath | None:
+    """Member name as a relative path, or None when it would escape the destination."""
+    rel = PurePosixPath(name)
+    if rel.is_absolute() or ".." in rel.parts or not rel.parts:
+        return None
+    return rel
+
+
+def stream_extract(zf: zipfile.ZipFile, dest_root: Path, *, transform: TransformChooser | None = None, flatten: bool = True) -> dict:
+    """Write every file member of zf below dest_root.
+
+    Returns {"files", "bytes", "transformed"}. Members whose names would escape
+    dest_root are skipped.
+    """
+    infos = zf.infolist()
+    prefix = archive_prefix([i.filename for i in infos]) if flatten else ""
+    made_dirs: set[Path] = set()
+    files = written = transformed = 0
+
+    for info in infos:
+        if info.is_dir():
+            continue
+        name = info.filename[len(prefix):] if prefix and info.filename.startswith(prefix) else info.filename
+        rel = _safe_relpath(name)
+        if rel is None:
+            continue
+        dest = dest_root.joinpath(*rel.parts)
+        if dest.parent not in made_dirs:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            made_dirs.add(dest.parent)
+
+        text_transform = transform(rel) if transform else None
+        if text_transform is not None:
+            content = text_transform(zf.read(info).decode("utf-8"))
+            data = content.encode("utf-8")
+            dest.write_bytes(data)
+            written += len(data)
+            transformed += 1
+        else:
+            with zf.open(info) as src, open(dest, "wb") as out:
+                shutil.copyfileobj(src, out, CHUNK_SIZE)
+            written += info.file_size
+        files += 1
+
+    return {"files": files, "bytes": written, "transformed": transformed}
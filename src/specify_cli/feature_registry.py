@@ -0,0 +1,193 @@
+"""
+Feature registry: an index of the `specs/NNN-name` features and an atomic
+feature-number allocator.
+
+Without it the next number is found by scanning `specs/` on every call, and
+two agents creating features at the same time can both pick the same number.
+The registry keeps the features and the next free number in a small JSON
+index. Allocation happens under an exclusive file lock and claims the spec
+directory before the lock is released, so concurrent creators always get
+distinct numbers.
+
+The index lives in the repository's common git directory
+(`.git/specify/features.json`), so every worktree and branch of a checkout
+draws from the same sequence. Numbers handed out on another branch are never
+reused, even though their directories are not in this checkout. Outside git
+the index is `.specify/features.json`.
+
+The index remembers the mtime of `specs/` and rescans the directory (one
+`scandir`) only when that changes, which picks up features created by hand
+or by a merge. `create-new-feature.sh` allocates the same way through
+python3 (under the same lock); without python3 it only claims a spec
+directory, which the next rescan picks up. Allocated numbers are never
+released.
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from .locks import file_lock
+
+INDEX_NAME = "features.json"
+LOCK_NAME = "features.lock"
+INDEX_VERSION = 1
+LOCK_TIMEOUT = 30.0
+
+_NUMBERED_RE = re.compile(r"^(\d+)")
+
+
+@dataclass(frozen=True)
+class Feature:
+    number: int
+    name: str
+    spec_dir: Path
+
+    @property
+    def num(self) -> str:
+        return f"{self.number:03d}"
+
+    def to_dict(self) -> dict:
+        return {"number": self.number, "num": self.num, "name": self.name,
+                "spec_dir": str(self.spec_dir), "exists": self.spec_dir.is_dir()}
+
+
+def _state_dir(repo_root: Path, git_dir: Path | None) -> Path:
+    if git_dir is None:
+        return repo_root / ".specify"
+    from .gitrepo import _common_dir
+
+    return _common_dir(git_dir) / "specify"
+
+
+class FeatureRegistry:
+    """The features of one repository and its next free feature number."""
+
+    def __init__(self, repo_root: Path, git_dir: Path | None = None):
+        self.repo_root = repo_root
+        self.specs_dir = repo_root / "specs"
+        state = _state_dir(repo_root, git_dir)
+        self.index_path = state / INDEX_NAME
+        self.lock_path = state / LOCK_NAME
+
+    @classmethod
+    def for_project(cls, start: Path | None = None) -> "FeatureRegistry":
+        from .features import resolve
+
+        paths = resolve(start, feature="")
+        return cls(paths.repo_root, paths.git_dir)
+
+    # -- index ------------------------------------------------------------
+
+    def _specs_mtime(self) -> int | None:
+        try:
+            return os.stat(self.specs_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> dict:
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            index = None
+        if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+            index = {"version": INDEX_VERSION}
+        if not isinstance(index.get("next"), int) or index["next"] < 1:
+            index["next"] = 1
+        if not isinstance(index.get("features"), dict):
+            index["features"] = {}
+        return index
+
+    def _is_fresh(self, index: dict) -> bool:
+        return "specs_mtime_ns" in index and index["specs_mtime_ns"] == self._specs_mtime()
+
+    def _rescan(self, index: dict) -> None:
+        """Merge the numbered directories in specs/ into the index."""
+        features = index["features"]
+        try:
+            names = [entry.name for entry in os.scandir(self.specs_dir) if entry.is_dir()]
+        except OSError:
+            names = []
+        for name in names:
+            match = _NUMBERED_RE.match(name)
+            if match:
+                features[name] = int(match.group(1))
+        highest = max(features.values(), default=0)
+        index["next"] = max(index["next"], highest + 1)
+        index["specs_mtime_ns"] = self._specs_mtime()
+
+    def _save(self, index: dict) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        index["features"] = dict(sorted(index["features"].items(), key=lambda item: (item[1], item[0])))
+        tmp = self.index_path.with_name(f".{INDEX_NAME}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def _current(self) -> dict:
+        """The index, rescanned (and rewritten under the lock) when specs/ changed."""
+        index = self._load()
+        if self._is_fresh(index):
+            return index
+        with file_lock(self.lock_path, timeout=LOCK_TIMEOUT):
+            index = self._load()
+            if not self._is_fresh(index):
+                self._rescan(index)
+                self._save(index)
+        return index
+
+    # -- queries ----------------------------------------------------------
+
+    def _feature(self, name: str, number: int) -> Feature:
+        return Feature(number, name, self.specs_dir / name)
+
+    def features(self) -> list[Feature]:
+        """Every registered feature, by number."""
+        items = sorted(self._current()["features"].items(), key=lambda item: (item[1], item[0]))
+        return [self._feature(name, number) for name, number in items]
+
+    def next_number(self) -> int:
+        """The number the next allocate() call would hand out (not reserved)."""
+        return self._current()["next"]
+
+    def lookup(self, key: str | int) -> Feature | None:
+        """Feature by number (7, "007"), full directory name or the name after the number."""
+        features = self._current()["features"]
+        if isinstance(key, str) and key in features:
+            return self._feature(key, features[key])
+        if isinstance(key, int) or key.isdigit():
+            number = int(key)
+            matches = sorted(name for name, n in features.items() if n == number)
+        else:
+            matches = sorted(name for name, n in features.items() if name.split("-", 1)[-1] == key)
+        return self._feature(matches[0], features[matches[0]]) if matches else None
+
+    # -- allocation -------------------------------------------------------
+
+    def allocate(self, make_name) -> Feature:
+        """Reserve the next number and create its spec directory.
+
+        make_name(number) returns the directory name; the directory is created
+        before the lock is released, so the number is claimed on disk and in
+        the index at the same time.
+        """
+        with file_lock(self.lock_path, timeout=LOCK_TIMEOUT):
+            index = self._load()
+            if not self._is_fresh(index):
+                self._rescan(index)
+            number = index["next"]
+            self.specs_dir.mkdir(parents=True, exist_ok=True)
+            while True:
+                name = make_name(number)
+                try:
+                    (self.specs_dir / name).mkdir()
+                    break
+                except FileExistsError:
+                    number += 1
+            index["features"][name] = number
+            index["next"] = number + 1
+            index["specs_mtime_ns"] = self._specs_mtime()
+            self._save(index)
+        return self._feature(name, number)
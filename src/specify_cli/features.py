@@ -0,0 +1,241 @@
+"""
+Feature path resolution and feature creation.
+
+The Python counterpart of `.specify/scripts/bash/common.sh`,
+`check-prerequisites.sh` and `create-new-feature.sh`, with the same rules and
+the same output keys. The repository and current branch are found by reading
+`.git` and `HEAD` directly (no `git rev-parse` processes). `resolve_cached()`
+keeps results in memory until `HEAD`, the refs or `specs/` change, which is
+what lets `specify serve` answer these queries without touching the disk
+beyond a few stat calls.
+
+`specify paths` and `specify prereqs` print the same bytes as the scripts;
+the `format_*` helpers below produce those outputs.
+
+Environment:
+    SPECIFY_FEATURE  Feature directory to use instead of the current branch
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+from .gitrepo import current_branch, find_repo
+from .statmemo import StatMemo
+
+_FEATURE_DIR_RE = re.compile(r"^(\d{3})-")
+
+_memo = StatMemo()
+
+
+class FeatureError(RuntimeError):
+    """A prerequisite of the requested feature operation is not met."""
+
+
+@dataclass(frozen=True)
+class FeaturePaths:
+    repo_root: Path
+    branch: str
+    has_git: bool
+    git_dir: Path | None = None
+
+    @property
+    def feature_dir(self) -> Path:
+        return self.repo_root / "specs" / self.branch
+
+    def to_dict(self) -> dict:
+        """The variables common.sh `get_feature_paths` exports, as strings."""
+        d = self.feature_dir
+        return {
+            "REPO_ROOT": str(self.repo_root),
+            "CURRENT_BRANCH": self.branch,
+            "HAS_GIT": "true" if self.has_git else "false",
+            "FEATURE_DIR": str(d),
+            "FEATURE_SPEC": str(d / "spec.md"),
+            "IMPL_PLAN": str(d / "plan.md"),
+            "TASKS": str(d / "tasks.md"),
+            "RESEARCH": str(d / "research.md"),
+            "DATA_MODEL": str(d / "data-model.md"),
+            "QUICKSTART": str(d / "quickstart.md"),
+            "CONTRACTS_DIR": str(d / "contracts"),
+        }
+
+
+def _project_root(start: Path) -> Path:
+    """Nearest directory at or above start holding .specify (start itself if none)."""
+    for directory in (start, *start.parents):
+        if (directory / ".specify").is_dir():
+            return directory
+    return start
+
+
+def latest_feature(specs_dir: Path) -> str | None:
+    """Highest-numbered NNN-name directory in specs_dir."""
+    best, highest = None, 0
+    try:
+        names = sorted(entry.name for entry in os.scandir(specs_dir) if entry.is_dir())
+    except OSError:
+        return None
+    for name in names:
+        match = _FEATURE_DIR_RE.match(name)
+        if match and int(match.group(1)) > highest:
+            best, highest = name, int(match.group(1))
+    return best
+
+
+def resolve(start: Path | None = None, feature: str | None = None) -> FeaturePaths:
+    """Repository root and current feature for start (default: cwd).
+
+    feature (default: $SPECIFY_FEATURE) overrides the branch. Without git the
+    latest numbered spec directory is used, then 'main'.
+    """
+    start = (start or Path.cwd()).resolve()
+    feature = os.getenv("SPECIFY_FEATURE") if feature is None else feature
+    repo = find_repo(start)
+    if repo is not None:
+        root, git_dir = repo
+    else:
+        root, git_dir = _project_root(start), None
+
+    if feature:
+        branch = feature
+    else:
+        branch = current_branch(git_dir) if git_dir is not None else None
+        if branch is None:
+            branch = latest_feature(root / "specs") or "main"
+    return FeaturePaths(root, branch, git_dir is not None, git_dir)
+
+
+def resolve_cached(start: Path | None = None, feature: str | None = None) -> FeaturePaths:
+    """resolve(), memoised until the files the answer was read from change."""
+    start = (start or Path.cwd()).resolve()
+    feature = os.getenv("SPECIFY_FEATURE") if feature is None else feature
+
+    def compute():
+        paths = resolve(start, feature)
+        deps = [start, paths.repo_root / "specs"]
+        if paths.git_dir is not None:
+            # HEAD moves on checkout; refs/heads changes when an unborn branch gets its first commit
+            deps += [paths.repo_root / ".git", paths.git_dir / "HEAD", paths.git_dir / "packed-refs",
+                     paths.git_dir / "refs" / "heads"]
+        return paths, deps
+
+    key = (str(start), feature, os.getenv("GIT_DIR"), os.getenv("GIT_WORK_TREE"), os.getenv("GIT_CEILING_DIRECTORIES"))
+    return _memo.get(key, compute)
+
+
+def check_feature_branch(paths: FeaturePaths) -> None:
+    if paths.has_git and not _FEATURE_DIR_RE.match(paths.branch):
+        raise FeatureError(
+            f"Not on a feature branch. Current branch: {paths.branch}\n"
+            "Feature branches should be named like: 001-feature-name"
+        )
+
+
+def prerequisites(paths: FeaturePaths, *, require_tasks: bool = False, include_tasks: bool = False) -> dict:
+    """check-prerequisites.sh --json: the feature dir and the optional docs present."""
+    check_feature_branch(paths)
+    d = paths.feature_dir
+    if not d.is_dir():
+        raise FeatureError(f"Feature directory not found: {d}\nRun /specify first to create the feature structure.")
+    if not (d / "plan.md").is_file():
+        raise FeatureError(f"plan.md not found in {d}\nRun /plan first to create the implementation plan.")
+    if require_tasks and not (d / "tasks.md").is_file():
+        raise FeatureError(f"tasks.md not found in {d}\nRun /tasks first to create the task list.")
+
+    docs = [name for name in ("research.md", "data-model.md") if (d / name).is_file()]
+    contracts = d / "contracts"
+    if contracts.is_dir() and any(contracts.iterdir()):
+        docs.append("contracts/")
+    if (d / "quickstart.md").is_file():
+        docs.append("quickstart.md")
+    if include_tasks and (d / "tasks.md").is_file():
+        docs.append("tasks.md")
+    return {"FEATURE_DIR": str(d), "AVAILABLE_DOCS": docs}
+
+
+def _json(data) -> str:
+    # Same bytes as the scripts' printf '{"KEY":"%s",...}' for ordinary paths
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def format_shell(paths: FeaturePaths) -> str:
+    """common.sh `get_feature_paths` output: KEY='value' lines for eval."""
+    return "".join(f"{key}='{value}'\n" for key, value in paths.to_dict().items())
+
+
+def format_paths_only(paths: FeaturePaths, as_json: bool = False) -> str:
+    """check-prerequisites.sh --paths-only [--json] output."""
+    d = paths.to_dict()
+    values = {
+        "REPO_ROOT": d["REPO_ROOT"],
+        "BRANCH": d["CURRENT_BRANCH"],
+        "FEATURE_DIR": d["FEATURE_DIR"],
+        "FEATURE_SPEC": d["FEATURE_SPEC"],
+        "IMPL_PLAN": d["IMPL_PLAN"],
+        "TASKS": d["TASKS"],
+    }
+    if as_json:
+        return _json(values) + "\n"
+    return "".join(f"{key}: {value}\n" for key, value in values.items())
+
+
+def format_prerequisites(paths: FeaturePaths, result: dict, as_json: bool = False, include_tasks: bool = False) -> str:
+    """check-prerequisites.sh [--json] output for a prerequisites() result."""
+    if as_json:
+        return _json(result) + "\n"
+    d = paths.feature_dir
+    contracts = d / "contracts"
+    checks = [
+        ("research.md", (d / "research.md").is_file()),
+        ("data-model.md", (d / "data-model.md").is_file()),
+        ("contracts/", contracts.is_dir() and any(contracts.iterdir())),
+        ("quickstart.md", (d / "quickstart.md").is_file()),
+    ]
+    if include_tasks:
+        checks.append(("tasks.md", (d / "tasks.md").is_file()))
+    lines = [f"FEATURE_DIR:{d}", "AVAILABLE_DOCS:"]
+    lines += [f"  {'✓' if present else '✗'} {name}" for name, present in checks]
+    return "\n".join(lines) + "\n"
+
+
+def branch_name(description: str, number: int) -> str:
+    """NNN- plus the first three words of description, lowercased and dash-separated."""
+    slug = re.sub(r"-+", "-", re.sub(r"[^a-z0-9]", "-", description.lower())).strip("-")
+    words = [w for w in slug.split("-") if w][:3]
+    return f"{number:03d}-{'-'.join(words)}"
+
+
+def create_feature(description: str, start: Path | None = None) -> dict:
+    """create-new-feature.sh --json: new feature branch, spec directory and spec.md.
+
+    The number comes from the feature registry, so concurrent calls (from any
+    worktree of the repository) never get the same one.
+    """
+    from .feature_registry import FeatureRegistry
+
+    if not description.strip():
+        raise FeatureError("A feature description is required")
+    paths = resolve(start, feature="")
+    root = paths.repo_root
+    feature = FeatureRegistry(root, paths.git_dir).allocate(lambda number: branch_name(description, number))
+    name, feature_dir = feature.name, feature.spec_dir
+
+    if paths.has_git:
+        proc = subprocess.run(["git", "checkout", "-b", name], cwd=root, capture_output=True, text=True)
+        if proc.returncode != 0:
+            # The number stays used; only the empty directory is given back
+            feature_dir.rmdir()
+            raise FeatureError(proc.stderr.strip() or f"git checkout -b {name} failed")
+
+    spec_file = feature_dir / "spec.md"
+    template = root / ".specify" / "templates" / "spec-template.md"
+    if template.is_file():
+        shutil.copyfile(template, spec_file)
+    else:
+        spec_file.touch()
+    return {"BRANCH_NAME": name, "SPEC_FILE": str(spec_file), "FEATURE_NUM": feature.num}
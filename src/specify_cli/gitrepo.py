@@ -0,0 +1,149 @@
+"""
+Git repository detection and a fast initial commit for `specify init`.
+
+Repositories are detected by walking up from a directory looking for `.git`
+(a directory, or a `gitdir:` file for worktrees and submodules), so no `git`
+process is spawned just to ask whether one exists.
+
+The current branch is read straight from `HEAD` (and the refs it points at).
+
+The initial commit is built with plumbing commands run with `cwd=` (the
+process working directory is never changed) and stages only the files init
+wrote, instead of `git add .` walking and hashing the whole tree:
+
+    git init -> hash-object -w --stdin-paths -> update-index --index-info
+             -> write-tree -> commit-tree -> update-ref HEAD
+
+Environment:
+    GIT_DIR                   Honoured as the repository for the current tree
+    GIT_CEILING_DIRECTORIES   Directories the upward search does not cross
+"""
+
+import os
+import subprocess
+from pathlib import Path
+
+
+def _is_git_dir(path: Path) -> bool:
+    return (path / "HEAD").is_file() and (path / "objects").is_dir()
+
+
+def _resolve_dot_git(dot_git: Path) -> Path | None:
+    """The repository directory a `.git` entry points at (itself, or a gitdir: file's target)."""
+    if dot_git.is_dir():
+        return dot_git if _is_git_dir(dot_git) else None
+    try:
+        first = dot_git.read_text(encoding="utf-8", errors="replace").splitlines()[0]
+    except (OSError, IndexError):
+        return None
+    if not first.startswith("gitdir:"):
+        return None
+    target = Path(first[len("gitdir:"):].strip())
+    if not target.is_absolute():
+        target = dot_git.parent / target
+    # Linked worktrees keep HEAD locally but objects in the common dir
+    return target if (target / "HEAD").is_file() else None
+
+
+def find_repo(path: Path | None = None) -> tuple[Path, Path] | None:
+    """(work tree root, repository directory) for the tree containing path, or None (no subprocess)."""
+    path = (path or Path.cwd()).resolve()
+    env_dir = os.getenv("GIT_DIR")
+    if env_dir:
+        work_tree = os.getenv("GIT_WORK_TREE")
+        return (Path(work_tree).resolve() if work_tree else path), Path(env_dir).resolve()
+    ceilings = {
+        Path(p).resolve()
+        for p in os.getenv("GIT_CEILING_DIRECTORIES", "").split(os.pathsep)
+        if p and os.path.isabs(p)
+    }
+    for directory in (path, *path.parents):
+        found = _resolve_dot_git(directory / ".git")
+        if found is not None:
+            return directory, found
+        if directory.parent in ceilings:
+            break
+    return None
+
+
+def find_git_dir(path: Path | None = None) -> Path | None:
+    """Repository directory for the work tree containing path, or None (no subprocess)."""
+    repo = find_repo(path)
+    return repo[1] if repo else None
+
+
+def _common_dir(git_dir: Path) -> Path:
+    """Where refs live: the main repository for linked worktrees, else git_dir itself."""
+    try:
+        rel = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+    except OSError:
+        return git_dir
+    return (git_dir / rel).resolve()
+
+
+def _ref_exists(git_dir: Path, ref: str) -> bool:
+    common = _common_dir(git_dir)
+    if (common / ref).is_file():
+        return True
+    try:
+        with open(common / "packed-refs", encoding="utf-8", errors="replace") as f:
+            return any(line.rstrip("\n").endswith(" " + ref) for line in f if not line.startswith(("#", "^")))
+    except OSError:
+        return False
+
+
+def current_branch(git_dir: Path) -> str | None:
+    """Branch name as `git rev-parse --abbrev-ref HEAD` prints it, read from HEAD.
+
+    Returns 'HEAD' when detached and None when HEAD points at a branch with no
+    commits yet (where rev-parse fails).
+    """
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not head.startswith("ref:"):
+        return "HEAD"
+    ref = head[len("ref:"):].strip()
+    if not _ref_exists(git_dir, ref):
+        return None
+    return ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+
+
+def _git(project_path: Path, *args: str, stdin: str | None = None) -> str:
+    proc = subprocess.run(
+        ["git", *args],
+        cwd=project_path,
+        input=stdin,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return proc.stdout
+
+
+def _index_mode(path: Path) -> str:
+    if os.name != "nt" and path.stat().st_mode & 0o100:
+        return "100755"
+    return "100644"
+
+
+def bootstrap_repo(project_path: Path, files: list[str], message: str) -> str:
+    """Create a repository in project_path whose first commit holds exactly files.
+
+    files are project-relative POSIX paths; missing ones are skipped. Returns
+    the commit id. Raises subprocess.CalledProcessError when a
+    git step fails (for example when no committer identity is configured).
+    """
+    paths = [rel for rel in dict.fromkeys(files) if (project_path / rel).is_file()]
+    _git(project_path, "init", "-q")
+    if paths:
+        blobs = _git(project_path, "hash-object", "-w", "--stdin-paths", stdin="".join(f"{rel}\n" for rel in paths)).split()
+        index_info = "".join(
+            f"{_index_mode(project_path / rel)} {blob}\t{rel}\0" for rel, blob in zip(paths, blobs)
+        )
+        _git(project_path, "update-index", "--add", "-z", "--index-info", stdin=index_info)
+    tree = _git(project_path, "write-tree").strip()
+    commit = _git(project_path, "commit-tree", tree, "-m", message).strip()
+    _git(project_path, "update-ref", "HEAD", commit)
+    return commit
@@ -0,0 +1,159 @@
+"""
+Manifest-driven file materialisation for the init pipeline.
+
+Instead of copying `templates/`, `memory/` and `scripts/` one tree at a time and
+then walking the result again to fix script permissions, the pipeline builds a
+single manifest of `ManifestEntry(source, dest, transform, mode)` records and
+executes it on a bounded thread pool. Execute bits are applied in the same pass
+from the bytes already read for the copy, so no second walk or per-file sniff
+is needed.
+"""
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from .tracing import span
+
+# Below this many entries a thread pool costs more than it saves
+_PARALLEL_THRESHOLD = 8
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """One output file.
+
+    source:    file to read (or the file content was rendered from)
+    dest:      output path relative to the project root
+    transform: optional text transform applied to the source content
+    mode:      if set, permission bits applied when the content starts with '#!'
+    content:   pre-rendered text written instead of reading source
+    """
+    source: Path
+    dest: Path
+    transform: Callable[[str], str] | None = None
+    mode: int | None = None
+    content: str | None = None
+
+
+def executable_mode(mode: int) -> int:
+    """Add execute bits wherever the corresponding read bit is set (owner always).
+    Modes that already carry any execute bit are left unchanged.
+    """
+    if mode & 0o111:
+        return mode
+    new_mode = mode
+    if mode & 0o400: new_mode |= 0o100
+    if mode & 0o040: new_mode |= 0o010
+    if mode & 0o004: new_mode |= 0o001
+    return new_mode | 0o100
+
+
+def scan_files(root: Path) -> Iterator[os.DirEntry]:
+    """Yield a DirEntry for every regular file below root (single scandir walk)."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file():
+                    yield entry
+
+
+def file_entry(src: Path, dest: Path, *, script_suffix: str | None = None, st_mode: int | None = None) -> ManifestEntry:
+    """Manifest entry copying src to dest; files ending in script_suffix get execute bits."""
+    mode = None
+    if script_suffix and src.name.endswith(script_suffix) and os.name != "nt":
+        if st_mode is None:
+            st_mode = src.stat().st_mode
+        mode = executable_mode(st_mode & 0o7777)
+    return ManifestEntry(src, dest, mode=mode)
+
+
+def tree_entries(src_dir: Path, dest_dir: Path, *, script_suffix: str | None = None) -> list[ManifestEntry]:
+    """Manifest entries mirroring src_dir under dest_dir."""
+    entries = []
+    for f in scan_files(src_dir):
+        src = Path(f.path)
+        st_mode = f.stat().st_mode if script_suffix and f.name.endswith(script_suffix) else None
+        entries.append(file_entry(src, dest_dir / src.relative_to(src_dir), script_suffix=script_suffix, st_mode=st_mode))
+    return entries
+
+
+def entry_bytes(entry: ManifestEntry) -> bytes:
+    """The bytes an entry materialises to, without writing anything."""
+    if entry.content is not None:
+        return entry.content.encode("utf-8")
+    if entry.transform is not None:
+        return entry.transform(entry.source.read_text(encoding="utf-8")).encode("utf-8")
+    return entry.source.read_bytes()
+
+
+def _write_entry(entry: ManifestEntry, root: Path, written: dict | None = None) -> bool:
+    """Materialise one entry. Returns True when execute bits were applied.
+    written: when given, receives dest (POSIX) -> the bytes written
+    """
+    dest = root / entry.dest
+    if entry.content is not None or entry.transform is not None:
+        text = entry.content if entry.content is not None else entry.transform(entry.source.read_text(encoding="utf-8"))
+        dest.write_text(text, encoding="utf-8")
+        # write_text translates newlines on Windows; such files are read back instead
+        if written is not None and os.linesep == "\n":
+            written[entry.dest.as_posix()] = text.encode("utf-8")
+        return False
+    if entry.mode is None and written is None:
+        shutil.copy2(entry.source, dest)
+        return False
+    data = entry.source.read_bytes()
+    dest.write_bytes(data)
+    shutil.copystat(entry.source, dest)
+    if written is not None:
+        written[entry.dest.as_posix()] = data
+    if entry.mode is not None and data[:2] == b"#!":
+        os.chmod(dest, entry.mode)
+        return True
+    return False
+
+
+def materialize(entries: Iterable[ManifestEntry], root: Path, max_workers: int | None = None, written: dict | None = None) -> dict:
+    """Write every manifest entry below root.
+
+    Parent directories are created up front, then files are written on a bounded
+    thread pool. Later entries for the same destination win, matching the
+    overwrite semantics of sequential copies. Raises the first failure after all
+    other entries have been attempted.
+
+    written: when given, filled with dest (POSIX) -> the bytes written, so callers
+    that hash the output (the upgrade baseline) need not read it back
+    """
+    by_dest: dict[Path, ManifestEntry] = {}
+    for entry in entries:
+        by_dest[entry.dest] = entry
+    work = list(by_dest.values())
+
+    for parent in sorted({(root / e.dest).parent for e in work}):
+        parent.mkdir(parents=True, exist_ok=True)
+
+    with span("materialize", files=len(work)):
+        if len(work) < _PARALLEL_THRESHOLD or max_workers == 1:
+            results = [_write_entry(e, root, written) for e in work]
+        else:
+            errors: list[BaseException] = []
+
+            def run(entry: ManifestEntry) -> bool:
+                try:
+                    return _write_entry(entry, root, written)
+                except Exception as e:
+                    errors.append(e)
+                    return False
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(run, work))
+            if errors:
+                raise errors[0]
+
+    return {"files": len(work), "executables": sum(results)}
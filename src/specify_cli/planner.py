@@ -0,0 +1,119 @@
+"""
+Write planning for `specify init`.
+
+Before anything is written, init computes the complete set of output paths
+(and which of them are rendered rather than copied) as a `WritePlan`. The
+existing tree is compared against that plan with a single `os.scandir` walk
+that only descends into directories the plan writes to, so conflict detection
+is an exact set intersection instead of "the directory is not empty". The
+same plan object is then executed by the real run: the local manifest entries
+go to the parallel writer, release archives are streamed into place, and the
+planned files become the `specify upgrade` baseline.
+
+`specify init --dry-run [--json]` stops after planning and reports the plan
+and its conflicts without touching the project directory.
+"""
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+
+from .upgrade import PlannedFile
+
+
+@dataclass
+class Conflicts:
+    """Planned outputs that collide with the existing tree.
+
+    overwrite: planned files that already exist as files (they will be replaced)
+    blocked:   planned files that exist as directories, or planned directories
+               that exist as files (the write would fail)
+    """
+    overwrite: list[str] = field(default_factory=list)
+    blocked: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.overwrite or self.blocked)
+
+
+@dataclass
+class WritePlan:
+    agents: list[str]
+    script_type: str
+    source: str
+    files: list[PlannedFile]
+    # Local source: the materialize manifest the files were derived from
+    entries: list | None = None
+    # Release source: (agent, archive path) in extraction order
+    archives: list[tuple[str, Path]] = field(default_factory=list)
+    release: str | None = None
+    # Archives outside the artifact store are deleted once the plan has run
+    temporary: bool = False
+
+    def dests(self) -> list[str]:
+        """Planned output paths (project relative, POSIX), later duplicates dropped."""
+        return list(dict.fromkeys(f.dest for f in self.files))
+
+    def directories(self) -> set[str]:
+        """Every directory the plan creates or writes into ('' is the project root)."""
+        dirs = {""}
+        for dest in self.dests():
+            for parent in PurePosixPath(dest).parents:
+                dirs.add("" if str(parent) == "." else parent.as_posix())
+        return dirs
+
+    def find_conflicts(self, root: Path) -> Conflicts:
+        """Compare the plan with what exists below root (one pruned scandir walk)."""
+        conflicts = Conflicts()
+        if not root.is_dir():
+            return conflicts
+        files = set(self.dests())
+        dirs = self.directories()
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            try:
+                with os.scandir(root / rel_dir if rel_dir else root) as it:
+                    for entry in it:
+                        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        is_dir = entry.is_dir()
+                        if rel in files:
+                            (conflicts.blocked if is_dir else conflicts.overwrite).append(rel)
+                        elif rel in dirs:
+                            if is_dir:
+                                stack.append(rel)
+                            else:
+                                conflicts.blocked.append(rel)
+            except OSError:
+                continue
+        conflicts.overwrite.sort()
+        conflicts.blocked.sort()
+        return conflicts
+
+    def to_dict(self, root: Path, conflicts: Conflicts | None = None) -> dict:
+        conflicts = self.find_conflicts(root) if conflicts is None else conflicts
+        overwrite = set(conflicts.overwrite)
+        last = {f.dest: f for f in self.files}
+        return {
+            "project": str(root),
+            "agents": self.agents,
+            "script_type": self.script_type,
+            "source": self.source,
+            "release": self.release,
+            "files": [
+                {
+                    "path": dest,
+                    "action": "overwrite" if dest in overwrite else "create",
+                    "rendered": last[dest].rendered,
+                    "executable": last[dest].executable,
+                }
+                for dest in sorted(last)
+            ],
+            "conflicts": {"overwrite": conflicts.overwrite, "blocked": conflicts.blocked},
+        }
+
+    def discard(self) -> None:
+        """Delete temporary release archives (no-op for local plans and stored archives)."""
+        if self.temporary:
+            for _, path in self.archives:
+                path.unlink(missing_ok=True)
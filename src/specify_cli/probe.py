@@ -0,0 +1,253 @@
+"""
+Tool discovery and version probing for `specify check`.
+
+PATH is scanned once into an index of executable names (one `scandir` per
+directory, no per-tool PATH walk); every tool is resolved from that index.
+The index is kept for the process and rebuilt when PATH or the mtime of one
+of its directories changes.
+Version probes (`<tool> --version`) run concurrently, each with its own
+timeout, so one slow or hanging binary does not hold up the others.
+
+Results are cached on disk. The cache is valid while PATH, the mtime of every
+PATH directory (adding or removing a binary changes it) and the mtime/size of
+each resolved binary are unchanged, so a repeated `check` only costs a few
+`stat` calls (a probe that timed out is not retried until the binary changes;
+`specify check --refresh` re-runs everything).
+
+Environment:
+    SPECIFY_PROBE_TIMEOUT  Seconds allowed per version probe (default 3)
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from .locks import file_lock
+from .template_cache import cache_enabled, cache_root
+
+DEFAULT_TIMEOUT = 3.0
+CACHE_FORMAT = 1
+_VERSION_RE = re.compile(r"\d+(?:\.\d+)+(?:[-+.][0-9A-Za-z.-]+)?")
+
+
+@dataclass
+class ProbeResult:
+    tool: str
+    path: str | None = None
+    version: str | None = None
+    error: str | None = None
+    cached: bool = False
+
+    @property
+    def found(self) -> bool:
+        return self.path is not None
+
+
+def probe_timeout() -> float:
+    try:
+        return float(os.getenv("SPECIFY_PROBE_TIMEOUT", DEFAULT_TIMEOUT))
+    except ValueError:
+        return DEFAULT_TIMEOUT
+
+
+def _path_dirs(path_env: str) -> list[str]:
+    return list(dict.fromkeys(d for d in path_env.split(os.pathsep) if d))
+
+
+def _pathext() -> list[str]:
+    if os.name != "nt":
+        return [""]
+    return [""] + [e.lower() for e in os.getenv("PATHEXT", ".COM;.EXE;.BAT;.CMD").split(";") if e]
+
+
+class PathIndex:
+    """Executable names found on PATH, built from one directory listing per entry."""
+
+    def __init__(self, path_env: str | None = None, dir_mtimes: dict[str, int | None] | None = None):
+        self.path_env = os.getenv("PATH", "") if path_env is None else path_env
+        self.dirs = _path_dirs(self.path_env)
+        # Taken before listing, so a change during the scan leaves the index stale
+        self.dir_mtimes = _dir_mtimes(self.dirs) if dir_mtimes is None else dir_mtimes
+        self._candidates: dict[str, list[str]] = {}
+        exts = _pathext()
+        for directory in self.dirs:
+            try:
+                with os.scandir(directory) as it:
+                    names = [entry.name for entry in it]
+            except OSError:
+                continue
+            for name in names:
+                key = name.lower() if os.name == "nt" else name
+                for ext in exts:
+                    if ext and key.endswith(ext):
+                        self._candidates.setdefault(key[: -len(ext)], []).append(os.path.join(directory, name))
+                    elif not ext:
+                        self._candidates.setdefault(key, []).append(os.path.join(directory, name))
+
+    def which(self, tool: str) -> str | None:
+        """First executable candidate for tool in PATH order (like shutil.which)."""
+        key = tool.lower() if os.name == "nt" else tool
+        for candidate in self._candidates.get(key, ()):
+            if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+                return candidate
+        return None
+
+
+_indexes: dict[str, PathIndex] = {}
+
+
+def _path_index(path_env: str, dir_mtimes: dict[str, int | None] | None = None) -> PathIndex:
+    """The index of path_env, rebuilt when a PATH directory's mtime has changed."""
+    if dir_mtimes is None:
+        dir_mtimes = _dir_mtimes(_path_dirs(path_env))
+    index = _indexes.get(path_env)
+    if index is None or index.dir_mtimes != dir_mtimes:
+        index = _indexes[path_env] = PathIndex(path_env, dir_mtimes)
+    return index
+
+
+def which(tool: str) -> str | None:
+    """shutil.which replacement backed by a per-process PATH index."""
+    return _path_index(os.getenv("PATH", "")).which(tool)
+
+
+def probe_version(path: str, args: tuple[str, ...] = ("--version",), timeout: float | None = None) -> str | None:
+    """Run `<path> --version` and return the version string (or first output line)."""
+    proc = subprocess.run(
+        [path, *args],
+        capture_output=True,
+        text=True,
+        timeout=probe_timeout() if timeout is None else timeout,
+        stdin=subprocess.DEVNULL,
+        errors="replace",
+    )
+    output = (proc.stdout or "") + "\n" + (proc.stderr or "")
+    first = next((line.strip() for line in output.splitlines() if line.strip()), "")
+    if not first:
+        return None
+    match = _VERSION_RE.search(output)
+    return match.group(0) if match else first[:80]
+
+
+def _dir_mtimes(dirs: list[str]) -> dict[str, int | None]:
+    mtimes = {}
+    for directory in dirs:
+        try:
+            mtimes[directory] = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtimes[directory] = None
+    return mtimes
+
+
+def _binary_stamp(path: str) -> list[int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class ProbeCache:
+    """Probe results persisted as JSON, keyed by PATH and the requested tools."""
+
+    def __init__(self, root: Path | None = None):
+        self.path = (root or cache_root()) / "probes.json"
+
+    @staticmethod
+    def key(path_env: str, tools: list[str]) -> str:
+        return hashlib.sha256(f"{CACHE_FORMAT}\0{path_env}\0{','.join(tools)}".encode()).hexdigest()[:24]
+
+    def load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self, entries: dict) -> None:
+        """Merge entries into the file; other keys (other tool sets or PATHs) are kept."""
+        with file_lock(self.path.with_name(self.path.name + ".lock")):
+            data = self.load()
+            data.update(entries)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+def _reusable(old: dict | None, fallback: Path | None) -> bool:
+    """A cached result stands while its binary (or its absence) is unchanged."""
+    if old is None:
+        return False
+    if old["path"] is None:
+        return not (fallback is not None and fallback.is_file())
+    return _binary_stamp(old["path"]) == old.get("stamp")
+
+
+def probe_tools(tools: list[str], *, fallbacks: dict[str, Path] | None = None, timeout: float | None = None, use_cache: bool | None = None, max_workers: int = 8) -> dict[str, ProbeResult]:
+    """Resolve and version-probe every tool; returns {tool: ProbeResult} in input order.
+
+    fallbacks maps a tool to a location checked when it is not on PATH (e.g. the
+    local Claude install created by `claude migrate-installer`).
+    """
+    fallbacks = fallbacks or {}
+    use_cache = cache_enabled() if use_cache is None else use_cache
+    path_env = os.getenv("PATH", "")
+    dirs = _path_dirs(path_env)
+    dir_mtimes = _dir_mtimes(dirs)
+    cache = ProbeCache() if use_cache else None
+    key = ProbeCache.key(path_env, tools)
+
+    previous = {}
+    if cache is not None:
+        stored = cache.load().get(key)
+        if stored and stored.get("dirs") == dir_mtimes:
+            previous = stored.get("results", {})
+
+    results: dict[str, ProbeResult] = {}
+    to_probe: list[ProbeResult] = []
+    index: PathIndex | None = None
+    for tool in tools:
+        if _reusable(previous.get(tool), fallbacks.get(tool)):
+            old = previous[tool]
+            results[tool] = ProbeResult(tool, old["path"], old["version"], old["error"], cached=True)
+            continue
+        if index is None:
+            index = _path_index(path_env, dir_mtimes)
+        path = index.which(tool)
+        if path is None and tool in fallbacks and fallbacks[tool].is_file():
+            path = str(fallbacks[tool])
+        result = ProbeResult(tool, path)
+        results[tool] = result
+        if path is not None:
+            to_probe.append(result)
+
+    def run(result: ProbeResult) -> None:
+        try:
+            result.version = probe_version(result.path, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            result.error = "version probe timed out"
+        except OSError as e:
+            result.error = str(e)
+
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(to_probe))) as pool:
+            list(pool.map(run, to_probe))
+
+    if cache is not None and not all(r.cached for r in results.values()):
+        entry = {
+            "dirs": dir_mtimes,
+            "results": {
+                tool: {**{k: v for k, v in asdict(r).items() if k != "cached"}, "stamp": _binary_stamp(r.path) if r.path else None}
+                for tool, r in results.items()
+            },
+        }
+        try:
+            cache.save({key: entry})
+        except OSError:
+            pass
+    return {tool: results[tool] for tool in tools}
@@ -0,0 +1,139 @@
+"""
+GitHub release metadata with a persistent, revalidating on-disk cache.
+
+`releases/latest` responses are stored under the user cache dir together with
+their `ETag`/`Last-Modified` validators. Within the TTL the cached metadata is
+used without any request; after it expires the cache is revalidated with
+`If-None-Match`/`If-Modified-Since`, so an unchanged release costs a 304 that
+does not count against the GitHub rate limit. Offline mode serves the last
+known release without touching the network.
+
+Environment:
+    SPECIFY_GITHUB_API_URL  API base URL (default https://api.github.com), e.g. a local stand-in
+    SPECIFY_RELEASE_TTL     Seconds cached metadata is trusted without revalidation (default 600)
+    SPECIFY_OFFLINE         Set to 1 to only use cached release metadata
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .template_cache import cache_root
+
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_TTL = 600.0
+
+
+def api_base_url() -> str:
+    return os.getenv("SPECIFY_GITHUB_API_URL", DEFAULT_API_URL).rstrip("/")
+
+
+def release_ttl() -> float:
+    try:
+        return float(os.getenv("SPECIFY_RELEASE_TTL", DEFAULT_TTL))
+    except ValueError:
+        return DEFAULT_TTL
+
+
+def offline_mode() -> bool:
+    return os.getenv("SPECIFY_OFFLINE", "").strip().lower() in ("1", "true", "yes")
+
+
+class ReleaseMetadataCache:
+    """JSON files holding the last `releases/latest` payload per repository and API host."""
+
+    def __init__(self, root: Path | None = None):
+        self.root = (root or cache_root()) / "releases"
+
+    def _path(self, api_url: str) -> Path:
+        return self.root / f"{hashlib.sha256(api_url.encode()).hexdigest()[:24]}.json"
+
+    def load(self, api_url: str) -> dict | None:
+        try:
+            entry = json.loads(self._path(api_url).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) and "data" in entry else None
+
+    def save(self, api_url: str, entry: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(api_url)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(entry), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def find_template_asset(release_data: dict, ai_assistant: str, script_type: str) -> dict | None:
+    """The release asset holding the template archive for an agent and script type."""
+    pattern = f"spec-kit-template-{ai_assistant}-{script_type}"
+    for asset in release_data.get("assets", []):
+        if pattern in asset["name"] and asset["name"].endswith(".zip"):
+            return asset
+    return None
+
+
+def fetch_latest_release(client: "httpx.Client", repo_owner: str, repo_name: str, *, headers: dict | None = None, offline: bool | None = None, ttl: float | None = None, cache: ReleaseMetadataCache | None = None, debug: bool = False) -> tuple[dict, str]:
+    """Return (release_data, source) for the latest release.
+
+    source is one of: 'cache' (fresh within TTL), 'offline', 'revalidated' (304),
+    'network' (200) or 'stale' (request failed, last known release served).
+    Raises RuntimeError when no release metadata can be obtained.
+    """
+    api_url = f"{api_base_url()}/repos/{repo_owner}/{repo_name}/releases/latest"
+    offline = offline_mode() if offline is None else offline
+    ttl = release_ttl() if ttl is None else ttl
+    cache = cache or ReleaseMetadataCache()
+    entry = cache.load(api_url)
+
+    if offline:
+        if entry is None:
+            raise RuntimeError(f"Offline mode: no cached release metadata for {api_url}")
+        return entry["data"], "offline"
+    if entry is not None and time.time() - entry.get("fetched_at", 0) < ttl:
+        return entry["data"], "cache"
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = client.get(api_url, timeout=30, follow_redirects=True, headers=request_headers)
+    except Exception:
+        if entry is not None:
+            return entry["data"], "stale"
+        raise
+
+    if response.status_code == 304 and entry is not None:
+        entry["fetched_at"] = time.time()
+        cache.save(api_url, entry)
+        return entry["data"], "revalidated"
+    if response.status_code != 200:
+        if entry is not None and (response.status_code in (403, 429) or response.status_code >= 500):
+            # Rate limited or server trouble: the last known release is better than failing
+            return entry["data"], "stale"
+        msg = f"GitHub API returned {response.status_code} for {api_url}"
+        if debug:
+            msg += f"\nResponse headers: {response.headers}\nBody (truncated 500): {response.text[:500]}"
+        raise RuntimeError(msg)
+    try:
+        release_data = response.json()
+    except ValueError as je:
+        raise RuntimeError(f"Failed to parse release JSON: {je}\nRaw (truncated 400): {response.text[:400]}")
+
+    cache.save(api_url, {
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "fetched_at": time.time(),
+        "data": release_data,
+    })
+    return release_data, "network"
@@ -0,0 +1,354 @@
+"""
+`specify serve`: a long-lived JSON-RPC 2.0 daemon.
+
+IDE extensions and agent harnesses otherwise start `specify` (and bash, and
+several `git` processes) for every query. The daemon keeps the interpreter,
+the agent registry, tool probe results and feature-path resolution warm and
+answers over newline-delimited JSON-RPC on stdio or a Unix socket:
+
+    {"jsonrpc": "2.0", "id": 1, "method": "paths", "params": {"cwd": "/repo"}}
+
+Methods:
+    ping                              -> {"version", "uptime"}
+    agents                            -> registry entries
+    check      {refresh}              -> {tool: {path, version, error, cached}}
+    paths      {cwd, feature}         -> common.sh feature paths
+    prereqs    {cwd, feature, require_tasks, include_tasks}
+    feature.create {cwd, description} -> {BRANCH_NAME, SPEC_FILE, FEATURE_NUM}
+    context.update {cwd, agent}       -> {feature, plan, files: [{path, agents, action, error}]}
+    document   {cwd, document, section, field, task} -> outline, or the section/field/task asked for
+    tasks.next {cwd, limit, source}   -> {total, done, open, ready: [task], critical_path}
+    init       {path, agents, script_type, here, force, no_git, from_release, dry_run}
+    shutdown
+
+Cached values carry the stat signature of the files they were derived from
+(`.git/HEAD`, `specs/`, `agents.toml`, ...). The signature is re-checked on
+every request, so an edit, a branch switch or a new spec directory is picked
+up immediately. Nothing is served stale, and nothing is polled between
+requests.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from .statmemo import StatMemo
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+APPLICATION_ERROR = -32000
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+def _params(params: Any, allowed: dict[str, type | tuple]) -> dict:
+    if params is None:
+        return {}
+    if not isinstance(params, dict):
+        raise RPCError(INVALID_PARAMS, "params must be an object")
+    unknown = set(params) - set(allowed)
+    if unknown:
+        raise RPCError(INVALID_PARAMS, f"unknown param(s): {', '.join(sorted(unknown))}")
+    for name, value in params.items():
+        if value is not None and not isinstance(value, allowed[name]):
+            raise RPCError(INVALID_PARAMS, f"param '{name}' has the wrong type")
+    return params
+
+
+class SpecifyService:
+    """The RPC methods, with the warm state they share."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.memo = StatMemo()
+        # Operations that write into projects run one at a time
+        self.write_lock = threading.Lock()
+        self.stop = threading.Event()
+        self.methods: dict[str, Callable[[Any], Any]] = {
+            "ping": self.ping,
+            "agents": self.agents,
+            "check": self.check,
+            "paths": self.paths,
+            "prereqs": self.prereqs,
+            "feature.create": self.feature_create,
+            "context.update": self.context_update,
+            "document": self.document,
+            "tasks.next": self.tasks_next,
+            "init": self.init,
+            "shutdown": self.shutdown,
+        }
+
+    # -- dispatch ---------------------------------------------------------
+
+    def handle(self, message: Any) -> dict | list | None:
+        """Answer one decoded JSON-RPC message (or batch); None for notifications."""
+        if isinstance(message, list):
+            if not message:
+                return _error(None, RPCError(INVALID_REQUEST, "empty batch"))
+            replies = [r for r in (self._handle_one(m) for m in message) if r is not None]
+            return replies or None
+        return self._handle_one(message)
+
+    def _handle_one(self, message: Any) -> dict | None:
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            return _error(message.get("id") if isinstance(message, dict) else None,
+                          RPCError(INVALID_REQUEST, "invalid JSON-RPC 2.0 request"))
+        msg_id = message.get("id")
+        is_notification = "id" not in message
+        method = self.methods.get(message["method"])
+        try:
+            if method is None:
+                raise RPCError(METHOD_NOT_FOUND, f"unknown method: {message['method']}")
+            result = method(message.get("params"))
+        except RPCError as e:
+            return None if is_notification else _error(msg_id, e)
+        except Exception as e:
+            return None if is_notification else _error(msg_id, RPCError(APPLICATION_ERROR, str(e), type(e).__name__))
+        return None if is_notification else {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+    # -- methods ----------------------------------------------------------
+
+    def ping(self, params) -> dict:
+        from importlib.metadata import PackageNotFoundError, version
+        try:
+            v = version("specify-cli")
+        except PackageNotFoundError:
+            v = None
+        return {"version": v, "uptime": round(time.monotonic() - self.started, 3), "pid": os.getpid()}
+
+    def _registry(self):
+        from .agents import load_registry, user_registry_path
+
+        path = user_registry_path()
+
+        def compute():
+            # Kept out of agents._registry: handlers pass it explicitly, so a reload
+            # never swaps the registry under an init running on another connection
+            return load_registry(path), [path]
+
+        return self.memo.get(("registry", str(path)), compute)
+
+    def agents(self, params) -> list[dict]:
+        from dataclasses import asdict
+        _params(params, {})
+        return [asdict(agent) for agent in self._registry()]
+
+    def check(self, params) -> dict:
+        from dataclasses import asdict
+        from .probe import probe_tools
+
+        p = _params(params, {"refresh": bool})
+        registry = self._registry()
+        tools = ["git", *registry.check_tools]
+        results = probe_tools(tools, fallbacks=registry.fallbacks, use_cache=False if p.get("refresh") else None)
+        return {tool: asdict(r) for tool, r in results.items()}
+
+    def _paths(self, cwd: str | None, feature: str | None):
+        from .features import resolve_cached
+
+        return resolve_cached(Path(cwd) if cwd else None, feature)
+
+    def paths(self, params) -> dict:
+        p = _params(params, {"cwd": str, "feature": str})
+        return self._paths(p.get("cwd"), p.get("feature")).to_dict()
+
+    def prereqs(self, params) -> dict:
+        from .features import FeatureError, prerequisites
+
+        p = _params(params, {"cwd": str, "feature": str, "require_tasks": bool, "include_tasks": bool})
+        try:
+            return prerequisites(self._paths(p.get("cwd"), p.get("feature")),
+                                 require_tasks=bool(p.get("require_tasks")), include_tasks=bool(p.get("include_tasks")))
+        except FeatureError as e:
+            raise RPCError(APPLICATION_ERROR, str(e), "FeatureError")
+
+    def feature_create(self, params) -> dict:
+        from .features import FeatureError, create_feature
+
+        p = _params(params, {"cwd": str, "description": str})
+        with self.write_lock:
+            try:
+                return create_feature(p.get("description") or "", Path(p.get("cwd") or os.getcwd()))
+            except FeatureError as e:
+                raise RPCError(APPLICATION_ERROR, str(e), "FeatureError")
+
+    def context_update(self, params) -> dict:
+        from .agent_context import AgentContextError, update_agent_context
+
+        p = _params(params, {"cwd": str, "agent": str})
+        paths = self._paths(p.get("cwd"), None)
+        with self.write_lock:
+            try:
+                plan, results = update_agent_context(paths, p.get("agent"), registry=self._registry())
+            except AgentContextError as e:
+                raise RPCError(APPLICATION_ERROR, str(e), "AgentContextError")
+        return {"feature": paths.branch, "plan": plan.to_dict(), "files": [r.to_dict() for r in results]}
+
+    def document(self, params) -> dict:
+        from .documents import DocumentError, document_path, load_document, query
+
+        p = _params(params, {"cwd": str, "document": str, "section": str, "field": str, "task": str})
+        cwd = p.get("cwd")
+        path = document_path(p.get("document") or "tasks", self._paths(cwd, None).feature_dir)
+        if not path.is_absolute():
+            path = Path(cwd or os.getcwd()) / path
+        try:
+            return query(load_document(path), section=p.get("section"), field_name=p.get("field"), task=p.get("task"))
+        except FileNotFoundError:
+            raise RPCError(APPLICATION_ERROR, f"{path} not found", "DocumentError")
+        except DocumentError as e:
+            raise RPCError(APPLICATION_ERROR, str(e), "DocumentError")
+
+    def tasks_next(self, params) -> dict:
+        from .taskgraph import next_batch
+
+        p = _params(params, {"cwd": str, "limit": int, "source": bool})
+        path = self._paths(p.get("cwd"), None).feature_dir / "tasks.md"
+        try:
+            return next_batch(path, p.get("limit"), source=p.get("source") is not False)
+        except FileNotFoundError:
+            raise RPCError(APPLICATION_ERROR, f"tasks.md not found at {path}", "FeatureError")
+
+    def init(self, params) -> dict:
+        from . import download_and_extract_template, init_git_repo, is_git_repo, plan_project
+        from .upgrade import manifest_paths
+
+        p = _params(params, {
+            "path": str, "agents": (list, str), "script_type": str, "here": bool, "force": bool,
+            "no_git": bool, "from_release": bool, "dry_run": bool, "use_cache": bool,
+        })
+        if not p.get("path"):
+            raise RPCError(INVALID_PARAMS, "'path' is required")
+        project_path = Path(p["path"]).resolve()
+        agents = p.get("agents") or ["copilot"]
+        agents = [a.strip() for a in agents.split(",")] if isinstance(agents, str) else list(dict.fromkeys(agents))
+        registry = self._registry()
+        invalid = [a for a in agents if a not in registry]
+        if invalid:
+            raise RPCError(INVALID_PARAMS, f"unknown agent(s): {', '.join(invalid)}")
+        script_type = p.get("script_type") or ("ps" if os.name == "nt" else "sh")
+        if script_type not in ("sh", "ps"):
+            raise RPCError(INVALID_PARAMS, "script_type must be 'sh' or 'ps'")
+        if project_path.exists() and not p.get("here"):
+            raise RPCError(APPLICATION_ERROR, f"Directory already exists: {project_path} (pass here=true to merge into it)")
+
+        with self.write_lock:
+            plan = plan_project(agents, script_type, use_cache=p.get("use_cache", True), from_release=bool(p.get("from_release")),
+                                registry=registry)
+            conflicts = plan.find_conflicts(project_path)
+            if p.get("dry_run"):
+                plan.discard()
+                return {"dry_run": True, **plan.to_dict(project_path, conflicts)}
+            if conflicts.blocked or (conflicts.overwrite and not p.get("force")):
+                plan.discard()
+                raise RPCError(APPLICATION_ERROR, "Existing files conflict with the template (pass force=true to overwrite)",
+                               {"overwrite": conflicts.overwrite, "blocked": conflicts.blocked})
+            project_path.mkdir(parents=True, exist_ok=True)
+            download_and_extract_template(project_path, agents if len(agents) > 1 else agents[0], script_type, bool(p.get("here")),
+                                          verbose=False, use_cache=p.get("use_cache", True), plan=plan, registry=registry)
+            git = "skipped"
+            if not p.get("no_git"):
+                if is_git_repo(project_path):
+                    git = "existing"
+                else:
+                    ok = init_git_repo(project_path, quiet=True, files=manifest_paths(project_path))
+                    git = "initialized" if ok else "failed"
+        return {"project": str(project_path), "agents": agents, "script_type": script_type,
+                "files": len(plan.dests()), "overwritten": conflicts.overwrite, "git": git}
+
+    def shutdown(self, params) -> dict:
+        self.stop.set()
+        return {"stopping": True}
+
+
+def _error(msg_id: Any, e: RPCError) -> dict:
+    error = {"code": e.code, "message": str(e)}
+    if e.data is not None:
+        error["data"] = e.data
+    return {"jsonrpc": "2.0", "id": msg_id, "error": error}
+
+
+def _reply_line(service: SpecifyService, line: str) -> str | None:
+    try:
+        message = json.loads(line)
+    except ValueError as e:
+        reply = _error(None, RPCError(PARSE_ERROR, f"parse error: {e}"))
+    else:
+        reply = service.handle(message)
+    return None if reply is None else json.dumps(reply, separators=(",", ":")) + "\n"
+
+
+def serve_stdio(service: SpecifyService, stdin=None, stdout=None) -> None:
+    """Serve requests read line by line from stdin until EOF or shutdown."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for line in stdin:
+        if not line.strip():
+            continue
+        reply = _reply_line(service, line)
+        if reply is not None:
+            stdout.write(reply)
+            stdout.flush()
+        if service.stop.is_set():
+            break
+
+
+def serve_socket(service: SpecifyService, socket_path: Path) -> None:
+    """Serve each connection on a Unix socket in its own thread until shutdown."""
+    import socket
+    import socketserver
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("Unix sockets are not available on this platform; omit --socket to serve on stdio")
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode("utf-8", errors="replace")
+                if not line.strip():
+                    continue
+                reply = _reply_line(service, line)
+                if reply is not None:
+                    self.wfile.write(reply.encode("utf-8"))
+                    self.wfile.flush()
+                if service.stop.is_set():
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                    return
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        # A socket nobody answers on is left over from a crashed daemon
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(socket_path))
+        except OSError:
+            socket_path.unlink()
+        else:
+            raise RuntimeError(f"Another daemon is already listening on {socket_path}")
+        finally:
+            probe.close()
+    # Bind under a restrictive umask so the socket is never reachable by other users
+    umask = os.umask(0o177)
+    try:
+        server = Server(str(socket_path), Handler)
+    finally:
+        os.umask(umask)
+    try:
+        server.serve_forever(poll_interval=0.2)
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
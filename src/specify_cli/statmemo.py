@@ -0,0 +1,46 @@
+"""
+Values memoised against the stat signature of the files they were derived from.
+
+Shared by `specify serve` and the feature-path resolver: a cached value is
+returned only while every file it depends on has the same mtime and size (or
+is still missing), so edits, branch switches and new directories are picked up
+on the next lookup without any polling.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+
+def _signature(paths: list[Path]) -> tuple:
+    sig = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+class StatMemo:
+    """Values memoised together with the stat signature of the files they depend on."""
+
+    def __init__(self):
+        self._entries: dict[Any, tuple[list[Path], tuple, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, compute: Callable[[], tuple[Any, list[Path]]]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and _signature(entry[0]) == entry[1]:
+            return entry[2]
+        value, deps = compute()
+        with self._lock:
+            self._entries[key] = (deps, _signature(deps), value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,238 @@
+"""
+The task graph of a tasks.md: which tasks can run now, and what is left on
+the critical path.
+
+tasks.md states dependencies only through its layout, and `/implement`
+follows these rules:
+
+    - tasks run in document order;
+    - consecutive `[P]` tasks in the same section form a parallel group that
+      runs as one step;
+    - tasks that touch the same file run one after another, even inside a
+      parallel group.
+
+`TaskGraph` turns the parsed tasks (see documents.py) into a DAG by these
+rules. Each task depends on every task of the step before it, and on the
+previous member of its group that names a same file target. The targets are
+the backquoted file paths on the task's first line. Every edge points forward
+in the document, so document order is a topological order.
+
+The structure depends only on IDs, `[P]` markers, sections and file targets.
+When only checkboxes change (the common case while implementing),
+`TaskGraph.sync()` keeps the structure and flips the changed tasks. Each flip
+updates the open-dependency counts of that task's dependents, which keep the
+ready set. The critical path (the longest chain of open tasks) is recomputed
+lazily after a flip.
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .documents import Document, Task
+
+# `path/to/file.ext` on a task's first line; calls such as `run_test()` are not files
+_FILE_RE = re.compile(r"`([^`\s()]*[^`\s()/]\.[A-Za-z0-9]{1,8})`")
+
+
+def file_targets(text: str) -> list[str]:
+    return list(dict.fromkeys(_FILE_RE.findall(text)))
+
+
+@dataclass
+class TaskNode:
+    task: "Task"
+    step: int
+    files: list[str]
+    done: bool = False
+    deps: list[str] = field(default_factory=list)
+    dependents: list[str] = field(default_factory=list)
+
+    @property
+    def id(self) -> str:
+        return self.task.id
+
+
+class TaskGraph:
+    """The DAG of one tasks.md, with its ready set kept up to date as tasks are done."""
+
+    def __init__(self, doc: "Document"):
+        self.path = doc.path
+        self.nodes: dict[str, TaskNode] = {}
+        self.duplicates: list[str] = []
+        self.steps = 0
+        self._build(doc)
+        self._doc = doc
+
+    @staticmethod
+    def structure(doc: "Document") -> tuple:
+        """What the edges are derived from (everything but the checkboxes)."""
+        return tuple((t.id, t.parallel, t.section, tuple(file_targets(t.text))) for t in doc.tasks)
+
+    def _build(self, doc: "Document") -> None:
+        self.key = self.structure(doc)
+        previous: list[str] = []      # the tasks of the step before
+        group: list[str] = []         # the current parallel group
+        group_section = None
+        for task in doc.tasks:
+            if task.id in self.nodes:
+                self.duplicates.append(task.id)
+                continue
+            node = TaskNode(task, 0, file_targets(task.text), task.done)
+            if task.parallel and group and task.section == group_section:
+                node.step = self.steps
+                node.deps = list(previous)
+                # Same file as an earlier member: after it, not alongside it
+                for other in reversed(group):
+                    if set(self.nodes[other].files) & set(node.files):
+                        node.deps.append(other)
+                        break
+                group.append(task.id)
+            else:
+                if group:
+                    previous = group
+                self.steps += 1
+                node.step = self.steps
+                node.deps = list(previous)
+                if task.parallel:
+                    group, group_section = [task.id], task.section
+                else:
+                    group, previous = [], [task.id]
+            self.nodes[task.id] = node
+            for dep in node.deps:
+                self.nodes[dep].dependents.append(task.id)
+        self._open_deps = {
+            node.id: sum(not self.nodes[dep].done for dep in node.deps) for node in self.nodes.values()
+        }
+        self._critical: list[str] | None = None
+
+    # -- incremental updates ----------------------------------------------
+
+    def set_done(self, task_id: str, done: bool) -> None:
+        node = self.nodes[task_id]
+        if node.done == done:
+            return
+        node.done = done
+        for dependent in node.dependents:
+            self._open_deps[dependent] += -1 if done else 1
+        self._critical = None
+
+    def sync(self, doc: "Document") -> bool:
+        """Bring the graph up to date with doc; True when only checkboxes had changed."""
+        if doc is self._doc:
+            return True
+        if self.structure(doc) != self.key:
+            self.nodes, self.duplicates, self.steps = {}, [], 0
+            self._build(doc)
+            self._doc = doc
+            return False
+        seen = set()
+        for task in doc.tasks:
+            if task.id not in seen:
+                seen.add(task.id)
+                self.set_done(task.id, task.done)
+                self.nodes[task.id].task = task
+        self._doc = doc
+        return True
+
+    # -- queries ----------------------------------------------------------
+
+    def ready(self) -> list[TaskNode]:
+        """Open tasks whose dependencies are all done, in document order."""
+        return [node for node in self.nodes.values() if not node.done and not self._open_deps[node.id]]
+
+    def critical_path(self) -> list[str]:
+        """The longest chain of open tasks; it starts with a ready task."""
+        if self._critical is None:
+            length: dict[str, int] = {}
+            best: dict[str, str | None] = {}
+            for node in reversed(self.nodes.values()):
+                if node.done:
+                    continue
+                after = [d for d in node.dependents if d in length]
+                nxt = max(after, key=lambda d: length[d], default=None)
+                length[node.id] = 1 + (length[nxt] if nxt else 0)
+                best[node.id] = nxt
+            path: list[str] = []
+            start = max((n.id for n in self.ready()), key=lambda i: length[i], default=None)
+            while start is not None:
+                path.append(start)
+                start = best[start]
+            self._critical = path
+        return self._critical
+
+    def counts(self) -> dict:
+        done = sum(node.done for node in self.nodes.values())
+        return {"total": len(self.nodes), "done": done, "open": len(self.nodes) - done}
+
+    def node_dict(self, node: TaskNode, doc: "Document | None" = None) -> dict:
+        data = {
+            "id": node.id, "done": node.done, "text": node.task.text, "labels": node.task.labels,
+            "parallel": node.task.parallel, "files": node.files, "deps": node.deps, "step": node.step,
+            "line": node.task.line, "end": node.task.end,
+        }
+        if doc is not None:
+            data["section"] = doc.section_path(node.task.section)
+        return data
+
+    def next_batch(self, limit: int | None = None, source: bool = True) -> dict:
+        """The ready tasks (with their tasks.md text), counts and the critical path."""
+        doc = self._doc
+        ready = self.ready()[:limit] if limit else self.ready()
+        batch = []
+        for node in ready:
+            data = self.node_dict(node, doc)
+            if source:
+                data["source"] = doc.text(node.task.line, node.task.end)
+            batch.append(data)
+        return {
+            "tasks_file": self.path,
+            **self.counts(),
+            "ready": batch,
+            "critical_path": self.critical_path(),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "tasks_file": self.path,
+            **self.counts(),
+            "steps": self.steps,
+            "duplicates": self.duplicates,
+            "tasks": [self.node_dict(node, self._doc) for node in self.nodes.values()],
+            "ready": [node.id for node in self.ready()],
+            "critical_path": self.critical_path(),
+        }
+
+
+_graphs: dict[str, TaskGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def _current(path: Path) -> TaskGraph:
+    from .documents import load_document
+
+    doc = load_document(path)
+    graph = _graphs.get(doc.path)
+    if graph is None:
+        graph = _graphs[doc.path] = TaskGraph(doc)
+    else:
+        graph.sync(doc)
+    return graph
+
+
+def task_graph(path: Path) -> TaskGraph:
+    """The graph of the tasks.md at path, updated in place when only checkboxes changed.
+
+    Raises FileNotFoundError when path does not exist.
+    """
+    with _graphs_lock:
+        return _current(path)
+
+
+def next_batch(path: Path, limit: int | None = None, source: bool = True) -> dict:
+    """TaskGraph.next_batch() of the tasks.md at path, safe to call from several threads."""
+    with _graphs_lock:
+        return _current(path).next_batch(limit, source)
@@ -0,0 +1,291 @@
+"""
+Content-addressed cache of scaffolded project trees.
+
+`specify init` renders the same `templates/`, `memory/` and `scripts/` sources
+into the same `.specify/` and agent command directories over and over. This
+module keeps a prebuilt copy of that output on disk, keyed by a hash of the
+source tree plus agent and script type, so warm runs only link files into
+place instead of re-reading and re-processing every template.
+
+The cache only pays off when restoring is cheaper than rendering, that is when
+files can be reflinked (or, on request, hardlinked) out of it. A plain copy of
+a cached file costs more than rendering it, so by default the cache is used
+only when the cache and the project share a filesystem with reflink support
+(btrfs, XFS); elsewhere projects are rendered directly.
+
+The key covers the content of every source file and of the `specify_cli`
+package itself, and the resolved registry entries of the agents (user
+overrides in agents.toml included), so any template edit, CLI upgrade or
+agent override invalidates it automatically. File digests are memoised in a stat index (size + mtime) to
+avoid re-reading unchanged files when computing the key.
+
+Environment:
+    SPECIFY_CACHE_DIR   Override the cache root (default: platformdirs user cache dir)
+    SPECIFY_NO_CACHE    Set to 1 to bypass the template cache
+    SPECIFY_CACHE_LINK  auto (use the cache only where files can be reflinked),
+                        hardlink (only where they can be hardlinked), or copy
+                        (always use the cache, copying files out of it)
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable
+
+CACHE_FORMAT = 1
+TEMPLATE_SOURCE_DIRS = ("templates", "memory", "scripts")
+LINK_MODES = ("auto", "hardlink", "copy")
+
+# Linux FICLONE ioctl (copy-on-write clone on btrfs, XFS, overlayfs, ...)
+_FICLONE = 0x40049409
+
+
+def cache_root() -> Path:
+    """Return the root directory for all specify caches."""
+    override = os.getenv("SPECIFY_CACHE_DIR")
+    if override:
+        return Path(override).expanduser()
+    from platformdirs import user_cache_dir
+    return Path(user_cache_dir("specify-cli"))
+
+
+def cache_enabled() -> bool:
+    return os.getenv("SPECIFY_NO_CACHE", "").strip().lower() not in ("1", "true", "yes")
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Try a copy-on-write clone of src to dst. Returns False if unsupported."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    except OSError:
+        try:
+            dst.unlink()
+        except OSError:
+            pass
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def link_file(src: Path, dst: Path, mode: str = "auto") -> str:
+    """Materialise src at dst using the cheapest safe strategy.
+
+    Returns the strategy actually used: 'reflink', 'hardlink' or 'copy'.
+    Hardlinks share the inode with the cache, so in-place edits in the project
+    would leak back into the cache; they are only used when explicitly requested.
+    """
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    if mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+    elif mode == "auto" and _reflink(src, dst):
+        return "reflink"
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+class TemplateCache:
+    """On-disk cache of rendered project trees keyed by source content hash."""
+
+    def __init__(self, root: Path | None = None, link_mode: str | None = None):
+        self.root = (root or cache_root()) / "templates"
+        mode = (link_mode or os.getenv("SPECIFY_CACHE_LINK", "auto")).strip().lower()
+        self.link_mode = mode if mode in LINK_MODES else "auto"
+        self._index_path = self.root / "stat-index.json"
+        self._index: dict | None = None
+        self._index_dirty = False
+        # Guards the stat index: one instance is shared by every thread of the process
+        self._index_lock = threading.RLock()
+        # Link strategy per project filesystem (st_dev), probed once
+        self._strategies: dict[int, str | None] = {}
+
+    # -- key computation -------------------------------------------------
+
+    def _load_index(self) -> dict:
+        with self._index_lock:
+            if self._index is None:
+                try:
+                    self._index = json.loads(self._index_path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    self._index = {}
+            return self._index
+
+    def _save_index(self) -> None:
+        with self._index_lock:
+            if not self._index_dirty:
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self._index_path.with_name(f"{self._index_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(self._index), encoding="utf-8")
+            os.replace(tmp, self._index_path)
+            self._index_dirty = False
+
+    def file_digest(self, path: Path) -> str:
+        """Return the sha256 of a file, reusing the stat index when size and mtime match."""
+        st = path.stat()
+        index = self._load_index()
+        key = str(path)
+        entry = index.get(key)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        with self._index_lock:
+            index[key] = [st.st_size, st.st_mtime_ns, digest]
+            self._index_dirty = True
+        return digest
+
+    def tree_digest(self, repo_root: Path) -> str:
+        """Hash every template source file plus the specify_cli package sources."""
+        h = hashlib.sha256(f"format={CACHE_FORMAT}\n".encode())
+        sources: list[tuple[str, Path]] = []
+        for name in TEMPLATE_SOURCE_DIRS:
+            base = repo_root / name
+            if base.is_dir():
+                sources.extend((p.relative_to(repo_root).as_posix(), p) for p in base.rglob("*") if p.is_file())
+        package_dir = Path(__file__).resolve().parent
+        sources.extend((f"<specify_cli>/{p.name}", p) for p in package_dir.glob("*.py"))
+        for rel, path in sorted(sources):
+            h.update(f"{rel}\0{self.file_digest(path)}\n".encode())
+        self._save_index()
+        return h.hexdigest()
+
+    def package_digest(self) -> str:
+        """Hash of the specify_cli package sources (changes whenever the CLI itself changes)."""
+        h = hashlib.sha256(f"format={CACHE_FORMAT}\n".encode())
+        package_dir = Path(__file__).resolve().parent
+        for path in sorted(package_dir.glob("*.py")):
+            h.update(f"{path.name}\0{self.file_digest(path)}\n".encode())
+        self._save_index()
+        return h.hexdigest()
+
+    def key(self, repo_root: Path, ai_assistant: str, script_type: str, agents_digest: str = "") -> str:
+        """agents_digest: AgentRegistry.digest() of the agents the entry is rendered for"""
+        tree = self.tree_digest(repo_root)
+        return hashlib.sha256(f"{tree}:{ai_assistant}:{script_type}:{agents_digest}".encode()).hexdigest()[:32]
+
+    # -- link strategy ---------------------------------------------------
+
+    def _probe(self, mode: str) -> str | None:
+        """Whether files in the cache root can be reflinked / hardlinked within its filesystem."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        src = self.root / f".probe.{os.getpid()}.{threading.get_ident()}"
+        dst = src.with_suffix(".link")
+        try:
+            src.write_bytes(b"probe")
+            if mode == "hardlink":
+                os.link(src, dst)
+                return "hardlink"
+            return "reflink" if _reflink(src, dst) else None
+        except OSError:
+            return None
+        finally:
+            for path in (src, dst):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def link_strategy(self, project_dir: Path) -> str | None:
+        """How restore() would put files into project_dir ('reflink', 'hardlink' or 'copy').
+
+        None when the configured mode cannot link there: restoring would copy
+        every file, which is slower than rendering, so the cache should not be used.
+        """
+        if self.link_mode == "copy":
+            return "copy"
+        target = project_dir
+        while not target.exists() and target != target.parent:
+            target = target.parent
+        try:
+            cache_dev = (self.root if self.root.exists() else self.root.parent).stat().st_dev
+            project_dev = target.stat().st_dev
+        except OSError:
+            return None
+        if cache_dev != project_dev:
+            # Neither reflinks nor hardlinks cross filesystems
+            return None
+        if project_dev not in self._strategies:
+            self._strategies[project_dev] = self._probe(self.link_mode)
+        return self._strategies[project_dev]
+
+    # -- entries ---------------------------------------------------------
+
+    def entry_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def has(self, key: str) -> bool:
+        return (self.entry_dir(key) / "meta.json").is_file()
+
+    def meta(self, key: str) -> dict:
+        return json.loads((self.entry_dir(key) / "meta.json").read_text(encoding="utf-8"))
+
+    def build(self, key: str, builder: Callable[[Path], dict]) -> dict:
+        """Build an entry with builder(staging_dir) -> metadata and publish it atomically.
+
+        If another process (or thread) publishes the same key concurrently, its
+        entry wins and ours is discarded.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        tree_dir = staging / "tree"
+        tree_dir.mkdir(parents=True)
+        try:
+            meta = builder(tree_dir)
+            (staging / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            try:
+                os.rename(staging, self.entry_dir(key))
+            except OSError:
+                if not self.has(key):
+                    raise
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+        return self.meta(key)
+
+    def restore(self, key: str, project_dir: Path) -> int:
+        """Link every file of a cached entry into project_dir. Returns the file count."""
+        tree_dir = self.entry_dir(key) / "tree"
+        count = 0
+        for dirpath, dirnames, filenames in os.walk(tree_dir):
+            rel = Path(dirpath).relative_to(tree_dir)
+            dest_dir = project_dir / rel
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            for name in filenames:
+                link_file(Path(dirpath) / name, dest_dir / name, self.link_mode)
+                count += 1
+        return count
+
+    def clear(self) -> None:
+        if self.root.exists():
+            shutil.rmtree(self.root)
+
+
+_default: TemplateCache | None = None
+
+
+def default_cache() -> TemplateCache:
+    """Process-wide TemplateCache, so a long-lived process (`specify serve`) keeps the
+    stat index in memory. Recreated when the cache settings in the environment change.
+    """
+    global _default
+    root = cache_root() / "templates"
+    mode = os.getenv("SPECIFY_CACHE_LINK", "auto").strip().lower()
+    if _default is None or _default.root != root or _default.link_mode != (mode if mode in LINK_MODES else "auto"):
+        _default = TemplateCache()
+    return _default
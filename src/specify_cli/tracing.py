@@ -0,0 +1,197 @@
+"""
+Span tracing for `specify --profile`.
+
+Pipeline stages are wrapped in `span("name")` blocks (or decorated with
+`@traced()`). While no tracer is installed both are a single global lookup
+that hands back a shared no-op context manager, so the instrumentation can
+stay in place permanently. `enable()` installs a `Tracer`, which records
+every span with its thread, parent and wall-clock bounds; the result can be
+printed as a per-stage breakdown or exported in the Chrome trace event format
+(load it in Perfetto or chrome://tracing).
+
+Span names follow the StepTracker keys where a stage has one (`fetch`,
+`download`, `extract`, `chmod`, `git`), so the report reads like the progress
+tree.
+"""
+
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+
+_NULL = nullcontext()
+
+
+@dataclass
+class Span:
+    name: str
+    start_ns: int
+    tid: int
+    parent: "Span | None" = None
+    args: dict = field(default_factory=dict)
+    end_ns: int | None = None
+    child_ns: int = 0
+
+    @property
+    def path(self) -> tuple[str, ...]:
+        names = []
+        span = self
+        while span is not None:
+            names.append(span.name)
+            span = span.parent
+        return tuple(reversed(names))
+
+    @property
+    def duration_ns(self) -> int:
+        return (self.end_ns or time.perf_counter_ns()) - self.start_ns
+
+
+class _ActiveSpan:
+    """Context manager for one recorded span (only created while tracing)."""
+
+    __slots__ = ("tracer", "name", "args", "span")
+
+    def __init__(self, tracer: "Tracer", name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.span = None
+
+    def __enter__(self) -> Span:
+        self.span = self.tracer.begin(self.name, self.args)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.span.args["error"] = exc_type.__name__
+        self.tracer.end(self.span)
+
+
+class Tracer:
+    """Collects spans from every thread. Spans nest per thread; a span opened in a
+    worker thread with no open span of its own is attached to the (open) root span."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self.root: Span | None = None
+        self.started_ns = time.perf_counter_ns()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> list[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def begin(self, name: str, args: dict | None = None) -> Span:
+        stack = self._stack()
+        root = self.root
+        parent = stack[-1] if stack else (root if root is not None and root.end_ns is None else None)
+        span = Span(name, time.perf_counter_ns(), threading.get_native_id(), parent, dict(args or {}))
+        stack.append(span)
+        with self._lock:
+            if self.root is None:
+                self.root = span
+            self.spans.append(span)
+        return span
+
+    def end(self, span: Span) -> None:
+        span.end_ns = time.perf_counter_ns()
+        stack = self._stack()
+        if span in stack:
+            del stack[stack.index(span):]
+        if span.parent is not None and span.parent.tid == span.tid:
+            span.parent.child_ns += span.duration_ns
+
+    def summary(self) -> list[dict]:
+        """Inclusive and self time aggregated per span path, in first-start order."""
+        rows: dict[tuple[str, ...], dict] = {}
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        for span in spans:
+            path = span.path
+            row = rows.get(path)
+            if row is None:
+                row = rows[path] = {"name": span.name, "depth": len(path) - 1, "calls": 0, "total_ms": 0.0, "self_ms": 0.0}
+            row["calls"] += 1
+            row["total_ms"] += span.duration_ns / 1e6
+            row["self_ms"] += max(span.duration_ns - span.child_ns, 0) / 1e6
+        return list(rows.values())
+
+    def chrome_trace(self) -> dict:
+        """The spans as Chrome trace 'complete' events, plus the summary."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [
+            {
+                "name": span.name,
+                "cat": "specify",
+                "ph": "X",
+                "ts": (span.start_ns - self.started_ns) / 1000,
+                "dur": span.duration_ns / 1000,
+                "pid": pid,
+                "tid": span.tid,
+                "args": {key: str(value) for key, value in span.args.items()},
+            }
+            for span in spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "summary": self.summary()}
+
+    def export(self, path: Path) -> None:
+        import json
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.chrome_trace(), indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+_tracer: Tracer | None = None
+
+
+def enable() -> Tracer:
+    """Install a process-wide tracer (or return the installed one)."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def disable() -> Tracer | None:
+    """Uninstall the tracer and return it."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def active() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, **args):
+    """Context manager timing the enclosed block as `name` (no-op unless tracing)."""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL
+    return _ActiveSpan(tracer, name, args)
+
+
+def traced(name: str | None = None):
+    """Decorator form of span(); the span is named after the function by default."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with _ActiveSpan(tracer, label, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
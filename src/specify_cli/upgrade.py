@@ -0,0 +1,378 @@
+"""
+Incremental template upgrades for existing projects.
+
+`specify init` records `.specify/manifest.json`: for every generated file the
+hash of the source it was rendered from and the hash of the generated content.
+The generated content itself is the merge base for later upgrades. It is kept
+outside the project in a content-addressed store, `<cache root>/bases/`, shared
+by every project: a blob is named by its sha256, so copies of a project (a
+clone, a `cp -r`) never disturb each other's bases, and no project deletes
+blobs. The manifest also records each file's git blob id. When the store has
+lost a base (a cleared cache, another machine), it is read back from the
+project's git history, where init committed the generated files. Only when
+neither has it do edited files get the new version written next to them as
+`*.specify-new` instead of a merge. Projects from older versions that still
+have a `.specify/.base/` directory are read from it and migrated on their next
+upgrade.
+
+`specify upgrade` builds the current plan (one `PlannedFile` per output) and,
+per file:
+
+* source hash unchanged          -> nothing is rendered or written
+* output untouched since init    -> overwritten with the new rendering
+* output edited by the user      -> three-way merge of base, local and new
+  (conflict markers are left in place when both sides changed the same lines)
+* template removed upstream      -> deleted if untouched, kept otherwise
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .materialize import executable_mode
+
+MANIFEST_FORMAT = 1
+MANIFEST_PATH = Path(".specify") / "manifest.json"
+# Where merge bases used to be kept inside the project (read for migration only)
+LEGACY_BASE_DIR = Path(".specify") / ".base"
+CONFLICT_SUFFIX = ".specify-new"
+
+
+@dataclass(frozen=True)
+class PlannedFile:
+    """One generated output: where it goes, what it is rendered from, and how to render it."""
+    dest: str
+    source_hash: str
+    render: Callable[[], bytes]
+    executable: bool = False
+    # True when the output is a transformed template rather than a byte copy
+    rendered: bool = False
+
+
+@dataclass
+class UpgradeReport:
+    project: Path
+    added: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    merged: list[str] = field(default_factory=list)
+    conflicts: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    kept: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.merged or self.conflicts or self.removed)
+
+    def to_dict(self) -> dict:
+        return {
+            "project": str(self.project),
+            "added": self.added,
+            "updated": self.updated,
+            "merged": self.merged,
+            "conflicts": self.conflicts,
+            "removed": self.removed,
+            "kept": self.kept,
+            "unchanged": self.unchanged,
+        }
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_hash(path: Path) -> str | None:
+    try:
+        return sha256_bytes(path.read_bytes())
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+
+
+def load_manifest(project_dir: Path) -> dict | None:
+    try:
+        data = json.loads((project_dir / MANIFEST_PATH).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and isinstance(data.get("files"), dict) else None
+
+
+def _save_manifest(project_dir: Path, manifest: dict) -> None:
+    path = project_dir / MANIFEST_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def git_blob_id(data: bytes) -> str:
+    """The object id git gives data as a blob."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _base_path(digest: str) -> Path:
+    from .template_cache import cache_root
+
+    return cache_root() / "bases" / digest[:2] / digest
+
+
+def _store_base(digest: str, data: bytes) -> None:
+    path = _base_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{digest}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+
+def _git_blob(project_dir: Path, blob_id: str | None) -> bytes | None:
+    if not blob_id or shutil.which("git") is None:
+        return None
+    try:
+        proc = subprocess.run(["git", "cat-file", "blob", blob_id], cwd=project_dir, capture_output=True)
+    except OSError:
+        return None
+    return proc.stdout if proc.returncode == 0 else None
+
+
+def _load_base(project_dir: Path, entry: dict) -> bytes | None:
+    """The content a manifest entry was generated with: from the store, a legacy
+    .specify/.base/ or the project's git history (restoring it to the store)."""
+    digest = entry["sha256"]
+    for path in (_base_path(digest), project_dir / LEGACY_BASE_DIR / digest):
+        try:
+            data = path.read_bytes()
+        except OSError:
+            continue
+        if sha256_bytes(data) == digest:
+            return data
+    data = _git_blob(project_dir, entry.get("git"))
+    if data is not None and sha256_bytes(data) == digest:
+        _store_base(digest, data)
+        return data
+    return None
+
+
+def _migrate_legacy_bases(project_dir: Path, keep: set[str]) -> None:
+    """Move the bases still needed out of a legacy .specify/.base/ and remove it."""
+    legacy = project_dir / LEGACY_BASE_DIR
+    if not legacy.is_dir():
+        return
+    for digest in keep:
+        if not _base_path(digest).exists() and (legacy / digest).is_file():
+            _store_base(digest, (legacy / digest).read_bytes())
+    shutil.rmtree(legacy, ignore_errors=True)
+
+
+def write_manifest(project_dir: Path, plan: list[PlannedFile], info: dict, written: dict | None = None) -> dict:
+    """Record the files just generated in project_dir as the upgrade baseline.
+    written: dest -> bytes as written by materialize(); other files are read back from disk
+    """
+    manifest = {**info, "format": MANIFEST_FORMAT, "files": {}}
+    for planned in plan:
+        data = written.get(planned.dest) if written else None
+        if data is None:
+            try:
+                data = (project_dir / planned.dest).read_bytes()
+            except FileNotFoundError:
+                continue
+        digest = sha256_bytes(data)
+        _store_base(digest, data)
+        manifest["files"][planned.dest] = {"source": planned.source_hash, "sha256": digest, "git": git_blob_id(data)}
+    _save_manifest(project_dir, manifest)
+    _migrate_legacy_bases(project_dir, set())
+    return manifest
+
+
+def manifest_paths(project_dir: Path) -> list[str] | None:
+    """The files init generated in project_dir, as recorded in its manifest, and the manifest.
+
+    Both are committed together: a clone needs the manifest to upgrade, and the
+    merge bases it names are then in the history.
+    """
+    manifest = load_manifest(project_dir)
+    if manifest is None:
+        return None
+    return [*manifest["files"], MANIFEST_PATH.as_posix()]
+
+
+# -- three-way merge --------------------------------------------------------
+
+def _changes(base: list[str], other: list[str]) -> list[tuple[int, int, list[str]]]:
+    """Changed regions of other relative to base as (base_start, base_end, replacement)."""
+    matcher = difflib.SequenceMatcher(None, base, other, autojunk=False)
+    return [(i1, i2, other[j1:j2]) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+def _apply(base: list[str], start: int, end: int, changes: list[tuple[int, int, list[str]]]) -> list[str]:
+    out, pos = [], start
+    for i1, i2, lines in changes:
+        out.extend(base[pos:i1])
+        out.extend(lines)
+        pos = i2
+    out.extend(base[pos:end])
+    return out
+
+
+def merge3(base: str, ours: str, theirs: str) -> tuple[str, int]:
+    """Line-based three-way merge. Returns (merged text, number of conflict hunks)."""
+    base_lines = base.splitlines(keepends=True)
+    ours_lines = ours.splitlines(keepends=True)
+    theirs_lines = theirs.splitlines(keepends=True)
+    tagged = sorted(
+        [(c, 0) for c in _changes(base_lines, ours_lines)] + [(c, 1) for c in _changes(base_lines, theirs_lines)],
+        key=lambda item: (item[0][0], item[0][1]),
+    )
+
+    out: list[str] = []
+    conflicts = 0
+    pos = 0
+    i = 0
+    while i < len(tagged):
+        # Group changes from either side whose base ranges overlap or touch
+        start, end = tagged[i][0][0], tagged[i][0][1]
+        group = [tagged[i]]
+        i += 1
+        while i < len(tagged) and tagged[i][0][0] <= end:
+            end = max(end, tagged[i][0][1])
+            group.append(tagged[i])
+            i += 1
+        out.extend(base_lines[pos:start])
+        pos = end
+        sides = [[c for c, side in group if side == s] for s in (0, 1)]
+        ours_text = _apply(base_lines, start, end, sides[0])
+        theirs_text = _apply(base_lines, start, end, sides[1])
+        if not sides[1] or ours_text == theirs_text:
+            out.extend(ours_text)
+        elif not sides[0]:
+            out.extend(theirs_text)
+        else:
+            conflicts += 1
+            out.append("<<<<<<< local\n")
+            out.extend(_ensure_newline(ours_text))
+            out.append("=======\n")
+            out.extend(_ensure_newline(theirs_text))
+            out.append(">>>>>>> upstream\n")
+    out.extend(base_lines[pos:])
+    return "".join(out), conflicts
+
+
+def _ensure_newline(lines: list[str]) -> list[str]:
+    if lines and not lines[-1].endswith("\n"):
+        return lines[:-1] + [lines[-1] + "\n"]
+    return lines
+
+
+# -- upgrade ----------------------------------------------------------------
+
+def _write(path: Path, data: bytes, executable: bool) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    if executable and os.name != "nt" and data[:2] == b"#!":
+        os.chmod(path, executable_mode(path.stat().st_mode & 0o7777))
+
+
+def upgrade_project(project_dir: Path, plan: list[PlannedFile], info: dict, *, dry_run: bool = False) -> UpgradeReport:
+    """Bring project_dir up to date with plan. See the module docstring for the rules."""
+    manifest = load_manifest(project_dir) or {"files": {}}
+    old_files: dict[str, dict] = manifest["files"]
+    new_files: dict[str, dict] = {}
+    report = UpgradeReport(project_dir)
+    bases: dict[str, bytes] = {}
+
+    for planned in plan:
+        dest = project_dir / planned.dest
+        old = old_files.get(planned.dest)
+        if old is not None and old.get("source") == planned.source_hash:
+            new_files[planned.dest] = old
+            report.unchanged += 1
+            continue
+
+        new_data = planned.render()
+        new_hash = sha256_bytes(new_data)
+        new_files[planned.dest] = {"source": planned.source_hash, "sha256": new_hash, "git": git_blob_id(new_data)}
+        bases[new_hash] = new_data
+        current_hash = _file_hash(dest)
+
+        if current_hash is None:
+            if old is not None:
+                # Generated before and deleted by the user: respect that
+                report.kept.append(planned.dest)
+                continue
+            report.added.append(planned.dest)
+            if not dry_run:
+                _write(dest, new_data, planned.executable)
+        elif current_hash == new_hash:
+            report.unchanged += 1
+        elif old is not None and current_hash == old.get("sha256"):
+            report.updated.append(planned.dest)
+            if not dry_run:
+                _write(dest, new_data, planned.executable)
+        else:
+            base = _load_base(project_dir, old) if old is not None else None
+            merged = None
+            if base is not None:
+                try:
+                    merged, conflicts = merge3(base.decode("utf-8"), dest.read_bytes().decode("utf-8"), new_data.decode("utf-8"))
+                except UnicodeDecodeError:
+                    merged = None
+            if merged is None:
+                # No merge base (or binary content): leave the new version next to the local one
+                report.conflicts.append(planned.dest)
+                if not dry_run:
+                    _write(dest.with_name(dest.name + CONFLICT_SUFFIX), new_data, planned.executable)
+                continue
+            (report.conflicts if conflicts else report.merged).append(planned.dest)
+            if not dry_run:
+                dest.write_bytes(merged.encode("utf-8"))
+
+    for rel, old in old_files.items():
+        if rel in new_files:
+            continue
+        path = project_dir / rel
+        current_hash = _file_hash(path)
+        if current_hash is None:
+            continue
+        if current_hash == old.get("sha256"):
+            report.removed.append(rel)
+            if not dry_run:
+                path.unlink()
+        else:
+            report.kept.append(rel)
+
+    if not dry_run:
+        for digest, data in bases.items():
+            _store_base(digest, data)
+        _migrate_legacy_bases(project_dir, {f["sha256"] for f in new_files.values()})
+        _save_manifest(project_dir, {**info, "format": MANIFEST_FORMAT, "files": new_files})
+    return report
+
+
+def find_projects(roots: list[Path], recursive: bool = False) -> list[Path]:
+    """Project dirs (containing .specify/manifest.json) at, or with recursive below, each root."""
+    found = []
+    skip = {".git", "node_modules", ".venv", "venv", "__pycache__"}
+    for root in roots:
+        if (root / MANIFEST_PATH).is_file():
+            found.append(root)
+        if not recursive:
+            continue
+        stack = [root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if not entry.is_dir(follow_symlinks=False) or entry.name in skip or entry.name == ".specify":
+                            continue
+                        path = Path(entry.path)
+                        if (path / MANIFEST_PATH).is_file():
+                            found.append(path)
+                        stack.append(path)
+            except OSError:
+                continue
+    return list(dict.fromkeys(found))
@@ -0,0 +1,200 @@
+"""
+File watching for `specify watch`.
+
+On Linux the template source directories are watched with inotify (through
+ctypes, no extra dependency), so a save is reported within milliseconds and
+the process sleeps between saves. Elsewhere, or when inotify is unavailable
+or exhausted, a polling watcher compares `scandir` stat snapshots.
+
+Events are debounced: after the first change the watcher keeps collecting
+until the tree has been quiet for the debounce window, so an editor's
+write-temp-then-rename sequence (or a `git checkout` touching many templates)
+is handled as one batch.
+
+Environment:
+    SPECIFY_WATCH_POLL  Set to 1 to force the polling watcher
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_DEBOUNCE = 0.03
+DEFAULT_POLL_INTERVAL = 0.05
+
+# inotify(7)
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+_EVENT = struct.Struct("iIII")
+
+
+def _is_noise(name: str) -> bool:
+    """Editor swap/backup files that never correspond to a template."""
+    return name.endswith(("~", ".swp", ".swx", ".tmp")) or name.startswith(".#") or name == "4913"
+
+
+def _walk_dirs(root: Path):
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        yield directory
+        try:
+            with os.scandir(directory) as it:
+                stack.extend(Path(e.path) for e in it if e.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
+
+
+class InotifyWatcher:
+    """Recursive inotify watch over roots. wait() returns the paths that changed."""
+
+    def __init__(self, roots: list[Path]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = roots
+        self._dirs: dict[int, Path] = {}
+        for root in roots:
+            for directory in _walk_dirs(root):
+                self._watch(directory)
+
+    def _watch(self, directory: Path) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            self.close()
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: set[Path] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size: offset + _EVENT.size + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    # Events were lost: report the roots so everything is re-rendered
+                    changed.update(self.roots)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None or mask & _IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                if mask & _IN_DELETE_SELF:
+                    changed.add(directory)
+                    continue
+                if not name or _is_noise(name):
+                    continue
+                path = directory / name
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        # New subdirectory: watch it and report whatever it already holds
+                        for sub in _walk_dirs(path):
+                            self._watch(sub)
+                    changed.add(path)
+                elif mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE):
+                    changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Stat-snapshot watcher: one scandir walk over roots per interval."""
+
+    def __init__(self, roots: list[Path], interval: float = DEFAULT_POLL_INTERVAL):
+        self.roots = roots
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for directory in _walk_dirs(root):
+                try:
+                    with os.scandir(directory) as it:
+                        for entry in it:
+                            if entry.is_file(follow_symlinks=False) and not _is_noise(entry.name):
+                                st = entry.stat(follow_symlinks=False)
+                                snapshot[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+        return snapshot
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            old = self._snapshot
+            changed = {p for p in current.keys() | old.keys() if current.get(p) != old.get(p)}
+            self._snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            pause = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(pause)
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(roots: list[Path], *, poll: bool | None = None):
+    """inotify where available, the polling watcher otherwise (or when poll is set)."""
+    if poll is None:
+        poll = os.getenv("SPECIFY_WATCH_POLL", "").strip().lower() in ("1", "true", "yes")
+    if not poll:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(roots)
+
+
+def watch(watcher, on_change: Callable[[set[Path]], None], *, debounce: float = DEFAULT_DEBOUNCE, stop: threading.Event | None = None) -> None:
+    """Call on_change with each debounced batch of changed paths until stop is set."""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        changed = watcher.wait(0.5)
+        if not changed:
+            continue
+        while True:
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            changed |= more
+        on_change(changed)
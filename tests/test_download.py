@@ -0,0 +1,110 @@
+"""download_file() resume and verification against a local HTTP server."""
+
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from specify_cli.download import DownloadError, download_file, verify_file
+
+PAYLOAD = bytes(range(256)) * 400
+DIGEST = "sha256:" + hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class Server(ThreadingHTTPServer):
+    """Serves PAYLOAD with Range support; `shift` makes 206 responses start elsewhere."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.shift = 0
+        self.ranges: list[str | None] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/asset.zip"
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: Server
+
+    def do_GET(self):
+        requested = self.headers.get("Range")
+        self.server.ranges.append(requested)
+        match = re.match(r"bytes=(\d+)-(\d*)$", requested or "")
+        if match:
+            first = int(match.group(1)) + self.server.shift
+            last = int(match.group(2)) if match.group(2) else len(PAYLOAD) - 1
+            body = PAYLOAD[first:last + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {first}-{first + len(body) - 1}/{len(PAYLOAD)}")
+        else:
+            body = PAYLOAD
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    with httpx.Client() as client:
+        yield client
+
+
+def interrupted(dest, url, done):
+    """Leave the state of a single-stream download stopped after `done` bytes."""
+    part = dest.with_name(dest.name + ".part")
+    part.write_bytes(PAYLOAD[:done] + bytes(len(PAYLOAD) - done))
+    state = {"url": url, "total": len(PAYLOAD), "ranges": [[0, len(PAYLOAD), done]]}
+    dest.with_name(dest.name + ".part.json").write_text(json.dumps(state))
+
+
+def test_download_verifies_digest(server, client, tmp_path):
+    dest = download_file(client, server.url, tmp_path / "asset.zip", expected_size=len(PAYLOAD), expected_digest=DIGEST)
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_resume_requests_the_missing_range(server, client, tmp_path):
+    dest = tmp_path / "asset.zip"
+    interrupted(dest, server.url, 1000)
+    download_file(client, server.url, dest, expected_size=len(PAYLOAD), expected_digest=DIGEST)
+    assert server.ranges == ["bytes=1000-102399"]
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_mismatched_content_range_restarts(server, client, tmp_path):
+    dest = tmp_path / "asset.zip"
+    interrupted(dest, server.url, 1000)
+    server.shift = 10
+    download_file(client, server.url, dest, expected_size=len(PAYLOAD), expected_digest=DIGEST)
+    # The misplaced bytes were not appended: the transfer started over without Range
+    assert server.ranges == ["bytes=1000-102399", None]
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_unknown_digest_algorithm(server, client, tmp_path):
+    with pytest.raises(DownloadError, match="Unsupported digest algorithm 'nosuch'"):
+        download_file(client, server.url, tmp_path / "asset.zip", expected_digest="nosuch:00")
+    assert server.ranges == []
+    path = tmp_path / "file"
+    path.write_bytes(b"x")
+    with pytest.raises(DownloadError, match="Unsupported digest algorithm"):
+        verify_file(path, expected_digest="nosuch:00")
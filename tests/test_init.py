@@ -0,0 +1,34 @@
+"""Agent tool checks of `specify init` for single agents and batches."""
+
+import pytest
+from typer.testing import CliRunner
+
+from specify_cli import _local_templates_available, agents, app
+
+
+@pytest.fixture(autouse=True)
+def no_agent_clis(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path / "bin"))
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("SPECIFY_AGENTS_FILE", str(tmp_path / "agents.toml"))
+    monkeypatch.setenv("SPECIFY_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(agents, "_registry", None)
+    monkeypatch.chdir(tmp_path)
+
+
+def init(*args: str):
+    return CliRunner().invoke(app, ["init", "project", "--script", "sh", "--no-git", "--dry-run", *args])
+
+
+def test_batch_checks_every_agent_that_requires_a_cli():
+    result = init("--ai", "claude,copilot,gemini")
+    assert result.exit_code == 1
+    assert "claude not found" in result.output and "gemini not found" in result.output
+    assert "copilot not found" not in result.output
+
+
+@pytest.mark.skipif(not _local_templates_available(), reason="needs the templates of a spec-kit checkout")
+def test_ignore_agent_tools_skips_the_checks():
+    result = init("--ai", "claude,gemini", "--ignore-agent-tools")
+    assert result.exit_code == 0, result.output
+    assert "Agent Detection Error" not in result.output
@@ -0,0 +1,28 @@
+"""PATH index invalidation in probe.which()."""
+
+import os
+
+import pytest
+
+from specify_cli import probe
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX execute bits")
+def test_which_sees_binaries_added_to_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    assert probe.which("specify-test-tool") is None
+    tool = tmp_path / "specify-test-tool"
+    tool.write_text("#!/bin/sh\necho 1.0\n")
+    tool.chmod(0o755)
+    # Pin the directory mtime forward in case creating the file did not change it
+    stamp = os.stat(tmp_path).st_mtime_ns + 1_000_000_000
+    os.utime(tmp_path, ns=(stamp, stamp))
+    assert probe.which("specify-test-tool") == str(tool)
+
+
+def test_cache_keeps_entries_of_other_tool_sets(tmp_path):
+    cache = probe.ProbeCache(tmp_path)
+    cache.save({"git": {"results": {}}})
+    cache.save({"git,claude": {"results": {}}})
+    assert set(cache.load()) == {"git", "git,claude"}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["probes.json", "probes.json.lock"]
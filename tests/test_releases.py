@@ -0,0 +1,186 @@
+"""fetch_latest_release() against a local stand-in for the GitHub API."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from specify_cli.releases import ReleaseMetadataCache, fetch_latest_release
+
+RELEASE = {"tag_name": "v1.0.0", "assets": [{"name": "spec-kit-template-claude-sh-v1.0.0.zip"}]}
+ETAG = '"v1.0.0"'
+
+
+class StandIn(ThreadingHTTPServer):
+    """Serves `releases/latest` with the tag as ETag; `status` forces an error response."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.release = RELEASE
+        self.status = 200
+        self.requests: list[dict] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: StandIn
+
+    def do_GET(self):
+        self.server.requests.append({"path": self.path, **{k.lower(): v for k, v in self.headers.items()}})
+        if self.server.status != 200:
+            self.send_response(self.server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = '"%s"' % self.server.release["tag_name"]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+        else:
+            body = json.dumps(self.server.release).encode()
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def api(monkeypatch):
+    server = StandIn()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    monkeypatch.setenv("SPECIFY_GITHUB_API_URL", server.url)
+    monkeypatch.delenv("SPECIFY_OFFLINE", raising=False)
+    monkeypatch.delenv("SPECIFY_RELEASE_TTL", raising=False)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReleaseMetadataCache(tmp_path)
+
+
+@pytest.fixture
+def client():
+    with httpx.Client() as client:
+        yield client
+
+
+def fetch(client, cache, **kwargs):
+    return fetch_latest_release(client, "github", "spec-kit", cache=cache, **kwargs)
+
+
+def expire(cache, api):
+    """Age the cached entry past any TTL."""
+    url = f"{api.url}/repos/github/spec-kit/releases/latest"
+    entry = cache.load(url)
+    entry["fetched_at"] = 0
+    cache.save(url, entry)
+
+
+def test_uses_api_url_from_environment(api, cache, client):
+    data, source = fetch(client, cache)
+    assert (data, source) == (RELEASE, "network")
+    assert [r["path"] for r in api.requests] == ["/repos/github/spec-kit/releases/latest"]
+
+
+def test_fresh_cache_makes_no_request(api, cache, client):
+    fetch(client, cache, ttl=600)
+    data, source = fetch(client, cache, ttl=600)
+    assert (data, source) == (RELEASE, "cache")
+    assert len(api.requests) == 1
+
+
+def test_ttl_from_environment(api, cache, client, monkeypatch):
+    fetch(client, cache)
+    monkeypatch.setenv("SPECIFY_RELEASE_TTL", "0")
+    assert fetch(client, cache)[1] == "revalidated"
+    assert len(api.requests) == 2
+
+
+def test_expired_cache_revalidates_with_etag(api, cache, client):
+    fetch(client, cache)
+    expire(cache, api)
+    before = time.time()
+    data, source = fetch(client, cache, ttl=600)
+    assert (data, source) == (RELEASE, "revalidated")
+    assert api.requests[-1]["if-none-match"] == ETAG
+    # The 304 restarts the TTL
+    assert fetch(client, cache, ttl=600)[1] == "cache"
+    assert len(api.requests) == 2
+    url = f"{api.url}/repos/github/spec-kit/releases/latest"
+    assert cache.load(url)["fetched_at"] >= before
+
+
+def test_changed_release_replaces_cache(api, cache, client):
+    fetch(client, cache)
+    expire(cache, api)
+    api.release = {"tag_name": "v2.0.0", "assets": []}
+    data, source = fetch(client, cache, ttl=600)
+    assert (data["tag_name"], source) == ("v2.0.0", "network")
+    assert api.requests[-1]["if-none-match"] == ETAG
+    url = f"{api.url}/repos/github/spec-kit/releases/latest"
+    assert cache.load(url)["etag"] == '"v2.0.0"'
+    assert fetch(client, cache, ttl=600) == (api.release, "cache")
+
+
+def test_offline_serves_cache_without_request(api, cache, client, monkeypatch):
+    fetch(client, cache)
+    expire(cache, api)
+    monkeypatch.setenv("SPECIFY_OFFLINE", "1")
+    assert fetch(client, cache) == (RELEASE, "offline")
+    assert len(api.requests) == 1
+
+
+def test_offline_without_cache_fails(api, cache, client):
+    with pytest.raises(RuntimeError, match="Offline mode"):
+        fetch(client, cache, offline=True)
+    assert api.requests == []
+
+
+@pytest.mark.parametrize("status", [403, 429, 500, 502, 503])
+def test_stale_fallback(api, cache, client, status):
+    fetch(client, cache)
+    expire(cache, api)
+    api.status = status
+    assert fetch(client, cache, ttl=600) == (RELEASE, "stale")
+    assert len(api.requests) == 2
+
+
+@pytest.mark.parametrize("status", [403, 429, 500])
+def test_error_without_cache_fails(api, cache, client, status):
+    api.status = status
+    with pytest.raises(RuntimeError, match=f"returned {status}"):
+        fetch(client, cache)
+
+
+def test_not_found_is_not_masked_by_cache(api, cache, client):
+    fetch(client, cache)
+    expire(cache, api)
+    api.status = 404
+    with pytest.raises(RuntimeError, match="returned 404"):
+        fetch(client, cache, ttl=600)
+
+
+def test_unreachable_server_serves_stale(api, cache, client):
+    fetch(client, cache)
+    expire(cache, api)
+    api.shutdown()
+    api.server_close()
+    assert fetch(client, cache, ttl=600) == (RELEASE, "stale")
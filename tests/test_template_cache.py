@@ -0,0 +1,147 @@
+"""The template cache: keys, concurrent builds, restores, and user overrides of the agent registry."""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+import specify_cli
+from specify_cli import agents
+from specify_cli.template_cache import TemplateCache
+
+REPO_ROOT = Path(specify_cli.__file__).resolve().parent.parent.parent
+
+needs_templates = pytest.mark.skipif(not (REPO_ROOT / "templates" / "commands").is_dir(),
+                                     reason="needs the templates of a spec-kit checkout")
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPECIFY_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("SPECIFY_AGENTS_FILE", str(tmp_path / "agents.toml"))
+    monkeypatch.delenv("SPECIFY_NO_CACHE", raising=False)
+    # Always use the cache, whatever the filesystem supports
+    monkeypatch.setenv("SPECIFY_CACHE_LINK", "copy")
+    monkeypatch.setattr(agents, "_registry", None)
+
+
+def override(tmp_path, monkeypatch, text: str) -> None:
+    (tmp_path / "agents.toml").write_text(text)
+    monkeypatch.setattr(agents, "_registry", None)
+
+
+def render(project: Path) -> dict:
+    return specify_cli._render_local_project(project, ["claude"], "sh", repo_root=REPO_ROOT)
+
+
+def command_text(project: Path) -> str:
+    return "".join(path.read_text() for path in sorted((project / ".claude" / "commands").glob("*.md")))
+
+
+@needs_templates
+def test_cache_is_keyed_on_agent_overrides(tmp_path, monkeypatch):
+    assert render(tmp_path / "first")["source"] == "local_script"
+    assert render(tmp_path / "second")["source"] == "local_cache"
+    assert "{{args}}" not in command_text(tmp_path / "second")
+
+    override(tmp_path, monkeypatch, '[agents.claude]\narg_format = "{{args}}"\n')
+    assert render(tmp_path / "third")["source"] == "local_script"
+    assert "{{args}}" in command_text(tmp_path / "third")
+
+
+@needs_templates
+def test_upgrade_plan_changes_with_agent_overrides(tmp_path, monkeypatch):
+    before = {f.dest: f.source_hash for f in specify_cli._local_upgrade_plan(["claude"], "sh")}
+    override(tmp_path, monkeypatch, '[agents.claude]\narg_format = "{{args}}"\n')
+    after = {f.dest: f.source_hash for f in specify_cli._local_upgrade_plan(["claude"], "sh")}
+    commands = [dest for dest in before if dest.startswith(".claude/commands/")]
+    assert commands and all(before[dest] != after[dest] for dest in commands)
+
+
+@needs_templates
+def test_explicit_registry_leaves_the_process_registry_alone(tmp_path):
+    (tmp_path / "agents.toml").write_text('[agents.claude]\narg_format = "{{args}}"\n')
+    registry = agents.load_registry(tmp_path / "agents.toml")
+    specify_cli._render_local_project(tmp_path / "project", ["claude"], "sh", repo_root=REPO_ROOT, registry=registry)
+    assert "{{args}}" in command_text(tmp_path / "project")
+    plan = specify_cli.plan_project(["claude"], "sh", registry=registry)
+    assert plan.files and agents._registry is None
+
+
+def source_tree(root: Path) -> Path:
+    (root / "templates" / "commands").mkdir(parents=True)
+    (root / "templates" / "spec-template.md").write_text("# Spec\n")
+    (root / "templates" / "commands" / "plan.md").write_text("Plan {ARGS}\n")
+    return root
+
+
+def test_key_changes_with_sources_agent_and_registry_entry(tmp_path):
+    cache = TemplateCache(tmp_path / "cache")
+    root = source_tree(tmp_path / "src")
+    key = cache.key(root, "claude", "sh", "d1")
+    assert cache.key(root, "claude", "sh", "d1") == key
+    assert len({key, cache.key(root, "gemini", "sh", "d1"), cache.key(root, "claude", "ps", "d1"),
+                cache.key(root, "claude", "sh", "d2")}) == 4
+    (root / "templates" / "commands" / "plan.md").write_text("Plan {ARGS} revised\n")
+    edited = cache.key(root, "claude", "sh", "d1")
+    assert edited != key
+    (root / "templates" / "new.md").write_text("new\n")
+    assert cache.key(root, "claude", "sh", "d1") not in (key, edited)
+
+
+def test_concurrent_builds_publish_one_entry(tmp_path):
+    cache = TemplateCache(tmp_path / "cache")
+    barrier = threading.Barrier(4)
+    metas = []
+
+    def builder(tree: Path) -> dict:
+        (tree / "file.txt").write_text(threading.current_thread().name)
+        barrier.wait()
+        return {"builder": threading.current_thread().name}
+
+    threads = [threading.Thread(target=lambda: metas.append(cache.build("k", builder)), name=f"t{i}") for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Every builder gets the entry that won the rename, whose tree matches its metadata
+    winner = cache.meta("k")["builder"]
+    assert [m["builder"] for m in metas] == [winner] * 4
+    assert (cache.entry_dir("k") / "tree" / "file.txt").read_text() == winner
+    assert sorted(p.name for p in cache.root.iterdir()) == ["k"]
+
+
+def test_build_of_a_published_key_keeps_the_entry(tmp_path):
+    cache = TemplateCache(tmp_path / "cache")
+
+    def builder(text: str):
+        def build(tree: Path) -> dict:
+            (tree / "file.txt").write_text(text)
+            return {"text": text}
+        return build
+
+    cache.build("k", builder("first"))
+    assert cache.build("k", builder("second")) == {"text": "first"}
+    assert (cache.entry_dir("k") / "tree" / "file.txt").read_text() == "first"
+
+
+def test_restore_copies_the_tree_over_existing_files(tmp_path):
+    cache = TemplateCache(tmp_path / "cache", link_mode="copy")
+
+    def builder(tree: Path) -> dict:
+        (tree / ".specify" / "templates").mkdir(parents=True)
+        (tree / ".specify" / "templates" / "spec.md").write_text("cached")
+        (tree / "README.md").write_text("readme")
+        return {}
+
+    cache.build("k", builder)
+    project = tmp_path / "project"
+    (project / ".specify" / "templates").mkdir(parents=True)
+    (project / ".specify" / "templates" / "spec.md").write_text("stale")
+    assert cache.link_strategy(project) == "copy"
+    assert cache.restore("k", project) == 2
+    restored = project / ".specify" / "templates" / "spec.md"
+    assert restored.read_text() == "cached"
+    # A copy: editing the project leaves the cache alone
+    restored.write_text("edited")
+    assert (cache.entry_dir("k") / "tree" / ".specify" / "templates" / "spec.md").read_text() == "cached"
@@ -0,0 +1,117 @@
+"""Merge bases of `specify upgrade`: shared between project copies, recoverable from git."""
+
+import hashlib
+import shutil
+import subprocess
+
+import pytest
+
+from specify_cli.upgrade import CONFLICT_SUFFIX, MANIFEST_PATH, PlannedFile, upgrade_project, write_manifest
+
+INFO = {"agents": ["claude"], "script_type": "sh", "source": "local"}
+V1 = "# Plan\n\nStep one.\nStep two.\nStep three.\n"
+# Upstream changes the last line; the user edits the first
+V2 = "# Plan\n\nStep one.\nStep two.\nStep three, revised.\n"
+EDITED = "# Our plan\n\nStep one.\nStep two.\nStep three.\n"
+MERGED = "# Our plan\n\nStep one.\nStep two.\nStep three, revised.\n"
+
+
+def plan(text: str) -> list[PlannedFile]:
+    data = text.encode()
+    return [PlannedFile(".specify/templates/plan.md", hashlib.sha256(data).hexdigest(), lambda: data, rendered=True)]
+
+
+def init(project):
+    (project / ".specify" / "templates").mkdir(parents=True)
+    (project / ".specify" / "templates" / "plan.md").write_text(V1)
+    write_manifest(project, plan(V1), INFO)
+
+
+def edit(project):
+    (project / ".specify" / "templates" / "plan.md").write_text(EDITED)
+
+
+def upgraded(project) -> str:
+    return (project / ".specify" / "templates" / "plan.md").read_text()
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("SPECIFY_CACHE_DIR", str(cache))
+    return cache
+
+
+def test_edited_file_is_merged(tmp_path):
+    project = tmp_path / "project"
+    init(project)
+    edit(project)
+    report = upgrade_project(project, plan(V2), INFO)
+    assert report.merged == [".specify/templates/plan.md"] and not report.conflicts
+    assert upgraded(project) == MERGED
+
+
+def test_copies_of_a_project_keep_their_bases(tmp_path):
+    first = tmp_path / "first"
+    init(first)
+    second = tmp_path / "second"
+    shutil.copytree(first, second)
+    edit(first)
+    edit(second)
+    assert upgrade_project(first, plan(V2), INFO).merged
+    # Upgrading the first copy must not take the second copy's base away
+    report = upgrade_project(second, plan(V2), INFO)
+    assert report.merged == [".specify/templates/plan.md"] and not report.conflicts
+    assert upgraded(second) == MERGED
+    assert not (second / ".specify" / "templates" / ("plan.md" + CONFLICT_SUFFIX)).exists()
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_cleared_cache_reads_bases_from_git(tmp_path, cache_dir):
+    from specify_cli.gitrepo import bootstrap_repo
+
+    project = tmp_path / "project"
+    init(project)
+    env = {"GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@x", "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@x"}
+    with pytest.MonkeyPatch.context() as mp:
+        for key, value in env.items():
+            mp.setenv(key, value)
+        bootstrap_repo(project, [".specify/templates/plan.md", MANIFEST_PATH.as_posix()], "init")
+    clone = tmp_path / "clone"
+    subprocess.run(["git", "clone", "-q", str(project), str(clone)], check=True)
+    shutil.rmtree(cache_dir)
+    edit(clone)
+    report = upgrade_project(clone, plan(V2), INFO)
+    assert report.merged == [".specify/templates/plan.md"] and not report.conflicts
+    assert upgraded(clone) == MERGED
+
+
+def test_without_any_base_the_new_version_is_written_aside(tmp_path, cache_dir):
+    project = tmp_path / "project"
+    init(project)
+    shutil.rmtree(cache_dir)
+    edit(project)
+    report = upgrade_project(project, plan(V2), INFO)
+    assert report.conflicts == [".specify/templates/plan.md"]
+    assert upgraded(project) == EDITED
+    assert (project / ".specify" / "templates" / ("plan.md" + CONFLICT_SUFFIX)).read_text() == V2
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_init_git_repo_commits_the_manifest(tmp_path, monkeypatch):
+    from specify_cli import init_git_repo
+    from specify_cli.upgrade import manifest_paths
+
+    for key in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(key, "t")
+    for key in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(key, "t@x")
+    project = tmp_path / "project"
+    init(project)
+    assert init_git_repo(project, quiet=True, files=manifest_paths(project))
+    tracked = subprocess.run(["git", "ls-files"], cwd=project, capture_output=True, text=True, check=True).stdout
+    assert MANIFEST_PATH.as_posix() in tracked.splitlines()
+    status = subprocess.run(["git", "status", "--porcelain"], cwd=project, capture_output=True, text=True, check=True)
+    assert status.stdout == ""
+    exclude = project / ".git" / "info" / "exclude"
+    assert not exclude.exists() or MANIFEST_PATH.as_posix() not in exclude.read_text()